@@ -0,0 +1,168 @@
+"""
+메트릭 시계열 이상 탐지 (NumPy 벡터화)
+
+여러 서비스의 메트릭 시계열을 하나의 (시계열 수 x 시점 수) 행렬로 쌓아
+z-score, EWMA 관리 한계, 평균 변화점(change-point) 탐지를 한 번에 수행하고
+"무엇이, 언제, 얼마나 움직였는지" 요약을 만듭니다.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+
+def build_matrix(series: Dict[str, List[float]]) -> Tuple[List[str], np.ndarray]:
+    """{이름: 값 목록}을 (시계열 수 x 시점 수) 행렬로 변환 (짧은 시계열은 앞쪽을 NaN으로 채움)"""
+    names = list(series)
+    length = max((len(v) for v in series.values()), default=0)
+    matrix = np.full((len(names), length), np.nan, dtype=np.float64)
+    for i, name in enumerate(names):
+        values = np.asarray(series[name], dtype=np.float64)
+        if len(values):
+            matrix[i, length - len(values):] = values
+    return names, matrix
+
+
+def _fill_missing(matrix: np.ndarray) -> np.ndarray:
+    """NaN을 시계열별 평균으로 대체"""
+    row_means = np.nanmean(np.where(np.isnan(matrix).all(axis=1, keepdims=True), 0.0, matrix), axis=1)
+    return np.where(np.isnan(matrix), row_means[:, None], matrix)
+
+
+def ewma(matrix: np.ndarray, alpha: float) -> np.ndarray:
+    """시계열별 지수 가중 이동 평균 (시점 축으로만 순회, 시계열 축은 벡터 연산)"""
+    out = np.empty_like(matrix)
+    out[:, 0] = matrix[:, 0]
+    for t in range(1, matrix.shape[1]):
+        out[:, t] = alpha * matrix[:, t] + (1 - alpha) * out[:, t - 1]
+    return out
+
+
+def change_points(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """시계열별 단일 평균 변화점 탐지 (누적합 기반 CUSUM 통계)
+
+    반환값: (변화 시점 인덱스, 표준화된 변화 강도, 변화 전 평균, 변화 후 평균)
+    """
+    n, length = matrix.shape
+    if length < 4:
+        mean = matrix.mean(axis=1)
+        return np.zeros(n, dtype=int), np.zeros(n), mean, mean
+
+    cumsum = np.cumsum(matrix, axis=1)
+    total = cumsum[:, -1:]
+    k = np.arange(1, length, dtype=np.float64)  # 왼쪽 구간 길이
+    left_mean = cumsum[:, :-1] / k
+    right_mean = (total - cumsum[:, :-1]) / (length - k)
+    weight = np.sqrt(k * (length - k) / length)
+    stat = np.abs(left_mean - right_mean) * weight
+
+    # 양 끝 1개 구간은 제외 (단일 이상값이 변화점으로 잡히지 않도록)
+    stat[:, [0, -1]] = 0.0
+    index = np.argmax(stat, axis=1)
+    rows = np.arange(n)
+    sigma = np.std(matrix, axis=1)
+    strength = stat[rows, index] / np.where(sigma > 0, sigma, 1.0)
+    return index + 1, strength, left_mean[rows, index], right_mean[rows, index]
+
+
+def _label(timestamps: List[str], index: int) -> Any:
+    """시점 인덱스를 타임스탬프로 변환 (타임스탬프가 없으면 인덱스 그대로)"""
+    if timestamps and 0 <= index < len(timestamps):
+        return timestamps[index]
+    return index
+
+
+def detect_anomalies(
+    series: Dict[str, List[float]],
+    timestamps: List[str] = None,
+    baseline_fraction: float = None,
+    recent_points: int = None,
+    z_threshold: float = None,
+    ewma_alpha: float = 0.3,
+    top_n: int = None,
+) -> Dict[str, Any]:
+    """모든 시계열에 대해 이상 탐지를 한 번에 수행하고 상위 변화 요약을 반환"""
+    baseline_fraction = settings.ANOMALY_BASELINE_FRACTION if baseline_fraction is None else baseline_fraction
+    recent_points = settings.ANOMALY_RECENT_POINTS if recent_points is None else recent_points
+    z_threshold = settings.ANOMALY_Z_THRESHOLD if z_threshold is None else z_threshold
+    top_n = settings.ANOMALY_TOP_N if top_n is None else top_n
+
+    names, raw = build_matrix(series)
+    if raw.size == 0:
+        return {"series_count": 0, "anomaly_count": 0, "anomalies": []}
+
+    matrix = _fill_missing(raw)
+    n, length = matrix.shape
+    baseline_end = max(2, int(length * baseline_fraction))
+    recent_points = max(1, min(recent_points, length - baseline_end))
+
+    # 1) 기준 구간 대비 최근 구간 z-score
+    baseline = matrix[:, :baseline_end]
+    mu = baseline.mean(axis=1)
+    sigma = baseline.std(axis=1)
+    sigma = np.maximum(sigma, np.maximum(np.abs(mu) * 0.01, 1e-9))  # 평탄한 시계열의 0 나눗셈 방지
+    recent = matrix[:, -recent_points:].mean(axis=1)
+    z = (recent - mu) / sigma
+
+    # 2) EWMA 관리 한계 이탈 시점
+    smoothed = ewma(matrix, ewma_alpha)
+    limit = z_threshold * sigma * np.sqrt(ewma_alpha / (2 - ewma_alpha))
+    breach = np.abs(smoothed - mu[:, None]) > limit[:, None]
+    breach[:, :baseline_end] = False
+    ewma_breached = breach.any(axis=1)
+    first_breach = np.where(ewma_breached, np.argmax(breach, axis=1), -1)
+
+    # 3) 평균 변화점
+    cp_index, cp_strength, before, after = change_points(matrix)
+
+    # 최근 구간 내내 EWMA 한계를 벗어나 있거나, 최근 평균의 z-score가 임계값 이상인 시계열
+    sustained = breach[:, -recent_points:].all(axis=1)
+    flagged = np.flatnonzero((np.abs(z) >= z_threshold) | sustained)
+    order = flagged[np.argsort(-np.abs(z[flagged]))][:top_n]
+
+    anomalies = []
+    for i in order:
+        name = names[i]
+        service, _, metric = name.rpartition("/")
+        delta = float(after[i] - before[i])
+        anomalies.append({
+            "series": name,
+            "service": service or name,
+            "metric": metric or name,
+            "direction": "up" if z[i] > 0 else "down",
+            "z_score": round(float(z[i]), 2),
+            "baseline_mean": round(float(mu[i]), 4),
+            "recent_mean": round(float(recent[i]), 4),
+            "change_index": int(cp_index[i]),
+            "changed_at": _label(timestamps, int(cp_index[i])),
+            "detected_at": _label(timestamps, int(first_breach[i])) if first_breach[i] >= 0 else None,
+            "before_mean": round(float(before[i]), 4),
+            "after_mean": round(float(after[i]), 4),
+            "delta": round(delta, 4),
+            "delta_pct": round(float(delta / abs(before[i]) * 100), 1) if before[i] else None,
+            "change_strength": round(float(cp_strength[i]), 2),
+        })
+
+    return {
+        "series_count": n,
+        "points_per_series": length,
+        "anomaly_count": int(len(flagged)),
+        "anomalies": anomalies,
+    }
+
+
+def format_metric_anomalies(summary: Dict[str, Any]) -> str:
+    """프롬프트용 이상 탐지 요약 텍스트"""
+    if not summary or not summary.get("anomalies"):
+        return "유의미한 메트릭 변화 없음"
+
+    lines = [f"시계열 {summary['series_count']}개 중 {summary['anomaly_count']}개에서 변화 감지"]
+    for a in summary["anomalies"]:
+        pct = f", {a['delta_pct']:+.1f}%" if a["delta_pct"] is not None else ""
+        lines.append(
+            f"- {a['service']} {a['metric']}: {a['before_mean']} -> {a['after_mean']} "
+            f"({a['changed_at']}부터{pct}, z={a['z_score']})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,277 @@
+"""
+AWS 어댑터 계층
+
+도구(agent/tools.py)가 호출마다 세션/클라이언트를 만들지 않도록, 하나의 boto3 세션에서
+(서비스, 리전)별 클라이언트를 한 번만 만들어 재사용합니다 (커넥션 풀, 재시도, 타임아웃 설정 포함).
+네트워크 없이 풀링 효과를 측정할 수 있도록 지연 시간을 설정할 수 있는 프로세스 내 스텁 백엔드를 함께 제공합니다.
+
+settings.AWS_BACKEND
+- mock: 기존 도구 내장 Mock 응답 사용 (기본값)
+- stub: StubAWSBackend (지연 시간 시뮬레이션)
+- boto3: 실제 AWS 호출
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+class Boto3Backend:
+    """장기 유지되는 (서비스, 리전)별 boto3 클라이언트를 사용하는 백엔드"""
+
+    def __init__(self, region: str = None):
+        import boto3
+        from botocore.config import Config
+
+        self.region = region or settings.AWS_DEFAULT_REGION
+        self._session = boto3.session.Session(
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=self.region
+        )
+        self._config = Config(
+            max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+            retries={"total_max_attempts": settings.AWS_MAX_ATTEMPTS, "mode": settings.AWS_RETRY_MODE},
+            connect_timeout=settings.AWS_CONNECT_TIMEOUT_S,
+            read_timeout=settings.AWS_READ_TIMEOUT_S,
+            tcp_keepalive=True
+        )
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()  # boto3 세션은 스레드 안전하지 않으므로 클라이언트 생성만 직렬화
+
+    def client(self, service: str, region: str = None):
+        """(서비스, 리전)별 클라이언트 (최초 호출 시 생성, 이후 재사용)"""
+        key = (service, region or self.region)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._session.client(service, region_name=key[1], config=self._config)
+                    self._clients[key] = client
+        return client
+
+    def _paginate(self, service: str, operation: str, result_key: str, region: str = None, **params) -> List[Any]:
+        """페이지네이터로 모든 페이지의 result_key 항목 수집"""
+        paginator = self.client(service, region).get_paginator(operation)
+        items: List[Any] = []
+        for page in paginator.paginate(**params):
+            items.extend(page.get(result_key, []))
+        return items
+
+    def describe_ecs_service(self, service: str, cluster: str) -> Dict[str, Any]:
+        """ECS 서비스 상태 (실행 중 태스크의 헬스 상태 포함)"""
+        ecs = self.client("ecs")
+        described = ecs.describe_services(cluster=cluster, services=[service])["services"]
+        if not described:
+            raise ValueError(f"ECS 서비스를 찾을 수 없습니다: {cluster}/{service}")
+
+        task_arns = self._paginate(
+            "ecs", "list_tasks", "taskArns",
+            cluster=cluster, serviceName=service, desiredStatus="RUNNING"
+        )
+        healthy = 0
+        for i in range(0, len(task_arns), 100):  # describe_tasks는 최대 100개씩
+            for task in ecs.describe_tasks(cluster=cluster, tasks=task_arns[i:i + 100])["tasks"]:
+                healthy += task.get("healthStatus") == "HEALTHY"
+
+        desc = described[0]
+        return {
+            "service": service,
+            "status": desc["status"],
+            "running_count": desc["runningCount"],
+            "desired_count": desc["desiredCount"],
+            "healthy_tasks": healthy,
+            "health_status": "healthy" if healthy >= desc["desiredCount"] else "degraded"
+        }
+
+    def restart_ecs_service(self, service: str, cluster: str, force: bool = False) -> Dict[str, Any]:
+        """새 배포를 강제해 ECS 태스크 교체"""
+        response = self.client("ecs").update_service(cluster=cluster, service=service, forceNewDeployment=True)
+        return {
+            "service": service,
+            "action": "restart_completed",
+            "new_task_count": response["service"]["desiredCount"],
+            "status": "success"
+        }
+
+    def describe_db(self, database: str) -> Dict[str, Any]:
+        """RDS 인스턴스 상태와 최근 커넥션 수"""
+        instances = self._paginate("rds", "describe_db_instances", "DBInstances", DBInstanceIdentifier=database)
+        if not instances:
+            raise ValueError(f"DB 인스턴스를 찾을 수 없습니다: {database}")
+
+        end = time.time()
+        datapoints = self.client("cloudwatch").get_metric_statistics(
+            Namespace="AWS/RDS",
+            MetricName="DatabaseConnections",
+            Dimensions=[{"Name": "DBInstanceIdentifier", "Value": database}],
+            StartTime=end - 300,
+            EndTime=end,
+            Period=60,
+            Statistics=["Average"]
+        )["Datapoints"]
+        latest = max(datapoints, key=lambda d: d["Timestamp"])["Average"] if datapoints else None
+
+        return {
+            "database": database,
+            "status": instances[0]["DBInstanceStatus"],
+            "active_connections": int(latest) if latest is not None else None
+        }
+
+
+class _StubConnectionPool:
+    """스텁용 커넥션 풀 (새 커넥션은 핸드셰이크 지연을 치름)"""
+
+    def __init__(self, max_size: int, handshake_s: float):
+        self.max_size = max_size
+        self.handshake_s = handshake_s
+        self._idle: "queue.LifoQueue[int]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self) -> int:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            time.sleep(self.handshake_s)  # TCP + TLS 핸드셰이크
+            with self._lock:
+                self.created += 1
+                return self.created
+
+    def release(self, conn: int):
+        self._idle.put(conn)
+        self._slots.release()
+
+
+class StubAWSBackend:
+    """네트워크 없이 AWS 호출 지연을 흉내 내는 백엔드
+
+    pooled=False면 매 호출마다 새 클라이언트(커넥션)를 만드는 것처럼 핸드셰이크 지연을 치릅니다.
+    """
+
+    def __init__(
+        self,
+        latency_s: float = None,
+        handshake_s: float = None,
+        pooled: bool = True,
+        max_pool_connections: int = None,
+    ):
+        self.latency_s = settings.AWS_STUB_LATENCY_S if latency_s is None else latency_s
+        self.handshake_s = settings.AWS_STUB_HANDSHAKE_S if handshake_s is None else handshake_s
+        self.pooled = pooled
+        self._pools: Dict[Tuple[str, str], _StubConnectionPool] = {}
+        self._max_pool_connections = max_pool_connections or settings.AWS_MAX_POOL_CONNECTIONS
+        self._lock = threading.Lock()
+        self.calls = 0
+        self._restarted: Dict[Tuple[str, str], float] = {}  # 재시작된 서비스 -> 재시작 시각
+
+    def _pool(self, service: str, region: str = None) -> _StubConnectionPool:
+        key = (service, region or settings.AWS_DEFAULT_REGION)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = _StubConnectionPool(self._max_pool_connections, self.handshake_s)
+            return self._pools[key]
+
+    def _request(self, service: str):
+        """API 호출 1회 (풀에서 커넥션을 빌리거나 새로 연결)"""
+        with self._lock:
+            self.calls += 1
+        if not self.pooled:
+            time.sleep(self.handshake_s + self.latency_s)
+            return
+        pool = self._pool(service)
+        conn = pool.acquire()
+        try:
+            time.sleep(self.latency_s)
+        finally:
+            pool.release(conn)
+
+    def connections_created(self) -> int:
+        """지금까지 새로 맺은 커넥션 수 (풀링 효과 확인용)"""
+        if not self.pooled:
+            return self.calls
+        with self._lock:
+            return sum(pool.created for pool in self._pools.values())
+
+    def describe_ecs_service(self, service: str, cluster: str) -> Dict[str, Any]:
+        for _ in range(3):  # describe_services + list_tasks + describe_tasks
+            self._request("ecs")
+        # 재시작 후 restart_s가 지나면 모든 태스크가 정상
+        restarted_at = self._restarted.get((cluster, service))
+        healthy = restarted_at is not None and time.monotonic() - restarted_at >= settings.AWS_STUB_RESTART_S
+        return {
+            "service": service,
+            "status": "ACTIVE",
+            "running_count": 3,
+            "desired_count": 3,
+            "healthy_tasks": 3 if healthy else 2,
+            "health_status": "healthy" if healthy else "degraded"
+        }
+
+    def restart_ecs_service(self, service: str, cluster: str, force: bool = False) -> Dict[str, Any]:
+        self._request("ecs")
+        with self._lock:
+            self._restarted[(cluster, service)] = time.monotonic()
+        return {
+            "service": service,
+            "action": "restart_completed",
+            "new_task_count": 3,
+            "status": "success"
+        }
+
+    def describe_db(self, database: str) -> Dict[str, Any]:
+        self._request("rds")
+        self._request("cloudwatch")
+        return {
+            "database": database,
+            "status": "available",
+            "active_connections": 18
+        }
+
+
+_backend_lock = threading.Lock()
+_backend = None
+
+
+def get_aws_backend():
+    """settings.AWS_BACKEND에 따른 전역 백엔드 (mock이면 None)"""
+    global _backend
+    if settings.AWS_BACKEND == "mock":
+        return None
+    with _backend_lock:
+        if _backend is None:
+            if settings.AWS_BACKEND == "boto3":
+                _backend = Boto3Backend()
+            elif settings.AWS_BACKEND == "stub":
+                _backend = StubAWSBackend()
+            else:
+                raise ValueError(f"지원하지 않는 AWS_BACKEND: {settings.AWS_BACKEND}")
+        return _backend
+
+
+def set_aws_backend(backend: Optional[Any]):
+    """전역 백엔드 교체 (벤치마크/데모용)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+if __name__ == "__main__":
+    # 풀링 효과 측정: 동시 조회를 커넥션 재사용 / 호출마다 새 연결로 각각 실행
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls, workers = 200, 20
+    for pooled in (False, True):
+        backend = StubAWSBackend(pooled=pooled)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda i: backend.describe_ecs_service(f"service-{i % 5}", "prod"), range(calls)))
+        elapsed = time.monotonic() - started
+        label = "커넥션 풀 재사용" if pooled else "호출마다 새 연결"
+        print(f"{label}: {calls}회 {elapsed:.2f}초 ({calls / elapsed:.0f}회/초), 새 연결 {backend.connections_created()}개")
@@ -0,0 +1,44 @@
+"""
+그래프 영속 체크포인트
+
+RemediationDecision의 interrupt 지점까지 진행된 실행 상태를 SQLite 파일에 저장해서,
+승인 시 처음부터 다시 실행하지 않고 thread_id(장애 ID)로 중단 지점부터 재개합니다.
+프로세스가 재시작되어도 승인 대기 중인 장애는 그대로 남습니다.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, Dict
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+_lock = threading.Lock()
+_checkpointer = None
+
+
+def get_checkpointer() -> "SqliteSaver":
+    """프로세스 전역 SQLite 체크포인터 (최초 호출 시 생성)"""
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            directory = os.path.dirname(settings.CHECKPOINT_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            from langgraph.checkpoint.sqlite import SqliteSaver
+            conn = sqlite3.connect(settings.CHECKPOINT_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            _checkpointer = SqliteSaver(conn)
+            _checkpointer.setup()
+        return _checkpointer
+
+
+def thread_config(thread_id: str, recursion_limit: int = 50) -> Dict[str, Any]:
+    """thread_id 기반 실행 설정"""
+    return {
+        "configurable": {"thread_id": thread_id},
+        "recursion_limit": recursion_limit
+    }
@@ -0,0 +1,372 @@
+"""
+모니터링 데이터 병렬 수집기
+
+CloudWatch / Datadog / X-Ray 등 각 소스를 동시에 조회하고,
+소스별 마감 시간(deadline)을 넘기면 그때까지 받은 부분 결과만 사용합니다.
+실행 중인 스레드는 취소할 수 없으므로, 마감 시간은 buffer.remaining()으로 소스에 전달해 클라이언트 타임아웃에 쓰게 하고,
+마감을 넘긴 호출이 아직 끝나지 않은 소스는 다음 장애에서 새로 조회하지 않습니다 (멈춘 백엔드가 공용 풀을 차지하지 않도록).
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent.instrumentation import COLLECTOR_ABANDONED, watch_pool_queue
+from config.settings import settings
+
+
+class SourceBuffer:
+    """소스가 수집 도중 받은 데이터를 쌓아두는 버퍼 (타임아웃 시 부분 결과로 사용)"""
+
+    def __init__(self, kind: type, deadline: Optional[float] = None):
+        self._kind = kind
+        self._data = kind()
+        self._lock = threading.Lock()
+        self.deadline = deadline  # time.monotonic() 기준 마감 시각
+
+    def remaining(self) -> Optional[float]:
+        """마감까지 남은 시간(초) (소스는 이 값을 클라이언트 타임아웃으로 사용)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def extend(self, items: List[Any]):
+        """리스트형 데이터 추가 (로그, 트레이스)"""
+        with self._lock:
+            self._data.extend(items)
+
+    def update(self, values: Dict[str, Any]):
+        """딕셔너리형 데이터 추가 (메트릭, 컨텍스트)"""
+        with self._lock:
+            self._data.update(values)
+
+    def snapshot(self) -> Any:
+        """현재까지 수집된 데이터의 복사본"""
+        with self._lock:
+            return self._kind(self._data)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class CollectorSource:
+    """수집 소스 정의
+
+    fetch(state, buffer)는 최종 결과를 반환하거나, None을 반환하면 buffer 내용을 결과로 사용합니다.
+    외부 호출에는 buffer.remaining()을 타임아웃으로 넘겨 마감 시간이 지나면 스스로 끝나야 합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        state_key: str,
+        fetch: Callable[[Dict[str, Any], SourceBuffer], Any],
+        kind: type = list,
+        timeout: Optional[float] = None,
+        keep_existing: bool = False,
+    ):
+        self.name = name
+        self.state_key = state_key
+        self.fetch = fetch
+        self.kind = kind
+        self.timeout = timeout
+        self.keep_existing = keep_existing  # state에 값이 이미 있으면 수집하지 않음
+
+
+class StubSource(CollectorSource):
+    """지연 시간을 설정할 수 있는 로컬 스텁 소스 (테스트/벤치마크용)
+
+    payload를 pages 개로 나눠 페이지마다 latency / pages 초씩 대기하며 버퍼에 쌓고,
+    마감 시간이 지나면 클라이언트 타임아웃처럼 TimeoutError로 끝납니다 (그때까지 쌓인 페이지는 부분 결과).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        state_key: str,
+        payload: Any,
+        latency: float = 0.0,
+        pages: int = 1,
+        timeout: Optional[float] = None,
+        error: Optional[Exception] = None,
+    ):
+        self.payload = payload
+        self.latency = latency
+        self.pages = max(1, pages)
+        self.error = error
+        super().__init__(name, state_key, self._fetch, kind=type(payload), timeout=timeout)
+
+    def _fetch(self, state: Dict[str, Any], buffer: SourceBuffer):
+        if isinstance(self.payload, dict):
+            items = list(self.payload.items())
+        else:
+            items = list(self.payload)
+
+        page_size = -(-len(items) // self.pages) if items else 0
+        for page in range(self.pages):
+            remaining = buffer.remaining()
+            if remaining is not None and remaining < self.latency / self.pages:
+                time.sleep(remaining)
+                raise TimeoutError(f"{self.name} 마감 시간 초과")
+            time.sleep(self.latency / self.pages)
+            chunk = items[page * page_size:(page + 1) * page_size]
+            if isinstance(self.payload, dict):
+                buffer.update(dict(chunk))
+            else:
+                buffer.extend(chunk)
+
+        if self.error:
+            raise self.error
+        return None
+
+
+# --- 기본 소스 (Mock CloudWatch / Datadog / X-Ray) ---
+def fetch_cloudwatch_logs(state: Dict[str, Any], buffer: SourceBuffer):
+    """CloudWatch Logs 조회 (Mock)"""
+    buffer.extend([
+        {
+            "timestamp": "2024-01-15T14:30:45Z",
+            "level": "ERROR",
+            "service": "service-a",
+            "message": "ConnectionTimeout: Failed to connect to database after 30s"
+        },
+        {
+            "timestamp": "2024-01-15T14:30:46Z",
+            "level": "ERROR",
+            "service": "service-a",
+            "message": "org.springframework.dao.QueryTimeoutException: Query timed out"
+        },
+        {
+            "timestamp": "2024-01-15T14:30:47Z",
+            "level": "WARN",
+            "service": "service-a",
+            "message": "Connection pool exhausted, current: 20/20"
+        }
+    ])
+
+
+def fetch_datadog_metrics(state: Dict[str, Any], buffer: SourceBuffer):
+    """Datadog 메트릭 조회 (Mock)"""
+    buffer.update({
+        "error_rate": "25%",
+        "latency_p95_ms": 3500,
+        "latency_p99_ms": 8000,
+        "cpu_usage_percent": 85.2,
+        "memory_usage_percent": 92.1,
+        "db_connection_count": 20,
+        "db_max_connections": 20,
+        "request_rate_per_sec": 150
+    })
+
+
+def fetch_datadog_metric_series(state: Dict[str, Any], buffer: SourceBuffer):
+    """Datadog 메트릭 시계열 조회 (Mock, 1분 간격 60포인트 / service-a에서 45분 시점부터 장애)"""
+    rng = random.Random(42)
+    end = datetime(2024, 1, 15, 14, 31, tzinfo=timezone.utc)
+    points = 60
+    incident_at = 45
+    timestamps = [
+        (end - timedelta(minutes=points - 1 - i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for i in range(points)
+    ]
+    
+    # (서비스, 메트릭) -> (평상시 값, 노이즈, 장애 후 값)
+    profiles = {
+        ("service-a", "error_rate"): (0.01, 0.003, 0.25),
+        ("service-a", "latency_p95_ms"): (320, 25, 3500),
+        ("service-a", "db_connection_count"): (8, 1, 20),
+        ("service-a", "cpu_usage_percent"): (45, 4, 85),
+        ("api-gateway", "error_rate"): (0.005, 0.002, 0.12),
+        ("api-gateway", "request_rate_per_sec"): (150, 10, 150),
+        ("database", "cpu_usage_percent"): (35, 3, 38),
+    }
+    
+    series = {}
+    for (service, metric), (normal, noise, degraded) in profiles.items():
+        series[f"{service}/{metric}"] = [
+            round((degraded if i >= incident_at else normal) + rng.gauss(0, noise), 4)
+            for i in range(points)
+        ]
+    
+    buffer.update({"timestamps": timestamps, "series": series})
+
+
+def fetch_xray_traces(state: Dict[str, Any], buffer: SourceBuffer):
+    """X-Ray 트레이스 조회 (Mock)"""
+    buffer.extend([
+        {
+            "trace_id": "abc-123-def-456",
+            "span_id": "span-1",
+            "parent_id": None,
+            "service": "api-gateway",
+            "start_ms": 0,
+            "duration_ms": 8200,
+            "status": "error"
+        },
+        {
+            "trace_id": "abc-123-def-456",
+            "span_id": "span-2",
+            "parent_id": "span-1",
+            "service": "service-a",
+            "start_ms": 50,
+            "duration_ms": 8100,
+            "status": "error",
+            "error": "timeout"
+        },
+        {
+            "trace_id": "abc-123-def-456",
+            "span_id": "span-3",
+            "parent_id": "span-2",
+            "service": "database",
+            "start_ms": 120,
+            "duration_ms": 7900,
+            "status": "error",
+            "error": "connection pool exhausted"
+        }
+    ])
+
+
+def fetch_deployment_context(state: Dict[str, Any], buffer: SourceBuffer):
+    """배포/환경 컨텍스트 조회 (Mock)"""
+    buffer.update({
+        "environment": "production",
+        "region": "us-west-2",
+        "cluster": "prod-cluster",
+        "deployment_version": "v1.2.3"
+    })
+
+
+def default_sources() -> List[CollectorSource]:
+    """기본 수집 소스 목록"""
+    return [
+        CollectorSource("cloudwatch_logs", "logs", fetch_cloudwatch_logs, kind=list),
+        CollectorSource("datadog_metrics", "metrics", fetch_datadog_metrics, kind=dict, keep_existing=True),
+        CollectorSource("datadog_metric_series", "metric_series", fetch_datadog_metric_series, kind=dict),
+        CollectorSource("xray_traces", "traces", fetch_xray_traces, kind=list),
+        CollectorSource("deployment_context", "context", fetch_deployment_context, kind=dict),
+    ]
+
+
+# 소스 조회용 공용 스레드 풀 (타임아웃된 호출이 노드 종료를 막지 않도록 노드 밖에서 유지)
+_executor = ThreadPoolExecutor(
+    max_workers=settings.COLLECTOR_MAX_WORKERS,
+    thread_name_prefix="collector"
+)
+watch_pool_queue("collector", _executor)
+
+# 마감에 맞춰 스스로 끝나는 소스(클라이언트 타임아웃)를 버린 호출로 세지 않도록 기다리는 여유 시간
+_ABANDON_GRACE_S = 0.05
+
+# 마감 시간을 넘겼지만 아직 실행 중인 호출 수 (소스 이름별)
+_abandoned: Dict[str, int] = {}
+_abandoned_lock = threading.Lock()
+
+
+def _abandon(source_name: str, future):
+    """마감을 넘긴 호출을 버리고, 끝날 때까지 해당 소스를 새로 조회하지 않도록 표시"""
+    with _abandoned_lock:
+        _abandoned[source_name] = _abandoned.get(source_name, 0) + 1
+    COLLECTOR_ABANDONED.inc(source=source_name)
+    print(f"⚠️ {source_name}: 마감 시간이 지났지만 호출이 끝나지 않아 수집 워커를 점유 중 (끝날 때까지 새로 조회하지 않음)")
+    future.add_done_callback(lambda _: _release_abandoned(source_name))
+
+
+def _release_abandoned(source_name: str):
+    with _abandoned_lock:
+        _abandoned[source_name] -= 1
+        if not _abandoned[source_name]:
+            del _abandoned[source_name]
+    COLLECTOR_ABANDONED.dec(source=source_name)
+
+
+def abandoned_calls() -> Dict[str, int]:
+    """소스별로 마감을 넘겨 아직 실행 중인 호출 수"""
+    with _abandoned_lock:
+        return dict(_abandoned)
+
+
+def _run_source(source: CollectorSource, state: Dict[str, Any], buffer: SourceBuffer) -> Tuple[Any, float]:
+    started = time.monotonic()
+    result = source.fetch(state, buffer)
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    return (buffer.snapshot() if result is None else result), elapsed_ms
+
+
+def collect_context(
+    state: Dict[str, Any],
+    sources: Optional[List[CollectorSource]] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """모든 소스를 동시에 조회하고 (state 업데이트, 수집 리포트)를 반환합니다
+
+    timeouts로 소스 이름별 마감 시간(초)을 덮어쓸 수 있습니다.
+    """
+    sources = default_sources() if sources is None else sources
+    timeouts = {**settings.COLLECTOR_SOURCE_TIMEOUTS, **(timeouts or {})}
+
+    started = time.monotonic()
+    pending = []
+    report: Dict[str, Any] = {"sources": {}, "timed_out": [], "failed": [], "busy": []}
+    updates: Dict[str, Any] = {}
+
+    for source in sources:
+        if source.keep_existing and state.get(source.state_key):
+            report["sources"][source.name] = {"status": "skipped", "elapsed_ms": 0}
+            continue
+
+        timeout = timeouts.get(source.name, source.timeout)
+        if timeout is None:
+            timeout = settings.COLLECTOR_TIMEOUT_S
+
+        buffer = SourceBuffer(source.kind, deadline=started + timeout)
+        if source.name in abandoned_calls():
+            # 이전 호출이 아직 멈춰 있으면 워커를 더 쓰지 않고 빈 결과로 처리
+            report["sources"][source.name] = {"status": "busy", "timeout_s": timeout, "elapsed_ms": 0, "items": 0}
+            report["busy"].append(source.name)
+            updates.setdefault(source.state_key, buffer.snapshot())
+            continue
+
+        future = _executor.submit(_run_source, source, state, buffer)
+        pending.append((source, buffer, future, started + timeout, timeout))
+
+    # 모든 소스가 이미 동시에 실행 중이므로, 각자의 마감 시간까지만 기다림
+    for source, buffer, future, deadline, timeout in pending:
+        entry: Dict[str, Any] = {"timeout_s": timeout}
+        try:
+            value, entry["elapsed_ms"] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            entry["status"] = "ok"
+        except FutureTimeoutError:
+            # 대기 중이면 취소되고, 소스가 클라이언트 타임아웃으로 끝났으면 바로 완료됨
+            if not future.cancel():
+                try:
+                    future.exception(timeout=_ABANDON_GRACE_S)
+                except FutureTimeoutError:
+                    _abandon(source.name, future)
+            value = buffer.snapshot()
+            entry["status"] = "timeout"
+            entry["partial"] = len(value) > 0
+            report["timed_out"].append(source.name)
+        except Exception as e:
+            value = buffer.snapshot()
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            entry["partial"] = len(value) > 0
+            report["failed"].append(source.name)
+
+        entry.setdefault("elapsed_ms", round((time.monotonic() - started) * 1000, 1))
+        entry["items"] = len(value)
+        report["sources"][source.name] = entry
+
+        if source.state_key in updates and isinstance(value, list):
+            updates[source.state_key] = updates[source.state_key] + value
+        elif source.state_key in updates and isinstance(value, dict):
+            updates[source.state_key] = {**updates[source.state_key], **value}
+        else:
+            updates[source.state_key] = value
+
+    report["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return updates, report
@@ -0,0 +1,170 @@
+"""
+조치 계획 병렬 실행기
+
+조치의 도구 목록을 의존성 그래프(DAG)로 바꿔, 서로 독립적인 단계는 공용 스레드 풀에서 동시에 실행합니다.
+- 상태를 변경하는 도구는 장벽(barrier)으로 취급: 앞선 모든 단계가 끝난 뒤 실행되고, 뒤 단계는 이 도구를 기다림
+- 읽기 전용 도구는 직전 장벽만 기다리므로 장벽 사이에서 동시에 실행
+- 단계에 depends_on(1부터 시작하는 단계 번호 목록)이 있으면 위 규칙 대신 명시된 의존성을 사용
+- 도구별 / 계획 전체 마감 시간을 적용하고, 실패하거나 시간 초과된 단계에 의존하는 단계는 취소
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agent.instrumentation import watch_pool_queue
+from agent.tools import get_tool_by_name, is_read_only_tool
+from config.settings import settings
+
+_STATUS_LABELS = {"failed": "실패", "timeout": "시간 초과", "cancelled": "취소"}
+
+# 도구 실행용 공용 스레드 풀 (시간 초과된 도구가 노드 종료를 막지 않도록 노드 밖에서 유지)
+_executor = ThreadPoolExecutor(
+    max_workers=settings.EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="tool"
+)
+watch_pool_queue("tool", _executor)
+
+
+def build_dependencies(tools_list: List[Dict[str, Any]]) -> List[Set[int]]:
+    """단계별 선행 단계 인덱스(0부터) 집합"""
+    deps: List[Set[int]] = []
+    last_barrier: Optional[int] = None
+
+    for i, tool_spec in enumerate(tools_list):
+        if tool_spec.get("depends_on"):
+            # 앞 단계만 참조할 수 있으므로 순환이 생기지 않음
+            deps.append({int(d) - 1 for d in tool_spec["depends_on"] if 0 < int(d) <= i})
+        elif is_read_only_tool(tool_spec.get("name", "")):
+            deps.append(set() if last_barrier is None else {last_barrier})
+        else:
+            deps.append(set(range(i)))
+
+        if not tool_spec.get("depends_on") and not is_read_only_tool(tool_spec.get("name", "")):
+            last_barrier = i
+
+    return deps
+
+
+def _run_tool(tool_name: str, params: Dict[str, Any]) -> Tuple[Any, float, float]:
+    started = time.time()
+    result = get_tool_by_name(tool_name)(**params)
+    return result, started, time.time()
+
+
+def _isoformat(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch else None
+
+
+def _elapsed_fields(submitted: float) -> Dict[str, Any]:
+    """실패/시간 초과 단계의 시작(제출)/종료 시각"""
+    finished = time.time()
+    return {
+        "started_at": _isoformat(submitted),
+        "finished_at": _isoformat(finished),
+        "duration_ms": round((finished - submitted) * 1000, 1),
+    }
+
+
+def execute_plan(
+    tools_list: List[Dict[str, Any]],
+    tool_timeouts: Optional[Dict[str, float]] = None,
+    plan_timeout: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """도구 목록을 의존성 순서대로 병렬 실행하고 (단계별 결과, 실행 리포트)를 반환합니다"""
+    tool_timeouts = {**settings.EXECUTOR_TOOL_TIMEOUTS, **(tool_timeouts or {})}
+    plan_timeout = settings.EXECUTOR_PLAN_TIMEOUT_S if plan_timeout is None else plan_timeout
+
+    deps = build_dependencies(tools_list)
+    started = time.monotonic()
+    plan_deadline = started + plan_timeout
+
+    results: List[Dict[str, Any]] = [
+        {
+            "step": i + 1,
+            "tool": tool_spec.get("name", ""),
+            "params": tool_spec.get("params") or {},
+            "depends_on": sorted(d + 1 for d in deps[i]),
+            "status": "pending",
+        }
+        for i, tool_spec in enumerate(tools_list)
+    ]
+    running: Dict[Any, Tuple[int, float, float]] = {}  # future -> (단계, 제출 시각, 마감 시각)
+
+    def finish(i: int, status: str, **fields):
+        results[i].update(status=status, **fields)
+        if status != "success":
+            # 이 단계에 (직간접적으로) 의존하는 대기 중 단계 취소
+            for j in range(i + 1, len(results)):
+                if results[j]["status"] == "pending" and any(
+                    results[d]["status"] in ("failed", "timeout", "cancelled") for d in deps[j]
+                ):
+                    results[j].update(status="cancelled", error=f"선행 단계 {i + 1} {_STATUS_LABELS[status]}")
+                    print(f"⏭️ 취소 ({j + 1}/{len(results)}): {results[j]['tool']}")
+
+    while True:
+        # 선행 단계가 모두 성공한 단계를 시작
+        for i, entry in enumerate(results):
+            if entry["status"] == "pending" and all(results[d]["status"] == "success" for d in deps[i]):
+                timeout = tool_timeouts.get(entry["tool"], settings.EXECUTOR_TOOL_TIMEOUT_S)
+                if isinstance(entry["params"].get("timeout"), (int, float)):
+                    # 자체 timeout 파라미터가 있는 도구(verify_restart 등)는 그보다 먼저 끊지 않음
+                    timeout = max(timeout, entry["params"]["timeout"] + 5)
+                print(f"⚙️ 실행 ({i + 1}/{len(results)}): {entry['tool']}")
+                print(f"   파라미터: {entry['params']}")
+                entry["status"] = "running"
+                entry["timeout_s"] = timeout
+                future = _executor.submit(_run_tool, entry["tool"], entry["params"])
+                running[future] = (i, time.time(), time.monotonic() + timeout)
+
+        if not running:
+            break
+
+        now = time.monotonic()
+        next_deadline = min(min(deadline for _, _, deadline in running.values()), plan_deadline)
+        done, _ = wait(list(running), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            i, submitted, _ = running.pop(future)
+            try:
+                result, step_started, step_finished = future.result()
+                finish(
+                    i, "success", result=result,
+                    started_at=_isoformat(step_started), finished_at=_isoformat(step_finished),
+                    duration_ms=round((step_finished - step_started) * 1000, 1)
+                )
+                print(f"✅ {results[i]['tool']} 완료")
+            except Exception as e:
+                finish(i, "failed", error=str(e), **_elapsed_fields(submitted))
+                print(f"❌ {results[i]['tool']} 실패: {e}")
+
+        # 마감 시간을 넘긴 단계는 결과를 기다리지 않음 (스레드는 끝날 때까지 풀에 남음)
+        now = time.monotonic()
+        for future, (i, submitted, deadline) in list(running.items()):
+            if now >= deadline or now >= plan_deadline:
+                running.pop(future)
+                future.cancel()
+                reason = "도구" if now >= deadline else "계획 전체"
+                finish(i, "timeout", error=f"{reason} 마감 시간 초과", **_elapsed_fields(submitted))
+                print(f"⏱️ {results[i]['tool']} 시간 초과")
+
+        if now >= plan_deadline:
+            for i, entry in enumerate(results):
+                if entry["status"] == "pending":
+                    entry.update(status="cancelled", error="계획 전체 마감 시간 초과")
+            break
+
+    for entry in results:
+        entry.setdefault("timestamp", entry.get("finished_at") or datetime.now().isoformat())
+
+    report = {
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        "plan_timeout_s": plan_timeout,
+        "steps": len(results),
+        "succeeded": len([r for r in results if r["status"] == "success"]),
+        "failed": [r["step"] for r in results if r["status"] == "failed"],
+        "timed_out": [r["step"] for r in results if r["status"] == "timeout"],
+        "cancelled": [r["step"] for r in results if r["status"] == "cancelled"],
+    }
+    return results, report
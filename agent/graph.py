@@ -1,14 +1,228 @@
 from langgraph.graph import StateGraph, END, START
 from langgraph.types import interrupt, Command
 from typing import List, Dict, Any
-from agent.llm import create_root_cause_chain, create_action_planning_chain
-from agent.tools import get_tool_by_name
+from agent.llm import CHAIN_REGISTRY, run_chain
+from agent.llm_scheduler import severity_priority
+from agent.collectors import collect_context
+from agent.log_mining import mine_logs, format_log_templates
+from agent.anomaly import detect_anomalies, format_metric_anomalies
+from agent.trace_analysis import analyze_traces, format_trace_summary
+from agent.tools import validate_action_plan
+from agent.executor import execute_plan
+from agent.validation import validate_remediation
+from config.settings import settings
 from agent.state import AgentState
+from agent.checkpoint import get_checkpointer, thread_config
+from agent.instrumentation import INCIDENT_LOOKUPS, instrument_node
+from agent.usage import plan_call, record_usage
+from agent.incident_index import format_similar_incidents, incident_index, incident_signature
+from agent.routing import extract_json_object, route_chain
+from agent.prefetch import prefetchable_steps, speculative_prefetcher
+from agent.tools import tool_call_key
+import copy
+import threading
 import json
+import uuid
 from datetime import datetime
 
 
+# LLM 조치 계획을 사용할 수 없을 때의 기본 조치
+FALLBACK_ACTIONS = [
+    {
+        "id": 1,
+        "title": "ECS 서비스 재시작",
+        "description": "기본 서비스 재시작 조치",
+        "risk_level": "중간",
+        "estimated_time": "3분",
+        "tools": [
+            {"name": "check_ecs_health", "params": {"service": "api-service"}},
+            {"name": "restart_ecs_task", "params": {"service": "api-service"}},
+            {"name": "verify_restart", "params": {"service": "api-service"}}
+        ]
+    },
+    {
+        "id": 2,
+        "title": "DB 커넥션 재설정",
+        "description": "데이터베이스 커넥션 문제 해결",
+        "risk_level": "낮음",
+        "estimated_time": "2분",
+        "tools": [
+            {"name": "check_db_connections", "params": {"database": "main"}},
+            {"name": "restart_db_pool", "params": {"database": "main"}},
+            {"name": "validate_db_health", "params": {"database": "main"}}
+        ]
+    },
+    {
+        "id": 3,
+        "title": "트래픽 제어 후 재시작",
+        "description": "안전한 전체 시스템 복구",
+        "risk_level": "높음",
+        "estimated_time": "10분",
+        "tools": [
+            {"name": "reduce_traffic", "params": {"service": "api-service", "percentage": 50}},
+            {"name": "restart_all_services", "params": {"cluster": "prod"}},
+            {"name": "gradual_traffic_restore", "params": {"steps": 5}}
+        ]
+    }
+]
+
+# 기본 조치는 LLM 응답과 달리 실행 직전까지 검증되지 않으므로, 잘못된 기본 조치가 배포되지 않도록 import 시점에 검증
+_fallback_errors = validate_action_plan(FALLBACK_ACTIONS)[1]
+if _fallback_errors:
+    raise ValueError(f"FALLBACK_ACTIONS 검증 실패: {'; '.join(_fallback_errors)}")
+
+
 # --- Node 구현 ---
+def _prompt_logs(state: AgentState) -> str:
+    """프롬프트에 넣을 로그 (템플릿 요약이 있으면 원본 대신 사용)"""
+    if state.get("log_templates"):
+        return format_log_templates(state["log_templates"])
+    return state.get("logs", "로그 정보 없음")
+
+
+def _prompt_metrics(state: AgentState) -> str:
+    """프롬프트에 넣을 메트릭 (현재 스냅샷 + 시계열 변화 요약)"""
+    metrics = str(state.get("metrics", {}))
+    if state.get("metric_anomalies"):
+        metrics += "\n\n변화 감지 (시계열):\n" + format_metric_anomalies(state["metric_anomalies"])
+    return metrics
+
+
+def _prompt_traces(state: AgentState) -> str:
+    """프롬프트에 넣을 트레이스 (크리티컬 패스 요약이 있으면 원본 대신 사용)"""
+    if state.get("trace_summary"):
+        return format_trace_summary(state["trace_summary"])
+    return str(state.get("traces", {}))
+
+
+def _run_budgeted_chain(
+    state: AgentState,
+    node: str,
+    name: str,
+    inputs: Dict[str, Any],
+    evidence_keys=("logs", "metrics", "traces"),
+    model: str = None,
+    tier: str = None,
+) -> str:
+    """장애별 토큰/비용 예산 안에서 체인 실행 (증거 축소 / 모델 변경) 후 사용량을 state["token_usage"]에 누적
+
+    스케줄러 대기열에서는 알림 심각도 순으로 우선 처리됩니다.
+    """
+    inputs, model, decision = plan_call(state.get("token_usage"), CHAIN_REGISTRY[name][0], inputs, evidence_keys, model)
+    if tier:
+        decision["tier"] = tier
+    usage: Dict[str, Any] = {}
+    response = run_chain(
+        name,
+        inputs,
+        bypass_cache=state.get("force_reanalysis", False),
+        model=model,
+        usage=usage,
+        priority=severity_priority(state.get("slack_alert"))
+    )
+    state["token_usage"] = record_usage(state.get("token_usage"), node, name, usage, decision)
+    return response
+
+
+def _run_tiered_chain(state: AgentState, node: str, name: str, inputs: Dict[str, Any], evidence_keys=("logs", "metrics", "traces")) -> str:
+    """triage 모델로 먼저 체인을 실행하고 신뢰도가 낮거나 검증에 실패하면 기본 모델로 승격 (기록은 state["model_routing"])
+
+    재분석 요청이거나 앞 단계가 이미 승격된 장애는 triage 없이 기본 모델을 사용합니다.
+    """
+    history = state.get("model_routing") or []
+    skip_triage = state.get("force_reanalysis", False) or any(entry["escalated"] for entry in history)
+    response, routing = route_chain(
+        name,
+        lambda tier, model: _run_budgeted_chain(state, node, name, inputs, evidence_keys, model=model, tier=tier),
+        skip_triage=skip_triage
+    )
+    state["model_routing"] = history + [{"node": node, **routing}]
+    return response
+
+
+def _find_reusable_incident(state: AgentState) -> Dict[str, Any]:
+    """과거 유사 장애 조회 (결과는 state["similar_incidents"]에 기록)
+
+    가장 유사한 장애가 같은 서비스에서 INCIDENT_REUSE_SIMILARITY 이상이고 그 조치가 실패보다 해결을 더 많이 했으면 반환하고,
+    아니면 None을 반환해 유사 장애를 프롬프트 참고 자료로만 사용합니다. 재분석 요청 시에는 재사용하지 않습니다.
+    """
+    state["incident_signature"] = incident_signature(state)
+    state["similar_incidents"] = []
+    state["reused_incident"] = ""
+    if not settings.INCIDENT_INDEX_ENABLED or len(state["incident_signature"]) < settings.INCIDENT_INDEX_MIN_FEATURES:
+        return None
+    
+    try:
+        matches = incident_index.query(state["incident_signature"])
+    except Exception as e:
+        print(f"⚠️ 유사 장애 조회 실패: {e}")
+        return None
+    
+    state["similar_incidents"] = matches
+    top = matches[0] if matches else None
+    if (
+        top
+        and not state.get("force_reanalysis")
+        and top["similarity"] >= settings.INCIDENT_REUSE_SIMILARITY
+        and top["service"] == (state.get("slack_alert") or {}).get("service")
+        and top["action"]
+        and top["resolved_count"] > top["failed_count"]
+    ):
+        INCIDENT_LOOKUPS.inc(result="reused")
+        state["reused_incident"] = top["incident_id"]
+        print(f"♻️ 유사 장애 {top['incident_id']} (유사도 {top['similarity']:.2f}) 분석 결과 재사용 - LLM 호출 생략")
+        return top
+    
+    INCIDENT_LOOKUPS.inc(result="seeded" if matches else "miss")
+    if matches:
+        print(f"🔁 유사 장애 {len(matches)}건 참고 (최고 유사도 {top['similarity']:.2f})")
+    return None
+
+
+def _reused_actions(incident: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """과거에 해결한 조치를 첫 번째로, 나머지는 기본 조치로 구성 (현재 도구 레지스트리로 다시 검증)"""
+    past_action = {
+        **incident["action"],
+        "description": f"과거 유사 장애 {incident['incident_id']}에서 해결한 조치 "
+                       f"(유사도 {incident['similarity']:.2f}, 해결 {incident['resolved_count']}회)",
+    }
+    others = [a for a in copy.deepcopy(FALLBACK_ACTIONS) if a["title"] != past_action.get("title")]
+    actions, errors = validate_action_plan([past_action] + others)
+    for error in errors:
+        print(f"⚠️ 조치 계획 검증 실패: {error}")
+    return actions or copy.deepcopy(FALLBACK_ACTIONS)
+
+
+def _record_incident_outcome(state: AgentState):
+    """검증 결과를 유사 장애 인덱스에 반영 (해결되면 저장, 재사용한 조치가 실패하면 실패 횟수 증가)"""
+    if not settings.INCIDENT_INDEX_ENABLED:
+        return
+    # 재사용한 과거 조치를 그대로 실행한 경우에만 그 장애의 해결 / 실패 횟수에 반영
+    selected = state.get("selected_action_details") or {}
+    reused = next(
+        (m["incident_id"] for m in state.get("similar_incidents") or []
+         if m["incident_id"] == state.get("reused_incident") and m["action"].get("title") == selected.get("title")),
+        None
+    )
+    try:
+        if state.get("final_status") == "resolved":
+            root_cause = state.get("root_cause", "")
+            features = state.get("incident_signature") or incident_signature(state)
+            if root_cause.startswith("분석 실패") or len(features) < settings.INCIDENT_INDEX_MIN_FEATURES:
+                return
+            incident_index.record(
+                reused or state.get("incident_id") or f"incident-{uuid.uuid4().hex[:12]}",
+                features,
+                root_cause,
+                selected,
+                service=(state.get("slack_alert") or {}).get("service"),
+            )
+        elif reused:
+            incident_index.record_failure(reused)
+    except Exception as e:
+        print(f"⚠️ 유사 장애 인덱스 기록 실패: {e}")
+
+
 def slack_alert_input_node(state: AgentState):
     """Slack 알림에서 트리거"""
     print("🚨 Slack Alert Received")
@@ -23,75 +237,47 @@ def slack_alert_input_node(state: AgentState):
             "description": "High error rate detected"
         }
     
+    # 병합 단계에서 묶인 중복 알림 정보
+    coalesced = state.get("coalesced_alerts") or []
+    if len(coalesced) > 1:
+        print(f"🔗 병합된 알림 {len(coalesced)}건 (장애 ID: {state.get('incident_id', 'N/A')})")
+    
     print("✅ Slack alert processed")
     return state
 
 
 def context_collector_node(state: AgentState):
-    """CloudWatch / Datadog 모니터링 데이터 수집"""
+    """CloudWatch / Datadog / X-Ray 모니터링 데이터 병렬 수집"""
     print("📊 Collecting monitoring data...")
     
-    # Mock logs data
-    state["logs"] = [
-        {
-            "timestamp": "2024-01-15T14:30:45Z",
-            "level": "ERROR",
-            "service": "service-a",
-            "message": "ConnectionTimeout: Failed to connect to database after 30s"
-        },
-        {
-            "timestamp": "2024-01-15T14:30:46Z",
-            "level": "ERROR", 
-            "service": "service-a",
-            "message": "org.springframework.dao.QueryTimeoutException: Query timed out"
-        },
-        {
-            "timestamp": "2024-01-15T14:30:47Z",
-            "level": "WARN",
-            "service": "service-a", 
-            "message": "Connection pool exhausted, current: 20/20"
-        }
-    ]
-    
-    # Mock metrics가 없으면 기본값 설정
-    if "metrics" not in state or not state["metrics"]:
-        state["metrics"] = {
-            "error_rate": "25%",
-            "latency_p95_ms": 3500,
-            "latency_p99_ms": 8000,
-            "cpu_usage_percent": 85.2,
-            "memory_usage_percent": 92.1,
-            "db_connection_count": 20,
-            "db_max_connections": 20,
-            "request_rate_per_sec": 150
-        }
-    
-    # Mock traces
-    state["traces"] = [
-        {
-            "trace_id": "abc-123-def-456",
-            "service": "api-gateway",
-            "duration_ms": 8200,
-            "status": "error"
-        },
-        {
-            "trace_id": "abc-123-def-456", 
-            "service": "service-a",
-            "duration_ms": 8100,
-            "status": "error",
-            "error": "timeout"
-        }
-    ]
-    
-    # Context 정보
-    state["context"] = {
-        "environment": "production",
-        "region": "us-west-2",
-        "cluster": "prod-cluster",
-        "deployment_version": "v1.2.3"
-    }
-    
-    print("📥 Context collected from mock CloudWatch/Datadog")
+    # 모든 소스를 동시에 조회 (소스별 마감 시간 초과 시 부분 결과 사용)
+    updates, report = collect_context(state)
+    state.update(updates)
+    state["collection_report"] = report
+    
+    if report["timed_out"]:
+        print(f"⏱️ 마감 시간 초과 소스: {', '.join(report['timed_out'])}")
+    if report["failed"]:
+        print(f"⚠️ 수집 실패 소스: {', '.join(report['failed'])}")
+    if report["busy"]:
+        print(f"⏳ 이전 호출이 멈춰 있어 건너뛴 소스: {', '.join(report['busy'])}")
+    
+    # 반복 로그를 템플릿으로 압축 (프롬프트 크기가 로그 양에 비례하지 않도록)
+    state["log_templates"] = mine_logs(state.get("logs") or [])
+    print(f"🧩 로그 {state['log_templates']['total_lines']}건 -> 템플릿 {state['log_templates']['template_count']}개")
+    
+    # 메트릭 시계열 전체에 대해 벡터화 이상 탐지
+    metric_series = state.get("metric_series") or {}
+    if metric_series.get("series"):
+        state["metric_anomalies"] = detect_anomalies(metric_series["series"], metric_series.get("timestamps"))
+        print(f"📈 메트릭 시계열 {state['metric_anomalies']['series_count']}개 중 {state['metric_anomalies']['anomaly_count']}개 변화 감지")
+    
+    # 트레이스를 span 트리로 묶어 크리티컬 패스 기여도 집계
+    if state.get("traces"):
+        state["trace_summary"] = analyze_traces(state["traces"])
+        print(f"🧵 트레이스 {state['trace_summary']['trace_count']}개 / span {state['trace_summary']['span_count']}개 분석")
+    
+    print(f"📥 Context collected from mock CloudWatch/Datadog ({report['elapsed_ms']}ms)")
     return state
 
 
@@ -99,21 +285,27 @@ def root_cause_analyzer_node(state: AgentState):
     """ChatOpenAI를 사용한 실제 근본원인 분석"""
     print("🔎 Analyzing root cause with ChatOpenAI...")
     
+    state["model_routing"] = []
+    # 같은 패턴의 해결된 장애가 있으면 LLM 호출 없이 확인된 근본 원인 재사용
+    reusable = _find_reusable_incident(state)
+    if reusable:
+        state["root_cause"] = reusable["root_cause"]
+        return state
+    
     try:
-        # LLM 체인 생성
-        analysis_chain = create_root_cause_chain()
-        
-        # 프롬프트에 전달할 데이터 준비
+        # 프롬프트에 전달할 데이터 준비 (프롬프트에서 str()로 렌더링되며, 캐시 지문은 원본 구조로 계산)
         analysis_input = {
-            "logs": state.get("logs", "로그 정보 없음"),
-            "metrics": str(state.get("metrics", {})),
-            "traces": str(state.get("traces", {})),
-            "alert_context": str(state.get("alert_context", {}))
+            "logs": _prompt_logs(state),
+            "metrics": _prompt_metrics(state),
+            "traces": _prompt_traces(state),
+            "alert_context": state.get("alert_context", {}),
+            "similar_incidents": format_similar_incidents(state["similar_incidents"])
         }
         
-        # LLM으로 분석 수행
-        analysis_result = analysis_chain.invoke(analysis_input)
+        # LLM으로 분석 수행 (triage 모델 우선, 동일 증거는 응답 캐시에서 반환, 토큰 예산을 넘으면 증거 축소)
+        analysis_result = _run_tiered_chain(state, "RootCauseAnalyzer", "root_cause", analysis_input)
         state["root_cause"] = analysis_result
+        state["analysis_confidence"] = state["model_routing"][-1]["confidence"] or 0
         
         print("✅ Root cause analysis completed with ChatOpenAI")
         
@@ -129,10 +321,14 @@ def action_planner_node(state: AgentState):
     """LLM으로 3가지 조치 액션과 도구 정보 생성 (JSON 파싱)"""
     print("📝 Generating 3 action plans with tools using LLM...")
     
+    # 근본 원인을 과거 유사 장애에서 재사용했으면 그때 해결한 조치를 첫 번째로 제시
+    reused = next((m for m in state.get("similar_incidents") or [] if m["incident_id"] == state.get("reused_incident")), None)
+    if reused:
+        state["recommended_actions"] = _reused_actions(reused)
+        print(f"♻️ 유사 장애 {reused['incident_id']}의 조치 재사용 ({len(state['recommended_actions'])} action options)")
+        return state
+    
     try:
-        # Action Planning 체인 사용
-        planning_chain = create_action_planning_chain()
-        
         # 메트릭에서 필요한 정보 추출
         metrics = state.get("metrics", {})
         error_rate = metrics.get("error_rate", "알 수 없음")
@@ -143,24 +339,27 @@ def action_planner_node(state: AgentState):
             "root_cause": state.get("root_cause", "근본 원인 분석 결과 없음"),
             "error_rate": error_rate,
             "latency": latency,
-            "affected_services": "Service A, Database",
-            "metrics": str(metrics)
+            "affected_services": ", ".join(state.get("affected_services") or ["Service A", "Database"]),
+            "metrics": _prompt_metrics(state)
         }
         
-        # LLM으로 조치 계획 생성 (JSON 응답)
-        action_plan_json = planning_chain.invoke(planning_input)
+        # LLM으로 조치 계획 생성 (JSON 응답, triage 모델 우선, 동일 입력은 응답 캐시에서 반환)
+        action_plan_json = _run_tiered_chain(
+            state, "ActionPlanner", "action_planning", planning_input, evidence_keys=("metrics",)
+        )
         
         print(f"📋 LLM 응답:\n{action_plan_json}")
 
         # JSON 파싱 시도
         try:
             # JSON 문자열에서 실제 JSON 부분 추출
-            start_idx = action_plan_json.find('{')
-            end_idx = action_plan_json.rfind('}') + 1
-            json_str = action_plan_json[start_idx:end_idx]
+            action_plan_data = extract_json_object(action_plan_json)
             
-            action_plan_data = json.loads(json_str)
-            state["recommended_actions"] = action_plan_data.get("actions", [])
+            # TOOL_REGISTRY 기준으로 도구/파라미터 검증
+            actions, errors = validate_action_plan(action_plan_data.get("actions", []))
+            for error in errors:
+                print(f"⚠️ 조치 계획 검증 실패: {error}")
+            state["recommended_actions"] = actions or copy.deepcopy(FALLBACK_ACTIONS)
             
             print("✅ Action plan with tools generated from LLM")
             print(f"🎯 Generated {len(state['recommended_actions'])} action options")
@@ -168,44 +367,7 @@ def action_planner_node(state: AgentState):
         except json.JSONDecodeError as je:
             print(f"⚠️ JSON parsing failed: {je}")
             # Fallback: 기본 액션 생성
-            state["recommended_actions"] = [
-                {
-                    "id": 1,
-                    "title": "ECS 서비스 재시작",
-                    "description": "기본 서비스 재시작 조치",
-                    "risk_level": "중간",
-                    "estimated_time": "3분",
-                    "tools": [
-                        {"name": "check_ecs_health", "params": {"service": "api-service"}},
-                        {"name": "restart_ecs_task", "params": {"service": "api-service"}},
-                        {"name": "verify_restart", "params": {"service": "api-service"}}
-                    ]
-                },
-                {
-                    "id": 2,
-                    "title": "DB 커넥션 재설정",
-                    "description": "데이터베이스 커넥션 문제 해결",
-                    "risk_level": "낮음",
-                    "estimated_time": "2분",
-                    "tools": [
-                        {"name": "check_db_connections", "params": {"database": "main"}},
-                        {"name": "restart_db_pool", "params": {"database": "main"}},
-                        {"name": "validate_db_health", "params": {"database": "main"}}
-                    ]
-                },
-                {
-                    "id": 3,
-                    "title": "트래픽 제어 후 재시작",
-                    "description": "안전한 전체 시스템 복구",
-                    "risk_level": "높음",
-                    "estimated_time": "10분",
-                    "tools": [
-                        {"name": "reduce_traffic", "params": {"percentage": 50}},
-                        {"name": "restart_all_services", "params": {"cluster": "prod"}},
-                        {"name": "gradual_traffic_restore", "params": {"steps": 5}}
-                    ]
-                }
-            ]
+            state["recommended_actions"] = copy.deepcopy(FALLBACK_ACTIONS)
             print("✅ Action plan with tools generated from LLM")
             print(f"🎯 Generated {len(state['recommended_actions'])} action options")
 
@@ -226,6 +388,70 @@ def action_planner_node(state: AgentState):
     return state
 
 
+def single_pass_analyzer_node(state: AgentState):
+    """근본 원인 분석과 조치 계획을 한 번의 구조화 LLM 호출로 수행 (single_pass 모드)"""
+    print("🧠 Analyzing root cause and planning actions in a single LLM call...")
+    
+    state["model_routing"] = []
+    reusable = _find_reusable_incident(state)
+    if reusable:
+        state["root_cause"] = reusable["root_cause"]
+        state["recommended_actions"] = _reused_actions(reusable)
+        return state
+    
+    try:
+        analysis_input = {
+            "logs": _prompt_logs(state),
+            "metrics": _prompt_metrics(state),
+            "traces": _prompt_traces(state),
+            "alert_context": state.get("alert_context", {}),
+            "similar_incidents": format_similar_incidents(state["similar_incidents"])
+        }
+        
+        analysis_json = _run_tiered_chain(state, "IncidentAnalyzer", "single_pass", analysis_input)
+        analysis = json.loads(analysis_json)
+        
+        # 2단계 모드와 같은 형식의 근본 원인 텍스트 구성
+        evidence = "\n".join(f"  - {item}" for item in analysis.get("evidence", []))
+        state["root_cause"] = (
+            f"- 근본 원인: {analysis.get('root_cause', '')}\n"
+            f"- 분석 근거:\n{evidence}\n"
+            f"- 영향 범위: {analysis.get('impact', '')}\n"
+            f"- 신뢰도: {analysis.get('confidence', 'N/A')}/10"
+        )
+        state["analysis_confidence"] = analysis.get("confidence", 0)
+        state["affected_services"] = analysis.get("affected_services", [])
+        
+        # TOOL_REGISTRY 기준으로 도구/파라미터 검증
+        actions, errors = validate_action_plan(analysis.get("actions", []))
+        for error in errors:
+            print(f"⚠️ 조치 계획 검증 실패: {error}")
+        
+        if actions:
+            state["recommended_actions"] = actions
+        else:
+            print("⚠️ 유효한 조치 계획이 없어 기본 조치를 사용합니다")
+            state["recommended_actions"] = copy.deepcopy(FALLBACK_ACTIONS)
+        
+        print(f"✅ Single-pass analysis completed ({len(state['recommended_actions'])} action options)")
+        
+    except Exception as e:
+        print(f"❌ Error in single-pass analysis: {e}")
+        state["root_cause"] = f"분석 실패: {str(e)}. 수동 분석이 필요합니다."
+        state["recommended_actions"] = [
+            {
+                "id": 1,
+                "title": "수동 점검 필요",
+                "description": f"자동 계획 생성 실패: {str(e)}",
+                "risk_level": "낮음",
+                "estimated_time": "수동",
+                "tools": []
+            }
+        ]
+    
+    return state
+
+
 def remediation_decision_node(state: AgentState):
     """Human-in-the-loop: 복구 조치 선택 대기"""
     
@@ -277,6 +503,13 @@ def remediation_decision_node(state: AgentState):
         }
     ])
     
+    # 기다리는 동안 추천 조치들의 앞부분 읽기 전용 진단 단계를 백그라운드에서 미리 실행 (상태 변경 도구는 제외)
+    prefetch_note = ""
+    if settings.PREFETCH_ENABLED and state.get("incident_id"):
+        planned = speculative_prefetcher.start(state["incident_id"], actions)
+        if planned:
+            prefetch_note = f"🔬 **사전 진단 (읽기 전용, 백그라운드 실행 중):** {', '.join(planned)}\n"
+    
     # Human-in-the-loop: 사용자 입력을 위한 interrupt
     interrupt_message = f"""
 ⚖️ **분석 완료! 조치를 선택해주세요**
@@ -294,22 +527,24 @@ def remediation_decision_node(state: AgentState):
     for opt in options
 ])}
 
+{prefetch_note}
 💡 **선택 방법:** 액션 번호를 입력하세요 (1, 2, 3, manual, reanalyze)
 """
     
     # Human-in-the-loop: 사용자 입력 대기
     user_input = interrupt(interrupt_message)
     
-    # 사용자 선택 처리
+    # 사용자 선택 처리 (Command(resume=선택)으로 재개되면 interrupt가 선택 값을 반환)
     if user_input:
         state["user_choice"] = str(user_input).strip()
+        state["force_reanalysis"] = state["user_choice"] == "re_analyze"  # 재분석은 캐시된 응답을 쓰지 않음
         print(f"✅ 사용자 선택: {state['user_choice']}")
     
     return state
 
 
 def action_executor_node(state: AgentState):
-    """선택된 액션의 도구들을 순차적으로 실행"""
+    """선택된 액션의 도구들을 의존성 순서에 따라 병렬 실행"""
     print("🔍 선택된 액션을 실행하는 action_executor_node 노드 실행")
     choice = state.get("user_choice", "")
     
@@ -323,8 +558,6 @@ def action_executor_node(state: AgentState):
             
             print(f"🛠 실행 중: {selected_action.get('title', 'Unknown Action')}")
             
-            execution_results = []
-            
             # 선택된 액션의 도구 목록 가져오기
             tools_list = selected_action.get("tools", [])
             
@@ -336,44 +569,23 @@ def action_executor_node(state: AgentState):
             
             print(f"🛠 도구 목록 실행: {[tool.get('name', 'Unknown') for tool in tools_list]}")
             
-            # 도구 순차 실행
-            for i, tool_spec in enumerate(tools_list):
-                try:
-                    tool_name = tool_spec.get("name", "")
-                    tool_params = tool_spec.get("params", {})
-                    
-                    print(f"⚙️ 실행 ({i+1}/{len(tools_list)}): {tool_name}")
-                    print(f"   파라미터: {tool_params}")
-                    
-                    # 실제 도구 실행
-                    tool_func = get_tool_by_name(tool_name)
-                    result = tool_func(**tool_params)
-                    
-                    execution_results.append({
-                        "tool": tool_name,
-                        "params": tool_params,
-                        "status": "success",
-                        "result": result,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    print(f"✅ {tool_name} 완료")
-                    
-                except Exception as e:
-                    execution_results.append({
-                        "tool": tool_name if 'tool_name' in locals() else "unknown",
-                        "params": tool_params if 'tool_params' in locals() else {},
-                        "status": "failed", 
-                        "error": str(e),
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    print(f"❌ {tool_name if 'tool_name' in locals() else 'unknown'} 실패: {e}")
-                    
-                    # 중요한 도구 실패 시 중단 (첫 번째와 마지막 도구는 중요)
-                    if i == 0 or i == len(tools_list) - 1:
-                        print("⚠️ 중요한 도구 실패로 실행 중단")
-                        break
+            # 승인 대기 중 미리 실행해 아직 유효한 진단 단계 (실행 시 공유 결과 캐시에서 바로 반환됨)
+            prefetched = speculative_prefetcher.fresh_keys(state.get("incident_id")) if settings.PREFETCH_ENABLED else set()
+            
+            # 독립적인 단계는 병렬로, 상태 변경 도구는 순서대로 실행 (도구별/전체 마감 시간 적용)
+            execution_results, report = execute_plan(tools_list)
+            if prefetched:
+                leading = set(prefetchable_steps(tools_list))
+                for i, entry in enumerate(execution_results):
+                    if i in leading and entry["status"] == "success" and tool_call_key(entry["tool"], entry["params"]) in prefetched:
+                        entry["prefetched"] = True
+                report["prefetched_steps"] = [r["step"] for r in execution_results if r.get("prefetched")]
+                speculative_prefetcher.mark_reused(len(report["prefetched_steps"]))
+                print(f"🔬 사전 실행 결과 재사용: {len(report['prefetched_steps'])}단계")
+            if settings.PREFETCH_ENABLED:
+                speculative_prefetcher.discard(state.get("incident_id"))
+            state["execution_report"] = report
+            print(f"⏱️ 실행 시간: {report['elapsed_ms']}ms")
             
             state["execution_results"] = execution_results
             
@@ -411,32 +623,38 @@ def remediation_validator_node(state: AgentState):
     total_count = len(execution_results)
     success_rate = success_count / total_count if total_count > 0 else 0
     
-    # 메트릭 재수집 시뮬레이션
+    # 장애로 변화한 메트릭이 기준선으로 돌아올 때까지 backoff 간격으로 재조회 (수렴 즉시 종료)
     print("📊 현재 시스템 상태 재확인...")
-    import time
-    time.sleep(2)
-    
-    # Mock 개선 데이터
-    if success_rate >= 0.8:
-        improvement_data = {
-            "error_rate": 0.05,  # 개선됨
-            "latency_p95_ms": 1200,  # 개선됨
-            "cpu_usage_percent": 65.0,  # 개선됨
-            "memory_usage_percent": 70.0  # 개선됨
-        }
-        
+    report = validate_remediation(state, success_rate)
+    state["validation_report"] = report
+    
+    metrics = report["metrics"]
+    converged = [name for name, m in metrics.items() if m["converged"]]
+    changes = "\n".join(
+        f"- {name}: {m.get('incident_mean', 'N/A')} → {m['current_mean']} (기준 {m['baseline_mean']})"
+        + ("" if m["converged"] else " ⚠️ 미회복")
+        for name, m in metrics.items()
+    )
+    print(f"⏱️ 검증 {report['elapsed_s']}초 / 조회 {report['polls']}회 / 회복 {len(converged)}/{len(metrics)}")
+    
+    if report["status"] == "converged":
         state["final_status"] = "resolved"
         state["result"] = f"✅ 문제 해결 완료! 성공률: {success_rate:.1%}\n" + \
-                         f"📈 개선사항:\n" + \
-                         f"- 에러율: 25% → 5%\n" + \
-                         f"- 지연시간: 3500ms → 1200ms\n" + \
-                         f"- CPU 사용률: 85% → 65%"
+                         f"📈 기준선 회복 확인 ({report['elapsed_s']}초):\n{changes}"
         
         print("🎉 시스템 상태 개선 확인!")
         
-    elif success_rate >= 0.5:
+    elif report["status"] == "no_baseline":
+        # 비교할 장애 이전 기준선이 없으면 도구 실행 결과만으로 판정
+        state["final_status"] = "resolved" if success_rate >= 0.8 else "partial" if success_rate >= 0.5 else "failed"
+        state["result"] = f"⚠️ 메트릭 기준선이 없어 도구 실행 결과로만 판정. 성공률: {success_rate:.1%}"
+        
+        print("⚠️ 메트릭 기준선 없음")
+        
+    elif converged:
         state["final_status"] = "partial"
         state["result"] = f"⚠️ 부분적 개선. 성공률: {success_rate:.1%}\n" + \
+                         f"마감 시간({report['elapsed_s']}초)까지 일부 메트릭 미회복:\n{changes}\n" + \
                          f"추가 조치가 필요할 수 있습니다."
         
         print("⚠️ 부분적 개선 감지")
@@ -444,10 +662,14 @@ def remediation_validator_node(state: AgentState):
     else:
         state["final_status"] = "failed"
         state["result"] = f"❌ 문제 해결 실패. 성공률: {success_rate:.1%}\n" + \
+                         f"마감 시간({report['elapsed_s']}초)까지 메트릭 미회복:\n{changes}\n" + \
                          f"수동 개입이 필요합니다."
         
         print("❌ 문제 해결 실패")
     
+    # 해결된 장애는 다음 유사 장애의 분석에 재사용
+    _record_incident_outcome(state)
+    
     return state
 
 
@@ -459,6 +681,8 @@ def manual_remediation_node(state: AgentState):
     state["result"] = "👨‍💻 수동 조치 진행 중. 사용자가 직접 문제를 해결합니다."
     state["final_status"] = "manual"
     state["execution_results"] = []
+    if settings.PREFETCH_ENABLED:
+        speculative_prefetcher.discard(state.get("incident_id"))
     
     return state
 
@@ -492,63 +716,139 @@ def route_after_approval(state: AgentState):
 
 
 # --- Graph 구성 ---
-workflow = StateGraph(AgentState)
-
-# 노드 추가
-workflow.add_node("SlackAlert", slack_alert_input_node)
-workflow.add_node("ContextCollector", context_collector_node)
-workflow.add_node("RootCauseAnalyzer", root_cause_analyzer_node)
-workflow.add_node("ActionPlanner", action_planner_node)
-workflow.add_node("RemediationDecision", remediation_decision_node)
-workflow.add_node("ActionExecutor", action_executor_node)
-workflow.add_node("RemediationValidator", remediation_validator_node)
-workflow.add_node("ManualRemediation", manual_remediation_node)
-
-# Edge 연결
-workflow.add_edge(START, "SlackAlert")
-workflow.add_edge("SlackAlert", "ContextCollector")
-workflow.add_edge("ContextCollector", "RootCauseAnalyzer")
-workflow.add_edge("RootCauseAnalyzer", "ActionPlanner")
-workflow.add_edge("ActionPlanner", "RemediationDecision")
-
-# 조건부 라우팅
-workflow.add_conditional_edges(
-    "RemediationDecision",
-    route_after_approval,
-    {
-        "execute_action": "ActionExecutor",
-        "manual": "ManualRemediation",
-        "context_collector": "ContextCollector",  # 재분석 루프백
-        END: END
-    }
-)
+def build_workflow(analysis_mode: str = None) -> StateGraph:
+    """RCA 워크플로우 구성
+
+    analysis_mode가 "single_pass"면 RootCauseAnalyzer + ActionPlanner 대신
+    IncidentAnalyzer 노드 하나로 근본 원인과 조치 계획을 함께 생성합니다.
+    """
+    analysis_mode = analysis_mode or settings.RCA_ANALYSIS_MODE
+    workflow = StateGraph(AgentState)
+    
+    # 노드 추가 (노드별 실행 시간 / 오류 / 진행 중 수 계측)
+    workflow.add_node("SlackAlert", instrument_node("SlackAlert", slack_alert_input_node))
+    workflow.add_node("ContextCollector", instrument_node("ContextCollector", context_collector_node))
+    if analysis_mode == "single_pass":
+        workflow.add_node("IncidentAnalyzer", instrument_node("IncidentAnalyzer", single_pass_analyzer_node))
+    else:
+        workflow.add_node("RootCauseAnalyzer", instrument_node("RootCauseAnalyzer", root_cause_analyzer_node))
+        workflow.add_node("ActionPlanner", instrument_node("ActionPlanner", action_planner_node))
+    workflow.add_node("RemediationDecision", instrument_node("RemediationDecision", remediation_decision_node))
+    workflow.add_node("ActionExecutor", instrument_node("ActionExecutor", action_executor_node))
+    workflow.add_node("RemediationValidator", instrument_node("RemediationValidator", remediation_validator_node))
+    workflow.add_node("ManualRemediation", instrument_node("ManualRemediation", manual_remediation_node))
+    
+    # Edge 연결
+    workflow.add_edge(START, "SlackAlert")
+    workflow.add_edge("SlackAlert", "ContextCollector")
+    if analysis_mode == "single_pass":
+        workflow.add_edge("ContextCollector", "IncidentAnalyzer")
+        workflow.add_edge("IncidentAnalyzer", "RemediationDecision")
+    else:
+        workflow.add_edge("ContextCollector", "RootCauseAnalyzer")
+        workflow.add_edge("RootCauseAnalyzer", "ActionPlanner")
+        workflow.add_edge("ActionPlanner", "RemediationDecision")
+    
+    # 조건부 라우팅
+    workflow.add_conditional_edges(
+        "RemediationDecision",
+        route_after_approval,
+        {
+            "execute_action": "ActionExecutor",
+            "manual": "ManualRemediation",
+            "context_collector": "ContextCollector",  # 재분석 루프백
+            END: END
+        }
+    )
+    
+    # 실행 후 검증
+    workflow.add_edge("ActionExecutor", "RemediationValidator")
+    workflow.add_edge("RemediationValidator", END)
+    workflow.add_edge("ManualRemediation", END)
+    
+    return workflow
 
-# 실행 후 검증
-workflow.add_edge("ActionExecutor", "RemediationValidator")
-workflow.add_edge("RemediationValidator", END)
-workflow.add_edge("ManualRemediation", END)
 
 # --- 실행기 ---
-app = workflow.compile()
+# 그래프 빌드 / 컴파일은 import 시점이 아니라 처음 쓸 때 한 번만 수행합니다.
+# (워커 프로세스, CLI, UI가 모듈만 불러오고 바로 준비 상태가 되도록)
+_compile_lock = threading.RLock()
+_workflow = None
+_app = None
+_durable_app = None
+
+
+def get_workflow() -> StateGraph:
+    """기본 설정으로 빌드한 그래프 (최초 호출 시 생성)"""
+    global _workflow
+    with _compile_lock:
+        if _workflow is None:
+            _workflow = build_workflow()
+        return _workflow
+
+
+def get_app():
+    """체크포인터 없이 컴파일한 기본 실행기 (LangGraph Studio/API 서버는 자체 체크포인터를 주입)"""
+    global _app
+    with _compile_lock:
+        if _app is None:
+            _app = get_workflow().compile()
+        return _app
+
+
+def get_durable_app():
+    """SQLite 체크포인터로 컴파일한 실행기 (thread_id별로 interrupt 지점부터 재개 가능)"""
+    global _durable_app
+    with _compile_lock:
+        if _durable_app is None:
+            _durable_app = get_workflow().compile(checkpointer=get_checkpointer())
+        return _durable_app
+
+
+def __getattr__(name: str):
+    """기존 `from agent.graph import app, workflow` 호환 (langgraph.json의 ./agent/graph.py:app 포함)"""
+    if name == "app":
+        return get_app()
+    if name == "workflow":
+        return get_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # --- Helper 함수 ---
-def resume_with_user_choice(current_state: Dict[str, Any], user_choice: str):
-    """사용자 선택을 반영하여 그래프 실행 재개"""
-    # human_feedback 추가
-    current_state["human_feedback"] = {"choice": user_choice}
-    
-    # 그래프 실행 재개
-    return app.invoke(current_state)
+def resume_with_user_choice(thread_id: str, user_choice: str):
+    """중단된 장애(thread_id)를 사용자 선택으로 재개 (분석 노드는 다시 실행하지 않음)"""
+    return get_durable_app().invoke(Command(resume=user_choice), thread_config(thread_id))
+
+
+def list_pending_incidents() -> List[str]:
+    """조치 선택을 기다리는 장애의 thread_id 목록 (프로세스 재시작 후 재개용)"""
+    durable_app = get_durable_app()
+    thread_ids = {c.config["configurable"]["thread_id"] for c in get_checkpointer().list(None)}
+    return sorted(
+        thread_id for thread_id in thread_ids
+        if "RemediationDecision" in durable_app.get_state(thread_config(thread_id)).next
+    )
 
 if __name__ == "__main__":
+    import sys
+    
+    # python -m agent.graph <thread_id> <선택> : 승인 대기 중인 장애를 중단 지점부터 재개
+    if len(sys.argv) == 3:
+        result = resume_with_user_choice(sys.argv[1], sys.argv[2])
+        print("🎉 Final Status:", result.get("final_status", "N/A"))
+        sys.exit(0)
+    
+    pending = list_pending_incidents()
+    if pending:
+        print(f"⏸️ 조치 선택 대기 중인 장애: {', '.join(pending)}")
+    
     initial_state: AgentState = {"alert_context": {"service": "Service A"}}
+    thread_id = f"cli-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
-    try:
-        # 초기 실행 (RemediationDecision에서 interrupt 발생)
-        result = app.invoke(initial_state)
+    # 초기 실행 (RemediationDecision에서 interrupt 발생 후 체크포인트에 저장)
+    result = get_durable_app().invoke(initial_state, thread_config(thread_id))
+    if "__interrupt__" in result:
+        print(f"⏸️ RemediationDecision에서 대기 중 (thread_id: {thread_id})")
+        print(f"   재개: python -m agent.graph {thread_id} <1|2|3|manual|re_analyze>")
+    else:
         print("🎉 Final State:", result)
-    except Exception as e:
-        print(f"Expected interrupt at RemediationDecision: {e}")
-        
-        # 실제 사용 시에는 LangGraph Studio에서 사용자 입력을 받고
-        # resume_with_user_choice 함수를 사용하여 재개
@@ -0,0 +1,257 @@
+"""
+장애 처리 이력 저장소
+
+조치 실행 / 수동 처리 / 재분석 결과를 SQLite 파일에 한 행씩 기록합니다.
+목록과 집계에 쓰는 값(서비스, 시각, 최종 상태, 조치, 성공 수, 소요 시간, 토큰)은 인덱스가 걸린 좁은 테이블에,
+전체 상태 스냅샷과 도구 실행 결과는 압축한 JSON으로 별도 테이블에 저장해 목록 조회 / 집계가 스냅샷 크기에 영향받지 않습니다.
+목록은 id 기준 keyset 페이지네이션으로 조회하므로 이력이 수십만 건이어도 페이지 조회 비용이 일정하고,
+서버 메모리는 가동 시간에 따라 늘지 않습니다.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+# 목록 조회용 컬럼 (스냅샷 / 도구 결과 제외)
+_LIST_COLUMNS = (
+    "id", "created_at", "incident_id", "session_id", "service", "choice", "action_title", "final_status",
+    "success_count", "tool_count", "execution_ms", "validation_s", "input_tokens", "output_tokens", "cost_usd",
+)
+
+# 필터 이름 -> 조건절 (모두 인덱스 선두 컬럼)
+_FILTERS = {
+    "service": "service = ?",
+    "final_status": "final_status = ?",
+    "action": "action_title = ?",
+    "session_id": "session_id = ?",
+    "since": "created_at >= ?",
+    "until": "created_at < ?",
+}
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8")) if blob else None
+
+
+class IncidentHistoryStore:
+    """인덱스와 keyset 페이지네이션을 가진 SQLite 기반 장애 이력"""
+
+    def __init__(self, path: str, retention_days: float, store_snapshots: bool = True):
+        self.path = path
+        self.retention_days = retention_days
+        self.store_snapshots = store_snapshots
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_prune = 0
+        self.stats = {"writes": 0, "pruned": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS incident_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    incident_id TEXT,
+                    session_id TEXT,
+                    service TEXT,
+                    choice TEXT,
+                    action_title TEXT,
+                    final_status TEXT,
+                    success_count INTEGER NOT NULL DEFAULT 0,
+                    tool_count INTEGER NOT NULL DEFAULT 0,
+                    execution_ms REAL,
+                    validation_s REAL,
+                    input_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    cost_usd REAL NOT NULL DEFAULT 0
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS incident_snapshots (
+                    history_id INTEGER PRIMARY KEY,
+                    tool_results BLOB,
+                    state BLOB
+                )"""
+            )
+            # 필터 컬럼 + id(시간순) 복합 인덱스: 필터된 최신순 페이지를 인덱스 범위 스캔만으로 조회
+            for column in ("service", "final_status", "action_title", "session_id", "incident_id"):
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_history_{column} ON incident_history({column}, id)"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_service_status ON incident_history(service, final_status, id)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_created ON incident_history(created_at)")
+        return self._conn
+
+    def record(
+        self,
+        state: Dict[str, Any],
+        choice: str,
+        session_id: str = None,
+        final_status: str = None,
+    ) -> int:
+        """처리 결과 한 건 기록 후 행 id 반환 (final_status를 주면 상태 값 대신 사용)"""
+        results = state.get("execution_results") or []
+        action = state.get("selected_action_details") or {}
+        usage = (state.get("token_usage") or {}).get("total") or {}
+        snapshot = {k: v for k, v in state.items() if not k.startswith("__")} if self.store_snapshots else None
+        row = (
+            time.time(),
+            state.get("incident_id"),
+            session_id,
+            (state.get("slack_alert") or {}).get("service"),
+            choice,
+            action.get("title"),
+            final_status or state.get("final_status") or "",
+            sum(1 for r in results if r.get("status") == "success"),
+            len(results),
+            (state.get("execution_report") or {}).get("elapsed_ms"),
+            (state.get("validation_report") or {}).get("elapsed_s"),
+            int(usage.get("input_tokens", 0)),
+            int(usage.get("output_tokens", 0)),
+            float(usage.get("cost_usd", 0.0)),
+        )
+        blobs = (_pack(results), _pack(snapshot) if snapshot is not None else None)
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT INTO incident_history (created_at, incident_id, session_id, service, choice, action_title, "
+                "final_status, success_count, tool_count, execution_ms, validation_s, input_tokens, output_tokens, "
+                "cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            conn.execute(
+                "INSERT INTO incident_snapshots (history_id, tool_results, state) VALUES (?, ?, ?)",
+                (cursor.lastrowid, *blobs)
+            )
+            self.stats["writes"] += 1
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= settings.HISTORY_PRUNE_EVERY:
+                self._prune(conn)
+            conn.commit()
+            return cursor.lastrowid
+
+    def _prune(self, conn: sqlite3.Connection):
+        """보존 기간이 지난 이력 삭제 (retention_days가 0이면 보존)"""
+        self._writes_since_prune = 0
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        (last_id,) = conn.execute("SELECT MAX(id) FROM incident_history WHERE created_at < ?", (cutoff,)).fetchone()
+        if last_id is None:
+            return
+        conn.execute("DELETE FROM incident_snapshots WHERE history_id <= ?", (last_id,))
+        self.stats["pruned"] += conn.execute("DELETE FROM incident_history WHERE id <= ?", (last_id,)).rowcount
+
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for name, value in filters.items():
+            if name not in _FILTERS:
+                raise ValueError(f"알 수 없는 이력 필터: {name}")
+            if value not in (None, ""):
+                clauses.append(_FILTERS[name])
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: int = None, before_id: int = None, **filters) -> Dict[str, Any]:
+        """최신순 한 페이지 조회
+
+        다음 페이지는 반환된 next_before_id를 before_id로 넘겨 조회합니다 (OFFSET 없이 인덱스에서 바로 이어서 읽음).
+        filters: service, final_status, action, session_id, since, until (epoch 초)
+        """
+        limit = settings.HISTORY_PAGE_SIZE if limit is None else limit
+        where, params = self._where(filters)
+        if before_id is not None:
+            where += (" AND " if where else " WHERE ") + "id < ?"
+            params.append(before_id)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(_LIST_COLUMNS)} FROM incident_history{where} ORDER BY id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+        items = [dict(zip(_LIST_COLUMNS, row)) for row in rows[:limit]]
+        return {
+            "items": items,
+            "next_before_id": items[-1]["id"] if len(rows) > limit else None,
+        }
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """이력 한 건의 전체 내용 (도구 실행 결과와 상태 스냅샷 포함)"""
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join('h.' + c for c in _LIST_COLUMNS)}, s.tool_results, s.state "
+                "FROM incident_history h LEFT JOIN incident_snapshots s ON s.history_id = h.id WHERE h.id = ?",
+                (entry_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(_LIST_COLUMNS, row[:len(_LIST_COLUMNS)]))
+        entry["tool_results"] = _unpack(row[-2]) or []
+        entry["state"] = _unpack(row[-1])
+        return entry
+
+    def summary(self, **filters) -> Dict[str, Any]:
+        """필터 조건의 건수 / 최종 상태별 건수 / 조치별 성공률 / 평균 실행 시간 / 토큰 합계"""
+        where, params = self._where(filters)
+        with self._lock:
+            conn = self._connect()
+            total, avg_ms, tokens_in, tokens_out, cost = conn.execute(
+                "SELECT COUNT(*), AVG(execution_ms), COALESCE(SUM(input_tokens), 0), "
+                f"COALESCE(SUM(output_tokens), 0), COALESCE(SUM(cost_usd), 0) FROM incident_history{where}",
+                params
+            ).fetchone()
+            by_status = conn.execute(
+                f"SELECT final_status, COUNT(*) FROM incident_history{where} GROUP BY final_status ORDER BY 2 DESC",
+                params
+            ).fetchall()
+            by_action = conn.execute(
+                "SELECT action_title, COUNT(*), SUM(final_status = 'resolved') FROM incident_history"
+                f"{where}{' AND' if where else ' WHERE'} action_title IS NOT NULL "
+                "GROUP BY action_title ORDER BY 2 DESC LIMIT 10",
+                params
+            ).fetchall()
+        return {
+            "total": total,
+            "avg_execution_ms": round(avg_ms, 1) if avg_ms is not None else None,
+            "input_tokens": tokens_in,
+            "output_tokens": tokens_out,
+            "cost_usd": round(cost, 4),
+            "by_status": dict(by_status),
+            "by_action": [
+                {"action": title, "count": count, "resolved_rate": round(resolved / count, 3) if count else 0.0}
+                for title, count, resolved in by_action
+            ],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """기록 카운터와 현재 행 수"""
+        with self._lock:
+            stats = dict(self.stats)
+            (stats["rows"],) = self._connect().execute("SELECT COUNT(*) FROM incident_history").fetchone()
+        return stats
+
+
+# 전역 이력 저장소 인스턴스
+history_store = IncidentHistoryStore(
+    path=settings.HISTORY_DB_PATH,
+    retention_days=settings.HISTORY_RETENTION_DAYS,
+    store_snapshots=settings.HISTORY_STORE_SNAPSHOTS
+)
@@ -0,0 +1,298 @@
+"""
+과거 유사 장애 인덱스 (MinHash / LSH)
+
+해결된 장애의 증거 시그니처(알림 서비스, 로그 템플릿, 메트릭 변화 방향, 트레이스 크리티컬 패스 엣지)와
+확인된 근본 원인 / 성공한 조치를 SQLite 파일에 저장하고, 메모리에는 MinHash 시그니처를 LSH 밴드 버킷으로 색인합니다.
+새 알림은 같은 버킷에 걸린 후보만 정확한 Jaccard 유사도로 비교하므로 장애 수가 늘어도 조회는 수 ms에 끝납니다.
+유사도가 높으면 근본 원인 LLM 호출을 생략하고, 그렇지 않으면 유사 장애를 프롬프트 참고 자료로 넣습니다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from config.settings import settings
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_NUMBER = re.compile(r"\d+")
+
+
+def _normalize(text: str) -> str:
+    """숫자 / 대소문자 차이로 같은 패턴이 다른 특징이 되지 않도록 정규화"""
+    return _NUMBER.sub("<n>", str(text).strip().lower())
+
+
+def incident_signature(state: Dict[str, Any]) -> List[str]:
+    """장애 증거 요약에서 유사도 비교용 특징 집합 추출
+
+    원본 로그 / 시계열 값이 아니라 context_collector_node가 만든 요약(템플릿, 변화 방향, 크리티컬 패스)만 사용하므로
+    발생 시각이나 수치가 달라도 같은 장애 패턴이면 같은 특징이 나옵니다.
+    """
+    features: Set[str] = set()
+
+    alert = state.get("slack_alert") or {}
+    service = alert.get("service") or (state.get("alert_context") or {}).get("service")
+    if service:
+        features.add(f"service:{_normalize(service)}")
+    if alert.get("alert_type"):
+        features.add(f"alert:{_normalize(alert['alert_type'])}")
+
+    for template in (state.get("log_templates") or {}).get("templates", []):
+        features.add(f"log:{_normalize(template['template'])}")
+
+    for anomaly in (state.get("metric_anomalies") or {}).get("anomalies", []):
+        features.add(f"metric:{_normalize(anomaly['series'])}:{anomaly['direction']}")
+
+    trace_summary = state.get("trace_summary") or {}
+    for edge in trace_summary.get("top_edges", []):
+        features.add(f"edge:{_normalize(edge['caller'])}->{_normalize(edge['callee'])}")
+        if edge.get("error_rate"):
+            features.add(f"edge_error:{_normalize(edge['callee'])}")
+    for name in list(trace_summary.get("services", {}))[:3]:
+        features.add(f"critical:{_normalize(name)}")
+
+    return sorted(features)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """고정 시드의 범용 해시 순열로 만든 MinHash (프로세스가 달라도 같은 시그니처)"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # a * h + b가 uint64 범위를 넘지 않도록 a, b, h 모두 32비트 이하
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signature(self, features: Iterable[str]) -> np.ndarray:
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=4).digest(), "little") for f in features],
+            dtype=np.uint64,
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=1)
+
+
+class IncidentIndex:
+    """SQLite에 영속하고 메모리에서 LSH로 조회하는 유사 장애 인덱스"""
+
+    def __init__(self, path: str, num_perm: int, bands: int, max_entries: int):
+        if num_perm % bands:
+            raise ValueError(f"INCIDENT_INDEX_NUM_PERM({num_perm})은 INCIDENT_INDEX_BANDS({bands})의 배수여야 합니다")
+        self.path = path
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self._hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        self.stats = {"lookups": 0, "candidates": 0, "matches": 0, "recorded": 0, "evicted": 0, "lookup_ms": 0.0}
+
+    def _connect(self) -> sqlite3.Connection:
+        """최초 사용 시 DB를 열고 저장된 장애 전체로 LSH 버킷을 다시 구성"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS incidents (
+                    incident_id TEXT PRIMARY KEY,
+                    service TEXT,
+                    features TEXT NOT NULL,
+                    root_cause TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    resolved_count INTEGER NOT NULL DEFAULT 0,
+                    failed_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_incidents_updated ON incidents(updated_at)")
+            rows = self._conn.execute(
+                "SELECT incident_id, service, features, root_cause, action, resolved_count, failed_count FROM incidents"
+            ).fetchall()
+            for incident_id, service, features, root_cause, action, resolved, failed in rows:
+                self._add_entry(incident_id, {
+                    "service": service,
+                    "features": set(json.loads(features)),
+                    "root_cause": root_cause,
+                    "action": json.loads(action),
+                    "resolved_count": resolved,
+                    "failed_count": failed,
+                })
+        return self._conn
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _add_entry(self, incident_id: str, entry: Dict[str, Any]):
+        entry["band_keys"] = self._band_keys(self._hasher.signature(entry["features"]))
+        self._entries[incident_id] = entry
+        for band, key in zip(self._buckets, entry["band_keys"]):
+            band.setdefault(key, set()).add(incident_id)
+
+    def _remove_entry(self, incident_id: str):
+        entry = self._entries.pop(incident_id, None)
+        if entry is None:
+            return
+        for band, key in zip(self._buckets, entry["band_keys"]):
+            members = band.get(key)
+            if members:
+                members.discard(incident_id)
+                if not members:
+                    del band[key]
+
+    def query(self, features: Iterable[str], top_k: int = None, min_similarity: float = None) -> List[Dict[str, Any]]:
+        """유사도 내림차순으로 과거 장애 반환 (LSH 후보만 정확한 Jaccard로 비교)"""
+        top_k = settings.INCIDENT_SIMILAR_TOP_K if top_k is None else top_k
+        min_similarity = settings.INCIDENT_SEED_SIMILARITY if min_similarity is None else min_similarity
+        features = set(features)
+        started = time.perf_counter()
+
+        with self._lock:
+            self._connect()
+            candidates: Set[str] = set()
+            for band, key in zip(self._buckets, self._band_keys(self._hasher.signature(features))):
+                candidates |= band.get(key, set())
+
+            matches = []
+            for incident_id in candidates:
+                entry = self._entries[incident_id]
+                similarity = _jaccard(features, entry["features"])
+                if similarity >= min_similarity:
+                    matches.append({
+                        "incident_id": incident_id,
+                        "similarity": round(similarity, 3),
+                        "service": entry["service"],
+                        "root_cause": entry["root_cause"],
+                        "action": entry["action"],
+                        "resolved_count": entry["resolved_count"],
+                        "failed_count": entry["failed_count"],
+                    })
+            matches.sort(key=lambda m: (-m["similarity"], -m["resolved_count"]))
+
+            self.stats["lookups"] += 1
+            self.stats["candidates"] += len(candidates)
+            self.stats["matches"] += bool(matches)
+            self.stats["lookup_ms"] += (time.perf_counter() - started) * 1000
+        return matches[:top_k]
+
+    def record(self, incident_id: str, features: Iterable[str], root_cause: str, action: Dict[str, Any], service: str = None):
+        """해결된 장애 저장 (같은 incident_id는 해결 횟수만 증가), 최대 항목 수를 넘으면 오래된 것부터 제거"""
+        features = sorted(set(features))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            existing = self._entries.get(incident_id)
+            if existing is not None:
+                existing["resolved_count"] += 1
+                conn.execute(
+                    "UPDATE incidents SET resolved_count = resolved_count + 1, updated_at = ? WHERE incident_id = ?",
+                    (now, incident_id)
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO incidents (incident_id, service, features, root_cause, action, resolved_count, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, 1, ?, ?)",
+                    (incident_id, service, json.dumps(features, ensure_ascii=False), root_cause,
+                     json.dumps(action, ensure_ascii=False), now, now)
+                )
+                self._add_entry(incident_id, {
+                    "service": service,
+                    "features": set(features),
+                    "root_cause": root_cause,
+                    "action": action,
+                    "resolved_count": 1,
+                    "failed_count": 0,
+                })
+            self.stats["recorded"] += 1
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                evicted = [row[0] for row in conn.execute(
+                    "SELECT incident_id FROM incidents ORDER BY updated_at ASC LIMIT ?", (overflow,)
+                )]
+                conn.executemany("DELETE FROM incidents WHERE incident_id = ?", [(i,) for i in evicted])
+                for evicted_id in evicted:
+                    self._remove_entry(evicted_id)
+                self.stats["evicted"] += len(evicted)
+            conn.commit()
+
+    def record_failure(self, incident_id: str):
+        """재사용한 과거 조치가 이번에는 해결하지 못한 경우 (실패가 해결보다 많으면 재사용 대상에서 제외)"""
+        with self._lock:
+            conn = self._connect()
+            entry = self._entries.get(incident_id)
+            if entry is None:
+                return
+            entry["failed_count"] += 1
+            conn.execute(
+                "UPDATE incidents SET failed_count = failed_count + 1, updated_at = ? WHERE incident_id = ?",
+                (time.time(), incident_id)
+            )
+            conn.commit()
+
+    def clear(self):
+        """인덱스 전체 삭제"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM incidents")
+            conn.commit()
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """조회 / 저장 카운터와 현재 항목 수"""
+        with self._lock:
+            self._connect()
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        stats["avg_lookup_ms"] = round(stats["lookup_ms"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+        stats["lookup_ms"] = round(stats["lookup_ms"], 3)
+        return stats
+
+
+def format_similar_incidents(matches: List[Dict[str, Any]]) -> str:
+    """프롬프트용 유사 장애 요약 텍스트"""
+    if not matches:
+        return "유사한 과거 장애 없음"
+    lines = []
+    for m in matches:
+        action = m["action"] or {}
+        tools = ", ".join(t.get("name", "") for t in action.get("tools", []))
+        lines.append(
+            f"- {m['incident_id']} (유사도 {m['similarity']:.2f}, 해결 {m['resolved_count']}회 / 실패 {m['failed_count']}회)\n"
+            f"  근본 원인: {m['root_cause']}\n"
+            f"  해결한 조치: {action.get('title', 'N/A')} ({tools})"
+        )
+    return "\n".join(lines)
+
+
+# 전역 인덱스 인스턴스
+incident_index = IncidentIndex(
+    path=settings.INCIDENT_INDEX_PATH,
+    num_perm=settings.INCIDENT_INDEX_NUM_PERM,
+    bands=settings.INCIDENT_INDEX_BANDS,
+    max_entries=settings.INCIDENT_INDEX_MAX_ENTRIES
+)
@@ -0,0 +1,178 @@
+"""
+알림 폭주(alert storm) 병합 및 중복 제거
+
+그래프 실행 앞단에서 Slack 알림을 (service, alert_type, 시간 창) 기준으로 하나의 장애로 묶고,
+이미 분석 중인 장애에 늦게 도착한 중복 알림은 새 실행 없이 해당 장애에 붙입니다.
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+def parse_alert_time(alert: Dict[str, Any], default: float) -> float:
+    """알림 timestamp를 epoch 초로 변환 (파싱 실패 시 default)"""
+    raw = alert.get("timestamp")
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    if isinstance(raw, str) and raw:
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+class Incident:
+    """병합된 알림 묶음 (하나의 그래프 실행에 대응)"""
+
+    def __init__(self, key: Tuple[str, str], alert: Dict[str, Any], alert_time: float):
+        self.incident_id = f"inc-{uuid.uuid4().hex[:12]}"
+        self.key = key
+        self.primary_alert = alert
+        self.alerts: List[Dict[str, Any]] = [alert]
+        self.opened_at = alert_time
+        self.last_alert_at = alert_time
+        self.status = "in_flight"
+        self.result: Optional[Dict[str, Any]] = None
+        self._done = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """분석이 끝날 때까지 대기 후 결과 반환 (타임아웃 시 None)"""
+        self._done.wait(timeout)
+        return self.result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "incident_id": self.incident_id,
+            "service": self.key[0],
+            "alert_type": self.key[1],
+            "status": self.status,
+            "alert_count": len(self.alerts),
+            "opened_at": self.opened_at,
+            "last_alert_at": self.last_alert_at,
+        }
+
+
+class AlertCoalescer:
+    """(service, alert_type, 시간 창) 기준 알림 병합기
+
+    - 장애 시작 후 window_s 이내의 같은 키 알림은 같은 장애로 병합
+    - 창이 지났더라도 해당 장애가 아직 분석 중이면 늦은 중복으로 병합
+    - 창이 지나고 분석도 끝났으면 새 장애로 시작
+    """
+
+    def __init__(self, window_s: float = None, clock: Callable[[], float] = time.time):
+        self.window_s = settings.ALERT_COALESCE_WINDOW_S if window_s is None else window_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[str, str], Incident] = {}
+        self._incidents: Dict[str, Incident] = {}
+        self.stats = {
+            "alerts_received": 0,
+            "incidents_opened": 0,
+            "alerts_coalesced": 0,
+            "late_duplicates": 0,
+        }
+
+    @staticmethod
+    def alert_key(alert: Dict[str, Any]) -> Tuple[str, str]:
+        return (
+            str(alert.get("service", "unknown")).strip().lower(),
+            str(alert.get("alert_type", "unknown")).strip().lower(),
+        )
+
+    def submit(self, alert: Dict[str, Any]) -> Tuple[Incident, bool]:
+        """알림 접수 -> (장애, 새 장애 여부)"""
+        key = self.alert_key(alert)
+        alert_time = parse_alert_time(alert, self.clock())
+
+        with self._lock:
+            self.stats["alerts_received"] += 1
+            incident = self._open.get(key)
+
+            if incident is not None:
+                within_window = alert_time - incident.opened_at <= self.window_s
+                if within_window or incident.status == "in_flight":
+                    incident.alerts.append(alert)
+                    incident.last_alert_at = max(incident.last_alert_at, alert_time)
+                    self.stats["alerts_coalesced"] += 1
+                    if not within_window:
+                        self.stats["late_duplicates"] += 1
+                    return incident, False
+
+            incident = Incident(key, alert, alert_time)
+            self._open[key] = incident
+            self._incidents[incident.incident_id] = incident
+            self.stats["incidents_opened"] += 1
+            self._prune(alert_time)
+            return incident, True
+
+    def complete(self, incident_id: str, result: Optional[Dict[str, Any]] = None):
+        """장애 분석 완료 처리 (대기 중인 중복 알림에 결과 전달)"""
+        with self._lock:
+            incident = self._incidents.get(incident_id)
+            if incident is None:
+                return
+            incident.status = "completed"
+            incident.result = result
+        incident._done.set()
+
+    def _prune(self, now: float):
+        """창이 지나고 분석이 끝난 장애 정리 (메모리 상한 유지)"""
+        expired = [
+            inc for inc in self._incidents.values()
+            if inc.status == "completed" and now - inc.opened_at > self.window_s
+        ]
+        for inc in expired:
+            self._incidents.pop(inc.incident_id, None)
+            if self._open.get(inc.key) is inc:
+                del self._open[inc.key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """병합 비율 통계 (창 크기 튜닝용)"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["window_s"] = self.window_s
+            stats["in_flight"] = len([i for i in self._incidents.values() if i.status == "in_flight"])
+            stats["open_incidents"] = [i.to_dict() for i in self._open.values()]
+
+        received = stats["alerts_received"]
+        opened = stats["incidents_opened"]
+        stats["coalescing_ratio"] = round(received / opened, 2) if opened else 0.0  # 장애당 알림 수
+        stats["dedup_rate"] = round(stats["alerts_coalesced"] / received, 3) if received else 0.0
+        return stats
+
+
+def run_coalesced(
+    alert: Dict[str, Any],
+    run_incident: Callable[[Incident], Dict[str, Any]],
+    coalescer: "AlertCoalescer" = None,
+    wait_timeout: Optional[float] = None,
+) -> Tuple[Incident, Optional[Dict[str, Any]], bool]:
+    """알림을 병합기에 넣고, 새 장애일 때만 run_incident를 실행
+
+    중복 알림이면 진행 중인 장애의 결과를 wait_timeout까지 기다려 반환합니다.
+    반환값: (장애, 결과 state, 새 실행 여부)
+    """
+    coalescer = coalescer or alert_coalescer
+    incident, is_new = coalescer.submit(alert)
+
+    if not is_new:
+        print(f"🔗 중복 알림 병합: {incident.incident_id} (알림 {len(incident.alerts)}건)")
+        return incident, incident.wait(wait_timeout), False
+
+    result = None
+    try:
+        result = run_incident(incident)
+        return incident, result, True
+    finally:
+        coalescer.complete(incident.incident_id, result)
+
+
+# 전역 병합기 인스턴스
+alert_coalescer = AlertCoalescer()
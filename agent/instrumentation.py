@@ -0,0 +1,344 @@
+"""
+에이전트 런타임 메트릭
+
+그래프 노드, LLM 체인 호출, 도구 호출마다 소요 시간 히스토그램 / 오류 카운터 / 진행 중 게이지를 기록하고,
+Prometheus 텍스트 형식(0.0.4)으로 별도 HTTP 포트에 노출합니다 (Gradio 서버 옆에서 실행).
+외부 의존성 없이 필요한 메트릭 타입(Counter, Gauge, Histogram)만 구현합니다.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+
+# LLM 호출(수 초)부터 노드/도구(수 ms)까지 포괄하는 버킷 경계 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """레이블 조합별 값을 가진 메트릭 공통 부분"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 레이블 불일치: {sorted(labels)} != {sorted(self.labelnames)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """증감 가능한 게이지 (set_function으로 수집 시점에 값을 계산할 수도 있음)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """수집(scrape) 시점에 func()의 값을 사용"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            func = self._functions.get(key)
+            value = self._values.get(key, 0.0)
+        return float(func()) if func else value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, func in functions.items():
+            try:
+                values[key] = float(func())
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (_bucket / _sum / _count)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # value <= 경계인 첫 버킷
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {repr(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭 등록 / 텍스트 형식 출력"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# 전역 레지스트리와 에이전트 메트릭
+registry = MetricsRegistry()
+
+NODE_DURATION = registry.histogram("rca_node_duration_seconds", "그래프 노드 실행 시간", ["node"])
+NODE_ERRORS = registry.counter("rca_node_errors_total", "예외로 끝난 그래프 노드 실행 수", ["node"])
+NODE_IN_PROGRESS = registry.gauge("rca_node_in_progress", "실행 중인 그래프 노드 수", ["node"])
+
+LLM_DURATION = registry.histogram("rca_llm_duration_seconds", "LLM 체인 호출 시간 (캐시 히트 제외)", ["chain"])
+LLM_ERRORS = registry.counter("rca_llm_errors_total", "실패한 LLM 체인 호출 수", ["chain"])
+LLM_IN_PROGRESS = registry.gauge("rca_llm_in_progress", "진행 중인 LLM 체인 호출 수", ["chain"])
+LLM_CACHE_HITS = registry.counter("rca_llm_cache_hits_total", "응답 캐시에서 반환된 LLM 체인 호출 수", ["chain"])
+LLM_TOKENS = registry.counter("rca_llm_tokens_total", "LLM 체인 호출 토큰 수", ["chain", "kind"])
+LLM_COST = registry.counter("rca_llm_cost_usd_total", "LLM 체인 호출 추정 비용 (USD)", ["chain"])
+
+LLM_TIER_DURATION = registry.histogram("rca_llm_tier_duration_seconds", "모델 라우팅 단계별 체인 호출 시간 (triage / primary)", ["chain", "tier"])
+LLM_ESCALATIONS = registry.counter("rca_llm_escalations_total", "triage 응답을 기본 모델로 다시 분석한 수", ["chain", "reason"])
+LLM_QUEUE_WAIT = registry.histogram("rca_llm_queue_wait_seconds", "LLM 스케줄러 대기열에서 기다린 시간", ["chain"])
+LLM_THROTTLED = registry.counter("rca_llm_throttled_total", "스로틀링(429 / 과부하) 응답을 받은 LLM 호출 수", ["chain"])
+LLM_SCHEDULER_LIMIT = registry.gauge("rca_llm_concurrency_limit", "LLM 스케줄러의 현재 동시 실행 한도 (AIMD)")
+LLM_SCHEDULER_QUEUED = registry.gauge("rca_llm_queue_depth", "LLM 스케줄러 대기열에서 기다리는 호출 수")
+
+INCIDENT_LOOKUPS = registry.counter("rca_incident_index_lookups_total", "유사 장애 인덱스 조회 결과 수 (reused / seeded / miss)", ["result"])
+
+TOOL_DURATION = registry.histogram("rca_tool_duration_seconds", "도구 실행 시간 (결과 캐시 히트 제외)", ["tool"])
+TOOL_ERRORS = registry.counter("rca_tool_errors_total", "예외로 끝난 도구 실행 수", ["tool"])
+TOOL_IN_PROGRESS = registry.gauge("rca_tool_in_progress", "실행 중인 도구 수", ["tool"])
+
+POOL_QUEUE_DEPTH = registry.gauge("rca_pool_queue_depth", "스레드 풀에서 실행을 기다리는 작업 수", ["pool"])
+COLLECTOR_ABANDONED = registry.gauge("rca_collector_abandoned_calls", "마감 시간을 넘겨 버렸지만 아직 수집 풀 워커를 점유 중인 소스 호출 수", ["source"])
+
+
+def _is_control_flow(error: BaseException) -> bool:
+    """LangGraph interrupt 등 정상적인 흐름 제어 예외인지 확인"""
+    try:
+        from langgraph.errors import GraphBubbleUp
+    except ImportError:
+        return False
+    return isinstance(error, GraphBubbleUp)
+
+
+class _Tracked:
+    """소요 시간 / 오류 / 진행 중 수를 기록하는 컨텍스트 매니저"""
+
+    def __init__(self, duration: Histogram, errors: Counter, in_progress: Gauge, **labels):
+        self.duration = duration
+        self.errors = errors
+        self.in_progress = in_progress
+        self.labels = labels
+
+    def __enter__(self):
+        self.in_progress.inc(**self.labels)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.in_progress.dec(**self.labels)
+        if exc is not None and _is_control_flow(exc):
+            return False  # interrupt 대기는 실행 시간/오류로 보지 않음
+        self.duration.observe(time.perf_counter() - self.started, **self.labels)
+        if exc is not None:
+            self.errors.inc(**self.labels)
+        return False
+
+
+def instrument_node(name: str, func: Callable) -> Callable:
+    """그래프 노드 함수 계측"""
+    @functools.wraps(func)
+    def instrumented_node(*args, **kwargs):
+        with _Tracked(NODE_DURATION, NODE_ERRORS, NODE_IN_PROGRESS, node=name):
+            return func(*args, **kwargs)
+
+    return instrumented_node
+
+
+def instrument_tool(name: str, func: Callable) -> Callable:
+    """도구 함수 계측"""
+    @functools.wraps(func)
+    def instrumented_tool(*args, **kwargs):
+        with _Tracked(TOOL_DURATION, TOOL_ERRORS, TOOL_IN_PROGRESS, tool=name):
+            return func(*args, **kwargs)
+
+    return instrumented_tool
+
+
+def track_llm(chain: str) -> _Tracked:
+    """LLM 체인 호출 계측용 컨텍스트 매니저"""
+    return _Tracked(LLM_DURATION, LLM_ERRORS, LLM_IN_PROGRESS, chain=chain)
+
+
+def watch_pool_queue(pool: str, executor) -> None:
+    """ThreadPoolExecutor의 대기 작업 수를 수집 시점에 게이지로 노출"""
+    POOL_QUEUE_DEPTH.set_function(lambda: executor._work_queue.qsize(), pool=pool)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 수집 요청마다 로그를 남기지 않음
+
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int = None, host: str = None) -> Optional[ThreadingHTTPServer]:
+    """Prometheus 수집용 HTTP 서버를 데몬 스레드로 시작 (이미 실행 중이면 그대로 반환)"""
+    global _server
+    if not settings.METRICS_ENABLED:
+        return None
+    port = settings.METRICS_PORT if port is None else port
+    host = settings.METRICS_HOST if host is None else host
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"📈 메트릭 엔드포인트: http://{host}:{_server.server_address[1]}/metrics")
+        return _server
+
+
+def stop_metrics_server():
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
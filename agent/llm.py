@@ -1,18 +1,162 @@
-from langchain_openai import ChatOpenAI
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import httpx
+from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ensure_config
+from langchain_core.callbacks import BaseCallbackManager
 from config.settings import settings
+from agent.llm_cache import llm_response_cache, fingerprint
+from agent.instrumentation import LLM_CACHE_HITS, track_llm
+from agent.llm_scheduler import DEFAULT_PRIORITY, get_llm_scheduler
+from agent.usage import UsageCallback, estimate_tokens, prompt_tokens
+from agent.tools import get_tool_signatures_description
+
+if TYPE_CHECKING:
+    # langchain_openai(openai SDK 포함)는 import 비용이 커서 첫 클라이언트 생성 시점에 불러옴
+    from langchain_openai import ChatOpenAI
+
+
+# --- 프로세스 전역 LLM 클라이언트 레지스트리 ---
+# ChatOpenAI 인스턴스와 체인은 한 번만 만들고, 모든 인스턴스가
+# keep-alive 커넥션 풀을 가진 하나의 httpx 클라이언트를 공유합니다.
+_registry_lock = threading.RLock()
+_http_client: httpx.Client = None
+_llm_clients: Dict[Tuple[str, float, int], "ChatOpenAI"] = {}
+_chains: Dict[str, Any] = {}
+_stats = {
+    "llm_created": 0,
+    "llm_reused": 0,
+    "chain_built": 0,
+    "chain_reused": 0,
+    "http_requests": 0,
+    "warmed_up": False,
+}
+
 
-def create_llm():
-    """ChatOpenAI 인스턴스 생성"""
-    settings.validate_openai_config()
+def _count_request(request: httpx.Request):
+    with _registry_lock:
+        _stats["http_requests"] += 1
+
+
+def get_http_client() -> httpx.Client:
+    """OpenAI 호출용 공유 httpx 클라이언트 (keep-alive 커넥션 풀)"""
+    global _http_client
+    with _registry_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_S,
+                ),
+                timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_S, connect=10.0),
+                event_hooks={"request": [_count_request]},
+            )
+        return _http_client
+
+
+def create_llm(model: str = None, temperature: float = None, max_tokens: int = 2000) -> "ChatOpenAI":
+    """ChatOpenAI 인스턴스 조회 (설정 조합별로 한 번만 생성하고 재사용)"""
+    model = model or settings.OPENAI_MODEL
+    temperature = settings.OPENAI_TEMPERATURE if temperature is None else temperature
+    key = (model, temperature, max_tokens)
     
-    return ChatOpenAI(
-        api_key=settings.OPENAI_API_KEY,
-        model=settings.OPENAI_MODEL,
-        temperature=settings.OPENAI_TEMPERATURE,
-        max_tokens=2000
-    )
+    with _registry_lock:
+        llm = _llm_clients.get(key)
+        if llm is not None:
+            _stats["llm_reused"] += 1
+            return llm
+        
+        settings.validate_openai_config()
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=get_http_client(),
+            # 스로틀링 재시도는 스케줄러가 한도를 조정하며 처리 (SDK 자체 재시도와 겹치지 않도록)
+            max_retries=0 if settings.LLM_SCHEDULER_ENABLED else 2,
+            stream_usage=True  # 스트리밍 응답에서도 토큰 사용량 수신
+        )
+        _llm_clients[key] = llm
+        _stats["llm_created"] += 1
+        return llm
+
+
+def _chain_key(name: str, model: str = None) -> str:
+    """체인 레지스트리 키 (기본 모델이 아니면 모델별로 따로 빌드)"""
+    return name if not model or model == settings.OPENAI_MODEL else f"{name}@{model}"
+
+
+def _get_chain(name: str, build):
+    """이름별로 체인을 한 번만 빌드해서 재사용"""
+    with _registry_lock:
+        chain = _chains.get(name)
+        if chain is not None:
+            _stats["chain_reused"] += 1
+            return chain
+        
+        chain = build()
+        _chains[name] = chain
+        _stats["chain_built"] += 1
+        return chain
+
+
+def warmup_llm_clients(connect: bool = True) -> Dict[str, Any]:
+    """서버 시작 시 체인을 미리 빌드하고 OpenAI 커넥션을 열어둠"""
+    create_root_cause_chain()
+    create_action_planning_chain()
+    if settings.RCA_ANALYSIS_MODE == "single_pass":
+        create_single_pass_chain()
+    
+    if connect:
+        # 응답 코드와 무관하게 TLS 커넥션이 풀에 남아 첫 장애 분석에서 재사용됨
+        try:
+            get_http_client().get(
+                f"{settings.OPENAI_BASE_URL.rstrip('/')}/models",
+                headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+            )
+        except httpx.HTTPError as e:
+            print(f"⚠️ LLM 커넥션 워밍업 실패: {e}")
+    
+    with _registry_lock:
+        _stats["warmed_up"] = True
+    return get_llm_pool_stats()
+
+
+def get_llm_pool_stats() -> Dict[str, Any]:
+    """레지스트리 재사용 통계와 커넥션 풀 상태"""
+    with _registry_lock:
+        stats = dict(_stats)
+        stats["llm_clients"] = len(_llm_clients)
+        stats["chains"] = len(_chains)
+    
+    # httpx 내부 풀 정보 (버전에 따라 없을 수 있음)
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["pool_connections"] = len(connections)
+    stats["pool_idle_connections"] = len([c for c in connections if c.is_idle()])
+    stats["pool_max_connections"] = settings.OPENAI_MAX_CONNECTIONS
+    return stats
+
+
+def reset_llm_registry():
+    """레지스트리 초기화 (설정 변경 또는 테스트용)"""
+    global _http_client
+    with _registry_lock:
+        _llm_clients.clear()
+        _chains.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        for key in _stats:
+            _stats[key] = False if key == "warmed_up" else 0
 
 # Root Cause Analysis를 위한 프롬프트 템플릿
 ROOT_CAUSE_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
@@ -43,7 +187,10 @@ ROOT_CAUSE_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
     {traces}
 
     **알림 컨텍스트:**
-    {alert_context}""")
+    {alert_context}
+
+    **과거 유사 장애 (참고용, 현재 증거와 맞지 않으면 무시):**
+    {similar_incidents}""")
 ])
 
 # Action Planning을 위한 프롬프트 템플릿 (도구 선택 포함)
@@ -97,14 +244,187 @@ ACTION_PLANNING_PROMPT = ChatPromptTemplate.from_messages([
 ])
 
 
-def create_root_cause_chain():
-    """Root Cause Analysis를 위한 LLM 체인 생성"""
-    llm = create_llm()
-    chain = ROOT_CAUSE_ANALYSIS_PROMPT | llm | StrOutputParser()
-    return chain
+def create_root_cause_chain(model: str = None):
+    """Root Cause Analysis를 위한 LLM 체인 (모델별로 프로세스당 한 번 빌드)"""
+    return _get_chain(
+        _chain_key("root_cause", model),
+        lambda: ROOT_CAUSE_ANALYSIS_PROMPT | create_llm(model) | StrOutputParser()
+    )
+
+def create_action_planning_chain(model: str = None):
+    """Action Planning을 위한 LLM 체인 (모델별로 프로세스당 한 번 빌드)"""
+    return _get_chain(
+        _chain_key("action_planning", model),
+        lambda: ACTION_PLANNING_PROMPT | create_llm(model) | StrOutputParser()
+    )
+
+
+
+# --- 단일 호출 분석 (근본 원인 + 조치 계획) ---
+class ToolCallSpec(BaseModel):
+    """조치 단계에서 실행할 도구 호출"""
+    name: str = Field(description="사용 가능한 도구 이름")
+    params: Dict[str, Any] = Field(default_factory=dict, description="도구 시그니처에 맞는 파라미터")
+    depends_on: List[int] = Field(
+        default_factory=list,
+        description="먼저 끝나야 하는 앞 단계 번호 (1부터). 비워두면 상태 변경 도구 기준 순서로 실행"
+    )
+
+
+class ActionPlanSpec(BaseModel):
+    """도구 기반 조치 계획"""
+    id: int
+    title: str
+    description: str
+    risk_level: str = Field(description="낮음 / 중간 / 높음")
+    estimated_time: str
+    tools: List[ToolCallSpec]
+
+
+class IncidentAnalysis(BaseModel):
+    """근본 원인 분석과 조치 계획을 함께 담는 구조화 응답"""
+    root_cause: str = Field(description="근본 원인 (한 문장)")
+    evidence: List[str] = Field(description="분석 근거 2-3개")
+    impact: str = Field(description="영향 범위")
+    confidence: int = Field(ge=1, le=10, description="신뢰도 (1-10)")
+    affected_services: List[str]
+    actions: List[ActionPlanSpec] = Field(description="정확히 3개의 조치 계획")
+    recommendation: int = Field(description="추천 조치 id")
+
+
+SINGLE_PASS_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 시스템 장애 분석 및 운영 전문가입니다.
+    제공된 로그, 메트릭, 트레이스를 분석해 근본 원인을 찾고, 이를 해결할 3가지 조치 계획을 함께 수립하세요.
+
+    분석 방법론:
+    1. 시간순으로 이벤트 분석
+    2. 메트릭 패턴과 임계값 비교
+    3. 에러 로그와 트레이스 연관성 파악
+    4. 시스템 의존성 고려
+
+    조치 계획 규칙:
+    - 각 조치는 아래 도구만 사용하고, 파라미터는 시그니처를 정확히 따르세요
+    - 각 조치는 상태 확인 -> 조치 -> 검증 순서로 도구를 나열하세요
+
+    사용 가능한 도구들:
+    {tools}"""),
+    
+    ("human", """다음 정보를 바탕으로 근본 원인과 3가지 조치 계획을 제시해주세요:
+
+    **로그 정보:**
+    {logs}
+
+    **메트릭 정보:**
+    {metrics}
+
+    **트레이스 정보:**
+    {traces}
+
+    **알림 컨텍스트:**
+    {alert_context}
+
+    **과거 유사 장애 (참고용, 현재 증거와 맞지 않으면 무시):**
+    {similar_incidents}""")
+])
+
+
+def create_single_pass_chain(model: str = None):
+    """근본 원인과 조치 계획을 한 번의 구조화 호출로 생성하는 체인 (JSON 문자열 반환)"""
+    return _get_chain(
+        _chain_key("single_pass", model),
+        lambda: (
+            SINGLE_PASS_ANALYSIS_PROMPT.partial(tools=get_tool_signatures_description())
+            | create_llm(model).with_structured_output(IncidentAnalysis, method="function_calling")
+            | RunnableLambda(lambda analysis: analysis.model_dump_json())
+        )
+    )
+
+
+# 체인 이름 -> (프롬프트, 체인 조회 함수)
+CHAIN_REGISTRY = {
+    "root_cause": (ROOT_CAUSE_ANALYSIS_PROMPT, create_root_cause_chain),
+    "action_planning": (ACTION_PLANNING_PROMPT, create_action_planning_chain),
+    "single_pass": (SINGLE_PASS_ANALYSIS_PROMPT, create_single_pass_chain),
+}
+
+
+def run_chain(
+    name: str,
+    inputs: Dict[str, Any],
+    bypass_cache: bool = False,
+    model: str = None,
+    usage: Dict[str, Any] = None,
+    priority: int = DEFAULT_PRIORITY,
+) -> str:
+    """이름으로 체인을 실행 (동일한 증거에 대한 응답은 디스크 캐시에서 반환)
+
+    bypass_cache=True면 캐시를 읽지 않고 새로 분석한 결과로 캐시를 갱신합니다.
+    model을 지정하면 기본 모델 대신 해당 모델로 호출하고, usage 딕셔너리를 넘기면
+    {"model", "cached", "input_tokens", "output_tokens", "estimated"}를 채웁니다.
+    캐시 미스 호출은 전역 LLM 스케줄러를 거치며, priority가 작을수록 대기열에서 먼저 나갑니다.
+    """
+    prompt, get_chain = CHAIN_REGISTRY[name]
+    model = model or settings.OPENAI_MODEL
+    use_cache = settings.LLM_CACHE_ENABLED
+    if usage is not None:
+        usage.update(model=model, cached=False, input_tokens=0, output_tokens=0, estimated=False)
+    
+    if use_cache:
+        key = fingerprint(prompt, model, settings.OPENAI_TEMPERATURE, inputs)
+        if bypass_cache:
+            llm_response_cache.record_bypass()
+        else:
+            cached = llm_response_cache.get(key)
+            if cached is not None:
+                print(f"⚡ LLM 캐시 히트: {name}")
+                LLM_CACHE_HITS.inc(chain=name)
+                if usage is not None:
+                    usage["cached"] = True
+                return cached
+    
+    callback = UsageCallback()
+    chain = get_chain(model) if model != settings.OPENAI_MODEL else get_chain()
+    # 노드에서 상속된 콜백(그래프의 stream_mode="messages" 토큰 스트리밍 등)을 유지하고 사용량 수집만 추가
+    config = ensure_config()
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks.add_handler(callback, inherit=True)
+    else:
+        config["callbacks"] = [*(callbacks or []), callback]
+    
+    def invoke() -> str:
+        with track_llm(name):
+            return chain.invoke(inputs, config=config)
+    
+    input_tokens = prompt_tokens(prompt) + sum(estimate_tokens(str(v)) for v in inputs.values())
+    if settings.LLM_SCHEDULER_ENABLED:
+        # 출력은 예약분만큼 미리 차감하고 응답 후 실제 사용량으로 정산
+        scheduler = get_llm_scheduler()
+        reserved = input_tokens + settings.LLM_OUTPUT_TOKEN_RESERVE
+        response = scheduler.submit(invoke, estimated_tokens=reserved, priority=priority, name=name)
+    else:
+        response = invoke()
+    
+    if callback.reported:
+        actual = {"input_tokens": callback.input_tokens, "output_tokens": callback.output_tokens, "estimated": False}
+    else:
+        # 사용량을 돌려주지 않는 모델은 프롬프트/응답 길이로 추정
+        actual = {"input_tokens": input_tokens, "output_tokens": estimate_tokens(str(response)), "estimated": True}
+    if settings.LLM_SCHEDULER_ENABLED:
+        scheduler.settle_tokens(reserved, actual["input_tokens"] + actual["output_tokens"])
+    if usage is not None:
+        usage.update(actual)
+    
+    if use_cache:
+        llm_response_cache.put(key, name, response)
+    return response
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """LLM 응답 캐시 히트/미스 통계"""
+    return llm_response_cache.get_stats()
+
 
-def create_action_planning_chain():
-    """Action Planning을 위한 LLM 체인 생성"""
-    llm = create_llm()
-    chain = ACTION_PLANNING_PROMPT | llm | StrOutputParser()
-    return chain
+def get_llm_scheduler_stats() -> Dict[str, Any]:
+    """LLM 스케줄러의 동시 실행 한도 / 대기열 / 스로틀링 통계"""
+    return get_llm_scheduler().get_stats()
@@ -0,0 +1,164 @@
+"""
+LLM 응답 디스크 캐시
+
+프롬프트 / 모델 / temperature / 정규화된 증거 데이터의 정규 지문(fingerprint)을 키로
+근본 원인 분석과 조치 계획 응답을 SQLite 파일에 저장합니다 (TTL + LRU 크기 제한).
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+# 장애마다 달라지지만 분석 결과에는 영향이 없는 필드
+VOLATILE_KEYS = {"timestamp", "trace_id", "span_id", "parent_id", "request_id", "incident_id"}
+
+_ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?")
+_UUID = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+
+
+def normalize_evidence(value: Any) -> Any:
+    """지문 계산용 증거 정규화 (휘발성 필드 제거, 타임스탬프/UUID 마스킹)"""
+    if isinstance(value, dict):
+        return {
+            str(k): normalize_evidence(v)
+            for k, v in value.items()
+            if k not in VOLATILE_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        return [normalize_evidence(v) for v in value]
+    if isinstance(value, str):
+        value = _ISO_TIMESTAMP.sub("<ts>", value)
+        return _UUID.sub("<uuid>", value)
+    return value
+
+
+def fingerprint(prompt: Any, model: str, temperature: float, inputs: Dict[str, Any]) -> str:
+    """프롬프트, 모델, temperature, 정규화된 입력으로 만든 SHA-256 지문"""
+    payload = {
+        "prompt": [
+            [type(m).__name__, getattr(getattr(m, "prompt", None), "template", str(m))]
+            for m in getattr(prompt, "messages", [prompt])
+        ],
+        "model": model,
+        "temperature": temperature,
+        "inputs": normalize_evidence(inputs),
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """TTL과 LRU 항목 수 제한을 가진 SQLite 기반 응답 캐시"""
+
+    def __init__(self, path: str, ttl_s: float, max_entries: int):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "expired": 0, "evicted": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    chain TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses(accessed_at)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (만료된 항목은 삭제하고 None 반환)"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl_s:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.stats["hits"] += 1
+            return response
+
+    def put(self, key: str, chain: str, response: str):
+        """응답 저장 후 최대 항목 수를 넘으면 가장 오래 사용되지 않은 항목부터 제거"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, chain, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, chain, response, now, now)
+            )
+            self.stats["writes"] += 1
+
+            (count,) = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN "
+                    "(SELECT key FROM llm_responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats["evicted"] += overflow
+            conn.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM llm_responses")
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """히트/미스 카운터와 현재 항목 수"""
+        with self._lock:
+            stats = dict(self.stats)
+            (stats["entries"],) = self._connect().execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# 전역 캐시 인스턴스
+llm_response_cache = LLMResponseCache(
+    path=settings.LLM_CACHE_PATH,
+    ttl_s=settings.LLM_CACHE_TTL_S,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES
+)
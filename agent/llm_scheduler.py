@@ -0,0 +1,278 @@
+"""
+프로세스 전역 LLM 요청 스케줄러
+
+모든 체인 호출(run_chain)이 이 스케줄러를 거쳐 OpenAI로 나갑니다.
+- 요청 수 / 토큰 수 토큰 버킷: 분당 한도(LLM_RPM_LIMIT, LLM_TPM_LIMIT)를 넘기 전에 미리 대기
+- AIMD 동시 실행 한도: 성공이 이어지면 1씩 늘리고, 429(스로틀링) / 과부하 응답이나 목표 지연 초과 시 절반으로 줄임
+- 알림 심각도 우선순위: 대기열에서는 critical 장애의 호출이 먼저 나감 (같은 우선순위는 도착 순서)
+- 스로틀링 응답은 Retry-After(없으면 지수 백오프 + 지터) 후 재시도
+
+공급자 한도를 넘겨 429 재시도가 겹겹이 쌓이는 대신 한도 안에서 대기하므로, 장애가 몰려도 RCA 지연 시간의 꼬리가 예측 가능해집니다.
+한도는 프로세스 단위이므로 여러 프로세스가 같은 키를 쓰면 프로세스 수로 나눠 설정합니다 (main.py 재실행기는 자동으로 나눔).
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from agent.instrumentation import LLM_QUEUE_WAIT, LLM_SCHEDULER_LIMIT, LLM_SCHEDULER_QUEUED, LLM_THROTTLED
+from config.settings import settings
+
+# 알림 심각도 -> 우선순위 (작을수록 먼저)
+SEVERITY_PRIORITY = {
+    "critical": 0, "sev1": 0, "p1": 0,
+    "high": 1, "major": 1, "error": 1, "sev2": 1, "p2": 1,
+    "warning": 2, "medium": 2, "sev3": 2, "p3": 2,
+    "info": 3, "low": 3, "minor": 3, "sev4": 3, "p4": 3,
+}
+DEFAULT_PRIORITY = 2
+
+
+def severity_priority(alert: Optional[Dict[str, Any]]) -> int:
+    """알림의 severity / alert_type으로 우선순위 계산"""
+    alert = alert or {}
+    for key in ("severity", "priority", "alert_type"):
+        value = str(alert.get(key) or "").strip().lower()
+        if value in SEVERITY_PRIORITY:
+            return SEVERITY_PRIORITY[value]
+    return DEFAULT_PRIORITY
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """429(요청 / 토큰 한도 초과) 또는 503 / 529(과부하) 응답인지 확인"""
+    if type(error).__name__ in ("RateLimitError", "OverloadedError"):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in (429, 503, 529)
+
+
+def retry_after_s(error: BaseException) -> Optional[float]:
+    """응답 헤더의 재시도 대기 시간 (retry-after-ms 우선, 없으면 None)"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class TokenBucket:
+    """분당 한도로 채워지고 burst_s초 분량까지 쌓이는 토큰 버킷 (호출자가 잠금 관리)
+
+    공급자는 분당 한도를 더 짧은 구간으로 나눠 적용하므로, 1분치를 한꺼번에 내보내지 않도록 버스트를 제한합니다.
+    """
+
+    def __init__(self, per_minute: float, burst_s: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """amount를 꺼낼 수 있을 때까지 남은 시간 (0이면 바로 가능)"""
+        self._refill()
+        amount = min(amount, self.capacity)  # 버킷보다 큰 요청이 영원히 대기하지 않도록
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        """토큰 차감 (실제 사용량 정산 시 음수 잔액 허용)"""
+        self._refill()
+        self.tokens -= amount
+
+
+class LLMScheduler:
+    """토큰 버킷 + AIMD 동시 실행 한도 + 우선순위 대기열"""
+
+    def __init__(
+        self,
+        rpm: float = None,
+        tpm: float = None,
+        burst_s: float = None,
+        max_concurrency: int = None,
+        min_concurrency: int = None,
+        initial_concurrency: int = None,
+        latency_target_s: float = None,
+        max_retries: int = None,
+        queue_timeout_s: float = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.min_concurrency = settings.LLM_MIN_CONCURRENCY if min_concurrency is None else min_concurrency
+        initial = settings.LLM_INITIAL_CONCURRENCY if initial_concurrency is None else initial_concurrency
+        self.limit = float(max(self.min_concurrency, min(self.max_concurrency, initial)))
+        self.latency_target_s = settings.LLM_LATENCY_TARGET_S if latency_target_s is None else latency_target_s
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.queue_timeout_s = settings.LLM_QUEUE_TIMEOUT_S if queue_timeout_s is None else queue_timeout_s
+        self.clock = clock
+        self.sleep = sleep
+        rpm = settings.LLM_RPM_LIMIT if rpm is None else rpm
+        tpm = settings.LLM_TPM_LIMIT if tpm is None else tpm
+        burst_s = settings.LLM_RATE_BURST_S if burst_s is None else burst_s
+        self._requests = TokenBucket(rpm, burst_s, clock) if rpm else None
+        self._tokens = TokenBucket(tpm, burst_s, clock) if tpm else None
+
+        self._cond = threading.Condition()
+        self._queue = []  # (우선순위, 도착 순번)
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._successes = 0
+        self._latency_ewma = None
+        self._last_decrease = float("-inf")
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "decreases": 0, "increases": 0, "queue_timeouts": 0}
+
+        LLM_SCHEDULER_LIMIT.set_function(lambda: self.limit)
+        LLM_SCHEDULER_QUEUED.set_function(lambda: len(self._queue))
+
+    # --- 대기열 ---
+    def _acquire(self, tokens: int, priority: int):
+        """우선순위 순서로 동시 실행 한도와 토큰 버킷이 허용할 때까지 대기"""
+        ticket = (priority, next(self._sequence))
+        deadline = self.clock() + self.queue_timeout_s
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    wait_s = None
+                    if self._queue[0] == ticket and self._in_flight < int(self.limit):
+                        wait_s = max(
+                            self._requests.wait_time(1) if self._requests else 0.0,
+                            self._tokens.wait_time(tokens) if self._tokens else 0.0,
+                        )
+                        if wait_s == 0.0:
+                            if self._requests:
+                                self._requests.take(1)
+                            if self._tokens:
+                                self._tokens.take(min(tokens, self._tokens.capacity))
+                            self._in_flight += 1
+                            return
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.stats["queue_timeouts"] += 1
+                        raise TimeoutError(f"LLM 스케줄러 대기 시간 초과 ({self.queue_timeout_s}초, 우선순위 {priority})")
+                    self._cond.wait(min(remaining, wait_s) if wait_s else remaining)
+            finally:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                # 맨 앞이 바뀌었으니 다음 대기자가 조건을 다시 확인
+                self._cond.notify_all()
+
+    def _release(self, latency_s: float = None, throttled: bool = False):
+        """실행 종료 후 AIMD 한도 갱신"""
+        with self._cond:
+            saturated = self._in_flight >= int(self.limit)
+            self._in_flight -= 1
+            if latency_s is not None:
+                self._latency_ewma = latency_s if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency_s
+            congested = throttled or (
+                latency_s is not None and self.latency_target_s and latency_s > self.latency_target_s
+            )
+            if congested:
+                self._decrease()
+            elif latency_s is not None and saturated:
+                # 한도를 다 쓰는 동안 한도만큼 연속 성공하면 1 증가 (왕복 시간당 +1)
+                # 요청 수 / 토큰 한도에 먼저 걸려 동시 실행이 한도에 못 미칠 때는 늘리지 않음
+                self._successes += 1
+                if self._successes >= int(self.limit) and self.limit < self.max_concurrency:
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+                    self._successes = 0
+                    self.stats["increases"] += 1
+            self._cond.notify_all()
+
+    def _decrease(self):
+        """한도 감소 (동시에 돌아온 여러 429에 한 번만 반응하도록 왕복 시간 동안은 다시 줄이지 않음)"""
+        now = self.clock()
+        if now - self._last_decrease < max(settings.LLM_AIMD_COOLDOWN_S, self._latency_ewma or 0.0):
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.limit = max(self.min_concurrency, self.limit * settings.LLM_AIMD_DECREASE_FACTOR)
+        self.stats["decreases"] += 1
+
+    # --- 실행 ---
+    def submit(self, call: Callable[[], Any], estimated_tokens: int = 0, priority: int = DEFAULT_PRIORITY, name: str = "") -> Any:
+        """call()을 한도 안에서 실행 (스로틀링 응답은 대기 후 재시도)"""
+        for attempt in range(self.max_retries + 1):
+            queued_at = self.clock()
+            self._acquire(estimated_tokens, priority)
+            LLM_QUEUE_WAIT.observe(self.clock() - queued_at, chain=name)
+            started = self.clock()
+            try:
+                result = call()
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                self._release(throttled=throttled)
+                if not throttled:
+                    raise
+                LLM_THROTTLED.inc(chain=name)
+                with self._cond:
+                    self.stats["throttled"] += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = retry_after_s(e)
+                if delay is None:
+                    delay = min(settings.LLM_RETRY_MAX_S, settings.LLM_RETRY_BASE_S * 2 ** attempt)
+                    delay *= random.uniform(0.5, 1.0)
+                with self._cond:
+                    self.stats["retries"] += 1
+                print(f"⏳ LLM 스로틀링 ({name}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                self.sleep(delay)
+                continue
+            self._release(latency_s=self.clock() - started)
+            with self._cond:
+                self.stats["calls"] += 1
+            return result
+
+    def settle_tokens(self, estimated_tokens: int, actual_tokens: int):
+        """예상 토큰과 실제 사용량의 차이를 토큰 버킷에 반영"""
+        if not self._tokens:
+            return
+        with self._cond:
+            self._tokens.take(actual_tokens - min(estimated_tokens, self._tokens.capacity))
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """현재 한도 / 실행 중 / 대기 중 수와 누적 카운터"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats.update(
+                limit=round(self.limit, 2),
+                in_flight=self._in_flight,
+                queued=len(self._queue),
+                request_tokens=round(self._requests.tokens, 1) if self._requests else None,
+                token_tokens=round(self._tokens.tokens, 1) if self._tokens else None,
+            )
+        return stats
+
+
+_scheduler_lock = threading.Lock()
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """프로세스 전역 스케줄러 (최초 호출 시 현재 설정으로 생성)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+def reset_llm_scheduler():
+    """설정 변경 후 스케줄러 재생성용 (다음 호출에서 새로 생성)"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = None
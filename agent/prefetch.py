@@ -0,0 +1,173 @@
+"""
+승인 대기 중 진단 단계 사전 실행 (speculative prefetch)
+
+RemediationDecision이 사람의 선택을 기다리는 동안, 추천 조치들의 앞부분 읽기 전용 단계
+(check_ecs_health, check_db_connections 등)를 백그라운드에서 미리 실행합니다.
+- 상태 변경 도구는 실행하지 않음: 읽기 전용이고 선행 단계도 모두 사전 실행 대상인 단계만 고름
+  (상태 변경 도구 뒤의 verify_restart / validate_db_health 등은 제외)
+- 결과는 공유 도구 결과 캐시에 PREFETCH_TTL_S 동안 보관되어, 선택한 조치가 시작되면 같은 단계는 다시 조회하지 않음
+- PREFETCH_TTL_S가 지난 결과나 상태 변경 도구로 무효화된 결과는 만료로 표시하고 실행 시 다시 조회
+- 승인자에게는 장애별 사전 진단 결과(상태, 경과 시간)를 보여줌
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set
+
+from agent.executor import build_dependencies
+from agent.instrumentation import watch_pool_queue
+from agent.tool_cache import tool_result_cache
+from agent.tools import is_read_only_tool, run_read_only_tool, tool_call_key
+from config.settings import settings
+
+
+def prefetchable_steps(tools_list: List[Dict[str, Any]]) -> List[int]:
+    """사전 실행해도 안전한 단계 인덱스 (읽기 전용이고 선행 단계도 모두 사전 실행 대상인 단계)"""
+    deps = build_dependencies(tools_list)
+    eligible: List[bool] = []
+    for i, tool_spec in enumerate(tools_list):
+        eligible.append(is_read_only_tool(tool_spec.get("name", "")) and all(eligible[d] for d in deps[i]))
+    return [i for i, ok in enumerate(eligible) if ok]
+
+
+def _describe(tool_name: str, params: Dict[str, Any]) -> str:
+    return f"{tool_name}({', '.join(f'{k}={v}' for k, v in params.items())})"
+
+
+class SpeculativePrefetcher:
+    """장애별 사전 실행 작업과 결과 (최근 max_incidents개 장애만 유지)"""
+
+    def __init__(self, ttl_s: float, max_workers: int, max_incidents: int):
+        self.ttl_s = ttl_s
+        self.max_incidents = max_incidents
+        self._lock = threading.Lock()
+        self._incidents: "OrderedDict[str, Dict[Any, Dict[str, Any]]]" = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        watch_pool_queue("prefetch", self._pool)
+        self.stats = {"started": 0, "succeeded": 0, "failed": 0, "skipped": 0, "reused": 0, "discarded": 0}
+
+    def start(self, incident_id: str, actions: List[Dict[str, Any]]) -> List[str]:
+        """추천 조치들의 사전 실행 가능 단계를 백그라운드로 실행하고 대상 단계 설명 목록 반환
+
+        같은 장애에 다시 호출되면(interrupt 재개 시 노드 재실행 등) 진행 중이거나 아직 유효한 단계는 건너뜁니다.
+        """
+        planned = []
+        with self._lock:
+            entries = self._incidents.setdefault(incident_id, {})
+            self._incidents.move_to_end(incident_id)
+            while len(self._incidents) > self.max_incidents:
+                self._incidents.popitem(last=False)
+                self.stats["discarded"] += 1
+
+            for action in actions:
+                tools_list = action.get("tools") or []
+                for i in prefetchable_steps(tools_list):
+                    name = tools_list[i].get("name", "")
+                    params = tools_list[i].get("params") or {}
+                    try:
+                        key = tool_call_key(name, params)
+                    except (KeyError, TypeError):
+                        continue
+                    entry = entries.get(key)
+                    if entry is not None and (entry["status"] == "running" or self._fresh(entry)):
+                        self.stats["skipped"] += 1
+                        continue
+                    entry = entries[key] = {
+                        "tool": name,
+                        "params": params,
+                        "description": _describe(name, params),
+                        "status": "running",
+                        "started": time.time(),
+                    }
+                    self.stats["started"] += 1
+                    planned.append(entry["description"])
+                    self._pool.submit(self._run, key, entry)
+        return planned
+
+    def _run(self, key, entry: Dict[str, Any]):
+        try:
+            result = run_read_only_tool(entry["tool"], entry["params"], ttl_s=self.ttl_s)
+        except Exception as e:
+            with self._lock:
+                entry.update(status="failed", error=str(e), finished=time.time())
+                self.stats["failed"] += 1
+            return
+        with self._lock:
+            entry.update(status="success", result=result, finished=time.time())
+            self.stats["succeeded"] += 1
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        """성공했고 TTL이 지나지 않았으며 캐시에서 무효화되지 않은 결과인지"""
+        if entry["status"] != "success" or time.time() - entry["finished"] >= self.ttl_s:
+            return False
+        if not settings.TOOL_CACHE_ENABLED:
+            return True
+        return tool_result_cache.peek(tool_call_key(entry["tool"], entry["params"]))
+
+    def results(self, incident_id: str) -> List[Dict[str, Any]]:
+        """승인자에게 보여줄 사전 진단 결과 (status: running / success / failed / expired, age_s)"""
+        with self._lock:
+            entries = list((self._incidents.get(incident_id) or {}).values())
+            now = time.time()
+            snapshot = []
+            for entry in entries:
+                item = {k: v for k, v in entry.items() if k in ("tool", "params", "description", "status", "result", "error")}
+                if entry["status"] == "success" and not self._fresh(entry):
+                    item["status"] = "expired"
+                if "finished" in entry:
+                    item["age_s"] = round(now - entry["finished"], 1)
+                snapshot.append(item)
+        return snapshot
+
+    def fresh_keys(self, incident_id: str) -> Set[Any]:
+        """조치 실행 시 다시 조회하지 않아도 되는 (아직 유효한) 단계의 캐시 키"""
+        with self._lock:
+            return {
+                key for key, entry in (self._incidents.get(incident_id) or {}).items()
+                if self._fresh(entry)
+            }
+
+    def mark_reused(self, count: int):
+        with self._lock:
+            self.stats["reused"] += count
+
+    def discard(self, incident_id: str):
+        """장애 처리가 끝나면 결과 정리 (진행 중인 작업은 끝까지 실행되고 결과는 버림)"""
+        with self._lock:
+            if self._incidents.pop(incident_id, None) is not None:
+                self.stats["discarded"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["incidents"] = len(self._incidents)
+        return stats
+
+
+def format_prefetch_results(results: List[Dict[str, Any]]) -> str:
+    """UI 표시용 사전 진단 결과"""
+    if not results:
+        return ""
+    icons = {"running": "⏳", "success": "✅", "failed": "❌", "expired": "⌛"}
+    lines = ["🔬 사전 진단 (승인 대기 중 읽기 전용 단계 미리 실행):"]
+    for item in results:
+        age = f" ({item['age_s']:.0f}초 전)" if "age_s" in item else ""
+        line = f"   {icons.get(item['status'], '•')} {item['description']}{age}"
+        if item["status"] == "success":
+            line += f": {item['result']}"
+        elif item["status"] == "failed":
+            line += f": {item.get('error')}"
+        elif item["status"] == "expired":
+            line += ": 만료됨 (실행 시 다시 조회)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# 전역 사전 실행기 인스턴스
+speculative_prefetcher = SpeculativePrefetcher(
+    ttl_s=settings.PREFETCH_TTL_S,
+    max_workers=settings.PREFETCH_MAX_WORKERS,
+    max_incidents=settings.PREFETCH_MAX_INCIDENTS
+)
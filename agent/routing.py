@@ -0,0 +1,213 @@
+"""
+단계별 모델 라우팅 (triage -> escalation)
+
+분석 체인을 먼저 빠르고 저렴한 triage 모델(OPENAI_TRIAGE_MODEL)로 호출하고,
+응답의 신뢰도가 ROUTING_CONFIDENCE_THRESHOLD 미만이거나 응답 검증(신뢰도 누락, JSON / 도구 검증 실패)에
+실패한 경우에만 기본 모델(OPENAI_MODEL)로 다시 호출합니다.
+일상적인 장애는 triage 단계에서 끝나고, 애매한 장애만 무거운 모델 비용과 지연을 치릅니다.
+체인별 / 단계별 호출 수, 승격률, 소요 시간은 routing_stats와 Prometheus 메트릭으로 집계합니다.
+"""
+
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agent.instrumentation import LLM_ESCALATIONS, LLM_TIER_DURATION
+from agent.tools import validate_action_plan
+from config.settings import settings
+
+# "신뢰도: 8/10", "- 신뢰도 (1-10점): 7점", "**신뢰도 (1-10점)**: 8", "Confidence: 9" 등
+# 프롬프트 답변 형식의 범위 표기("1-10점")는 건너뛰고, 범위의 시작 숫자를 신뢰도로 읽지 않음
+_CONFIDENCE_PATTERN = re.compile(
+    r"(?:신뢰도|confidence)(?:[^0-9\n]|\d+\s*[-~]\s*\d+){0,20}?(10|[1-9])(?!\d|\s*[-~]\s*\d)(?:\s*(?:/\s*10|점))?",
+    re.IGNORECASE
+)
+
+# 응답 평가 결과: (신뢰도, 검증 실패 사유)
+Assessment = Tuple[Optional[int], Optional[str]]
+
+
+def parse_confidence(text: str) -> Optional[int]:
+    """근본 원인 분석 응답에서 1-10 신뢰도 추출 (여러 개면 마지막 값)"""
+    matches = _CONFIDENCE_PATTERN.findall(text or "")
+    return int(matches[-1]) if matches else None
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """응답 문자열에서 첫 '{'부터 마지막 '}'까지를 JSON으로 파싱 (코드 블록 / 설명 문장 무시)"""
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    return json.loads(text[start:end] if start >= 0 else text)
+
+
+def _assess_actions(actions: List[Dict[str, Any]]) -> Optional[str]:
+    valid, errors = validate_action_plan(actions)
+    if not valid:
+        return "유효한 조치 없음"
+    if errors:
+        return "도구 검증 실패"
+    return None
+
+
+def assess_root_cause(response: str) -> Assessment:
+    """자유 형식 근본 원인 응답: 신뢰도가 있어야 통과"""
+    if not (response or "").strip():
+        return None, "빈 응답"
+    confidence = parse_confidence(response)
+    return confidence, None if confidence is not None else "신뢰도 누락"
+
+
+def assess_action_plan(response: str) -> Assessment:
+    """JSON 조치 계획 응답: 파싱되고 모든 도구가 검증을 통과해야 통과 (신뢰도 없음)"""
+    try:
+        plan = extract_json_object(response)
+    except json.JSONDecodeError:
+        return None, "JSON 파싱 실패"
+    return None, _assess_actions(plan.get("actions", []))
+
+
+def assess_single_pass(response: str) -> Assessment:
+    """구조화 단일 호출 응답: confidence 필드와 조치 검증"""
+    try:
+        analysis = json.loads(response)
+    except json.JSONDecodeError:
+        return None, "JSON 파싱 실패"
+    return analysis.get("confidence"), _assess_actions(analysis.get("actions", []))
+
+
+# 체인 이름 -> 응답 평가 함수
+ASSESSORS: Dict[str, Callable[[str], Assessment]] = {
+    "root_cause": assess_root_cause,
+    "action_planning": assess_action_plan,
+    "single_pass": assess_single_pass,
+}
+
+
+class RoutingStats:
+    """체인 / 단계별 호출 수, 소요 시간, 승격 사유 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._routed: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, chain: str, attempts: List[Dict[str, Any]]):
+        with self._lock:
+            routed = self._routed.setdefault(chain, {"routed": 0, "escalated": 0, "reasons": {}})
+            routed["routed"] += 1
+            for attempt in attempts:
+                tier = self._tiers.setdefault((chain, attempt["tier"]), {"calls": 0, "total_ms": 0.0})
+                tier["calls"] += 1
+                tier["total_ms"] += attempt["elapsed_ms"]
+                if attempt.get("escalation_reason"):
+                    routed["escalated"] += 1
+                    reason = attempt["escalation_reason"]
+                    routed["reasons"][reason] = routed["reasons"].get(reason, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """체인별 승격률과 단계별 평균 소요 시간"""
+        with self._lock:
+            stats = {}
+            for chain, routed in self._routed.items():
+                stats[chain] = {
+                    "routed": routed["routed"],
+                    "escalated": routed["escalated"],
+                    "escalation_rate": round(routed["escalated"] / routed["routed"], 3) if routed["routed"] else 0.0,
+                    "reasons": dict(routed["reasons"]),
+                    "tiers": {
+                        tier: {"calls": t["calls"], "avg_ms": round(t["total_ms"] / t["calls"], 1)}
+                        for (name, tier), t in self._tiers.items() if name == chain and t["calls"]
+                    },
+                }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._tiers.clear()
+            self._routed.clear()
+
+
+def routing_enabled(name: str) -> bool:
+    """해당 체인에 triage 단계를 적용하는지 (triage 모델이 기본 모델과 같으면 적용하지 않음)"""
+    triage = settings.OPENAI_TRIAGE_MODEL
+    return bool(triage) and triage != settings.OPENAI_MODEL and name in settings.MODEL_ROUTING_CHAINS
+
+
+def escalation_reason(confidence: Optional[int], error: Optional[str]) -> Optional[str]:
+    """triage 응답을 기본 모델로 다시 분석해야 하는 사유 (없으면 None)"""
+    if error:
+        return error
+    if confidence is not None and confidence < settings.ROUTING_CONFIDENCE_THRESHOLD:
+        return "신뢰도 미달"
+    return None
+
+
+def route_chain(
+    name: str,
+    invoke: Callable[[str, Optional[str]], str],
+    skip_triage: bool = False,
+) -> Tuple[str, Dict[str, Any]]:
+    """triage 모델로 먼저 호출하고 필요할 때만 기본 모델로 승격
+
+    invoke(tier, model): 해당 단계 모델로 체인을 호출해 응답 반환 (model이 None이면 기본 모델)
+    반환: (최종 응답, 라우팅 기록 {"chain", "tier", "confidence", "escalated", "attempts"})
+    skip_triage=True(재분석 요청 등)면 바로 기본 모델을 사용합니다.
+    """
+    assess = ASSESSORS[name]
+    attempts: List[Dict[str, Any]] = []
+    tiers = [("primary", None)]
+    if not skip_triage and routing_enabled(name):
+        tiers.insert(0, ("triage", settings.OPENAI_TRIAGE_MODEL))
+
+    response, confidence = None, None
+    for index, (tier, model) in enumerate(tiers):
+        started = time.perf_counter()
+        try:
+            response = invoke(tier, model)
+            confidence, error = assess(response)
+        except Exception as e:
+            if index == len(tiers) - 1:
+                raise
+            print(f"⚠️ {name}: triage 호출 실패 ({e})")
+            confidence, error = None, "호출 실패"
+        elapsed_s = time.perf_counter() - started
+        LLM_TIER_DURATION.observe(elapsed_s, chain=name, tier=tier)
+        attempt = {"tier": tier, "model": model or settings.OPENAI_MODEL, "confidence": confidence, "elapsed_ms": round(elapsed_s * 1000, 1)}
+        attempts.append(attempt)
+
+        reason = escalation_reason(confidence, error) if index < len(tiers) - 1 else None
+        if reason is None:
+            break
+        attempt["escalation_reason"] = reason
+        LLM_ESCALATIONS.inc(chain=name, reason=reason)
+        print(f"⬆️ {name}: triage 응답 승격 ({reason}, 신뢰도 {confidence}) -> {settings.OPENAI_MODEL}")
+
+    routing_stats.record(name, attempts)
+    return response, {
+        "chain": name,
+        "tier": attempts[-1]["tier"],
+        "confidence": confidence,
+        "escalated": len(attempts) > 1,
+        "attempts": attempts,
+    }
+
+
+def format_routing(records: Optional[List[Dict[str, Any]]]) -> str:
+    """UI 표시용 노드별 라우팅 요약"""
+    if not records:
+        return ""
+    lines = ["🧭 모델 라우팅:"]
+    for record in records:
+        path = " -> ".join(f"{a['model']} {a['elapsed_ms']:.0f}ms" for a in record["attempts"])
+        reason = next((a["escalation_reason"] for a in record["attempts"] if a.get("escalation_reason")), None)
+        confidence = record["attempts"][0]["confidence"]
+        detail = f", triage 신뢰도 {confidence}" if confidence is not None else ""
+        suffix = f" (승격: {reason}{detail})" if reason else ""
+        lines.append(f"   - {record['node']}: {path}{suffix}")
+    return "\n".join(lines)
+
+
+# 전역 라우팅 통계
+routing_stats = RoutingStats()
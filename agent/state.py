@@ -5,15 +5,30 @@ class AgentState(TypedDict):
     
     # 입력 정보
     slack_alert: Dict[str, Any]      # Slack 알림 정보
+    incident_id: str                 # 병합된 장애 ID
+    coalesced_alerts: List[Dict[str, Any]]  # 같은 장애로 병합된 알림 목록
 
     # 모니터링 데이터
     context: Dict[str, Any]          # 시스템 컨텍스트
     metrics: Dict[str, Any]          # 메트릭 정보
+    metric_series: Dict[str, Any]    # 메트릭 시계열 {"timestamps": [...], "series": {"서비스/메트릭": [...]}}
+    metric_anomalies: Dict[str, Any] # 시계열 이상 탐지 요약 (무엇이, 언제, 얼마나 변했는지)
     logs: List[Dict[str, Any]]       # 로그 데이터
+    log_templates: Dict[str, Any]    # 로그 템플릿 요약 (템플릿별 건수, 발생 시각, 예시 파라미터)
     traces: List[Dict[str, Any]]     # 트레이스 데이터
+    trace_summary: Dict[str, Any]    # 트레이스 크리티컬 패스 요약 (서비스별 self-time, 상위 기여 호출)
+    collection_report: Dict[str, Any]  # 소스별 수집 결과 (타임아웃/실패/부분 결과)
     
     # 분석 결과
+    force_reanalysis: bool           # True면 LLM 응답 캐시를 무시하고 재분석
     root_cause: str                  # 근본 원인 분석 결과
+    incident_signature: List[str]    # 유사 장애 비교용 증거 특징 (로그 템플릿, 메트릭 변화 방향, 크리티컬 패스 엣지)
+    similar_incidents: List[Dict[str, Any]]  # 과거 유사 장애 (유사도, 확인된 근본 원인, 해결한 조치)
+    reused_incident: str             # 분석 결과를 재사용한 과거 장애 ID (없으면 빈 문자열)
+    analysis_confidence: int         # 근본 원인 신뢰도 (1-10)
+    token_usage: Dict[str, Any]      # LLM 토큰 / 비용 사용량 (합계, 노드별, 호출별, 예산)
+    model_routing: List[Dict[str, Any]]  # 노드별 모델 라우팅 기록 (triage / primary 단계, 신뢰도, 승격 사유, 소요 시간)
+    affected_services: List[str]     # 영향받는 서비스 목록
     recommended_actions: List[Dict[str, Any]]  # 추천 액션 리스트
     
     # 사용자 인터랙션
@@ -23,4 +38,6 @@ class AgentState(TypedDict):
     
     # 실행 결과
     execution_results: List[Dict[str, Any]]  # 도구 실행 결과
+    execution_report: Dict[str, Any]  # 조치 실행 요약 (소요 시간, 실패/시간 초과/취소 단계)
+    validation_report: Dict[str, Any]  # 복구 검증 결과 (메트릭별 기준선 수렴 여부)
     final_status: str                # 최종 처리 상태
@@ -0,0 +1,176 @@
+"""
+진단 도구 결과 공유 캐시 (read-through + single-flight)
+
+여러 장애가 동시에 같은 클러스터를 조회할 때 같은 인자의 읽기 전용 도구 호출은
+짧은 TTL 동안 결과를 공유하고, 이미 진행 중인 동일 호출에는 합류해 백엔드 요청을 한 번으로 줄입니다.
+상태를 변경하는 도구가 실행되면 영향을 받는 조회 결과를 무효화합니다.
+"""
+
+import copy
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config.settings import settings
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def normalize_call(tool_name: str, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> CacheKey:
+    """시그니처 기본값을 채운 (도구 이름, 정렬된 파라미터) 키
+
+    check_ecs_health("api") 와 check_ecs_health(service="api", cluster="prod")는 같은 키가 됩니다.
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tool_name, tuple(sorted((k, repr(v)) for k, v in bound.arguments.items()))
+
+
+class _InFlight:
+    """진행 중인 호출 (같은 키의 다른 호출자가 결과를 기다림)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolResultCache:
+    """TTL + LRU 항목 수 제한을 가진 메모리 캐시"""
+
+    def __init__(self, ttl_s: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, _InFlight] = {}
+        self._epoch = 0  # 무효화마다 증가 (무효화 전에 시작된 조회 결과는 저장하지 않음)
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0, "expired": 0, "evicted": 0, "errors": 0}
+
+    def call(self, key: CacheKey, fetch: Callable[[], Any], ttl_s: float = None) -> Any:
+        """캐시 조회 후 없으면 fetch 실행 (동일 키 동시 호출은 한 번만 실행)
+
+        ttl_s를 주면 이번에 저장하는 결과에 기본 TTL 대신 적용합니다 (승인 대기 중 사전 실행 결과 등).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.clock() < entry[0]:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return copy.deepcopy(entry[1])
+                del self._entries[key]
+                self.stats["expired"] += 1
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+                epoch = self._epoch
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if flight.error is None and epoch == self._epoch:
+                    self._entries[key] = (self.clock() + (self.ttl_s if ttl_s is None else ttl_s), flight.result)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats["evicted"] += 1
+            flight.done.set()
+
+        return copy.deepcopy(flight.result)
+
+    def peek(self, key: CacheKey) -> bool:
+        """만료되지 않은 결과가 있는지 (히트로 집계하지 않음)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self.clock() < entry[0]
+
+    def invalidate(self, tool_names: Iterable[str], params: Dict[str, Any]):
+        """지정 도구의 캐시 중 params와 겹치는 파라미터 값이 모두 같은 항목 삭제
+
+        예: restart_ecs_task(service="api", cluster="prod")는 check_ecs_health(service="api", cluster="prod")만,
+        restart_all_services(cluster="prod")는 prod 클러스터의 모든 check_ecs_health 결과를 무효화합니다.
+        """
+        tool_names = set(tool_names)
+        scope = {k: repr(v) for k, v in params.items()}
+        with self._lock:
+            self._epoch += 1
+            stale = [
+                key for key in self._entries
+                if key[0] in tool_names and all(scope.get(k, v) == v for k, v in key[1])
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.stats["invalidated"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """히트/미스/합류(single-flight) 카운터와 현재 항목 수"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["in_flight"] = len(self._in_flight)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def wrap(self, tool_name: str, func: Callable, read_only: bool, invalidates: Iterable[str] = ()) -> Callable:
+        """도구 함수를 캐시 계층으로 감쌈
+
+        읽기 전용 도구는 read-through 캐시를, 상태 변경 도구는 실행 전후로 관련 조회 결과 무효화를 적용합니다.
+        """
+        invalidates = tuple(invalidates)
+
+        @functools.wraps(func)
+        def cached_tool(*args, **kwargs):
+            if not settings.TOOL_CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            if read_only:
+                key = normalize_call(tool_name, func, args, kwargs)
+                return self.call(key, lambda: func(*args, **kwargs))
+
+            if not invalidates:
+                return func(*args, **kwargs)
+            bound = inspect.signature(func).bind(*args, **kwargs)
+            bound.apply_defaults()
+            # 실행 중 조회된 결과도 변경 전 상태일 수 있으므로 실행 전후 모두 무효화
+            self.invalidate(invalidates, bound.arguments)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.invalidate(invalidates, bound.arguments)
+
+        return cached_tool
+
+
+# 전역 캐시 인스턴스
+tool_result_cache = ToolResultCache(
+    ttl_s=settings.TOOL_CACHE_TTL_S,
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES
+)
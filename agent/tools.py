@@ -1,10 +1,20 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+import inspect
 import time
 
+from agent.aws import get_aws_backend
+from agent.instrumentation import instrument_tool
+from agent.tool_cache import normalize_call, tool_result_cache
+from config.settings import settings
+
 # AWS ECS 관련 도구들
 def check_ecs_health(service: str, cluster: str = "prod") -> Dict[str, Any]:
     """ECS 서비스 상태를 확인합니다"""
     print(f"🔍 ECS 서비스 상태 확인: {service} (클러스터: {cluster})")
+    backend = get_aws_backend()
+    if backend is not None:
+        return backend.describe_ecs_service(service, cluster)
+    
     time.sleep(1)  # 실제 API 호출 시뮬레이션
     
     # Mock 데이터
@@ -20,6 +30,10 @@ def check_ecs_health(service: str, cluster: str = "prod") -> Dict[str, Any]:
 def restart_ecs_task(service: str, cluster: str = "prod", force: bool = False) -> Dict[str, Any]:
     """ECS 태스크를 재시작합니다"""
     print(f"🔄 ECS 태스크 재시작: {service} (강제: {force})")
+    backend = get_aws_backend()
+    if backend is not None:
+        return backend.restart_ecs_service(service, cluster, force)
+    
     time.sleep(1)  # 실제 재시작 시뮬레이션
     
     return {
@@ -29,22 +43,53 @@ def restart_ecs_task(service: str, cluster: str = "prod", force: bool = False) -
         "status": "success"
     }
 
-def verify_restart(service: str, timeout: int = 180) -> Dict[str, Any]:
-    """재시작 후 서비스 상태를 검증합니다"""
+def verify_restart(service: str, timeout: int = 180, cluster: str = "prod") -> Dict[str, Any]:
+    """재시작 후 서비스 상태를 검증합니다 (정상화되거나 timeout초가 지날 때까지 backoff 간격으로 재확인)"""
     print(f"✅ 재시작 검증: {service} (타임아웃: {timeout}초)")
-    time.sleep(1)
+    backend = get_aws_backend()
+    started = time.monotonic()
+    deadline = started + timeout
+    interval = 1.0
+    polls = 0
     
-    return {
-        "service": service,
-        "verification_status": "healthy",
-        "response_time_ms": 150,
-        "error_rate": 0.01
-    }
+    while True:
+        polls += 1
+        if backend is not None:
+            health = backend.describe_ecs_service(service, cluster)
+            healthy = health["healthy_tasks"] >= health["desired_count"]
+        else:
+            time.sleep(min(1, timeout))  # Mock: 1초 후 정상화
+            healthy = True
+        
+        if healthy:
+            return {
+                "service": service,
+                "verification_status": "healthy",
+                "response_time_ms": 150,
+                "error_rate": 0.01,
+                "polls": polls,
+                "elapsed_s": round(time.monotonic() - started, 1)
+            }
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"{service} 재시작 검증 시간 초과 ({timeout}초, 확인 {polls}회)")
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, 15)
 
 # Database 관련 도구들
 def check_db_connections(database: str = "main") -> Dict[str, Any]:
     """데이터베이스 커넥션 상태를 확인합니다"""
     print(f"🔍 DB 커넥션 확인: {database}")
+    backend = get_aws_backend()
+    if backend is not None:
+        info = backend.describe_db(database)
+        return {
+            "database": database,
+            "active_connections": info["active_connections"],
+            "instance_status": info["status"]
+        }
+    
     time.sleep(1)
     
     return {
@@ -69,6 +114,15 @@ def restart_db_pool(database: str = "main") -> Dict[str, Any]:
 def validate_db_health(database: str = "main") -> Dict[str, Any]:
     """데이터베이스 상태를 검증합니다"""
     print(f"✅ DB 상태 검증: {database}")
+    backend = get_aws_backend()
+    if backend is not None:
+        info = backend.describe_db(database)
+        return {
+            "database": database,
+            "status": "healthy" if info["status"] == "available" else info["status"],
+            "active_connections": info["active_connections"]
+        }
+    
     time.sleep(1)
     
     return {
@@ -127,12 +181,59 @@ TOOL_REGISTRY = {
     "gradual_traffic_restore": gradual_traffic_restore
 }
 
+# 시스템 상태를 바꾸지 않는 조회/검증 도구 (병렬 실행 가능)
+READ_ONLY_TOOLS = {
+    "check_ecs_health",
+    "verify_restart",
+    "check_db_connections",
+    "validate_db_health",
+}
+
+# 상태 변경 도구 -> 실행 후 결과가 달라지는 조회 도구 (겹치는 파라미터 값이 같은 캐시만 무효화)
+MUTATING_TOOL_INVALIDATES = {
+    "restart_ecs_task": ["check_ecs_health", "verify_restart"],
+    "restart_all_services": ["check_ecs_health", "verify_restart"],
+    "reduce_traffic": ["check_ecs_health", "verify_restart"],
+    "gradual_traffic_restore": ["check_ecs_health", "verify_restart"],
+    "restart_db_pool": ["check_db_connections", "validate_db_health"],
+}
+
+def is_read_only_tool(tool_name: str) -> bool:
+    """읽기 전용 도구인지 확인합니다"""
+    return tool_name in READ_ONLY_TOOLS
+
+_cached_tools: Dict[str, Any] = {}
+
 def get_tool_by_name(tool_name: str):
-    """도구 이름으로 도구 함수를 가져옵니다"""
-    if tool_name in TOOL_REGISTRY:
-        return TOOL_REGISTRY[tool_name]
-    else:
+    """도구 이름으로 도구 함수를 가져옵니다 (공유 결과 캐시 계층 + 실행 시간 계측 적용)"""
+    if tool_name not in TOOL_REGISTRY:
         raise ValueError(f"도구를 찾을 수 없습니다: {tool_name}")
+    
+    func = TOOL_REGISTRY[tool_name]
+    wrapped = _cached_tools.get(tool_name)
+    if wrapped is None or inspect.unwrap(wrapped) is not func:
+        # 캐시 히트는 실제 도구 실행이 아니므로 계측은 캐시 안쪽에 둠
+        wrapped = _cached_tools[tool_name] = tool_result_cache.wrap(
+            tool_name,
+            instrument_tool(tool_name, func),
+            read_only=is_read_only_tool(tool_name),
+            invalidates=MUTATING_TOOL_INVALIDATES.get(tool_name, ())
+        )
+    return wrapped
+
+def tool_call_key(tool_name: str, params: Dict[str, Any]):
+    """공유 결과 캐시 키 (시그니처 기본값을 채운 정규화 키)"""
+    return normalize_call(tool_name, TOOL_REGISTRY[tool_name], (), params)
+
+def run_read_only_tool(tool_name: str, params: Dict[str, Any], ttl_s: float = None) -> Any:
+    """읽기 전용 도구를 공유 결과 캐시를 거쳐 실행하고 결과를 ttl_s 동안 보관합니다 (상태 변경 도구는 거부)"""
+    if not is_read_only_tool(tool_name):
+        raise ValueError(f"읽기 전용 도구가 아닙니다: {tool_name}")
+    tool = get_tool_by_name(tool_name)
+    if not settings.TOOL_CACHE_ENABLED:
+        return tool(**params)
+    # 캐시 계층 안쪽(계측된 도구)을 직접 호출해 보관 기간만 바꿈
+    return tool_result_cache.call(tool_call_key(tool_name, params), lambda: tool.__wrapped__(**params), ttl_s=ttl_s)
 
 def get_available_tools_description() -> str:
     """사용 가능한 도구들의 설명을 반환합니다"""
@@ -148,3 +249,67 @@ def get_available_tools_description() -> str:
         "gradual_traffic_restore: 트래픽 단계적 복원"
     ]
     return "\n".join(descriptions)
+
+
+def get_tool_signatures_description() -> str:
+    """도구 이름, 파라미터 시그니처, 설명을 한 줄씩 반환합니다 (구조화 출력 프롬프트용)"""
+    lines = []
+    for name, func in TOOL_REGISTRY.items():
+        doc = (func.__doc__ or "").strip().splitlines()[0] if func.__doc__ else ""
+        lines.append(f"- {name}{inspect.signature(func)}: {doc}")
+    return "\n".join(lines)
+
+def validate_tool_call(tool_spec: Dict[str, Any]) -> str:
+    """도구 호출 스펙을 TOOL_REGISTRY 시그니처로 검증합니다 (문제가 없으면 빈 문자열)"""
+    name = tool_spec.get("name", "")
+    if name not in TOOL_REGISTRY:
+        return f"알 수 없는 도구: {name}"
+    
+    params = tool_spec.get("params") or {}
+    try:
+        inspect.signature(TOOL_REGISTRY[name]).bind(**params)
+    except TypeError as e:
+        return f"{name} 파라미터 오류: {e}"
+    return ""
+
+def validate_action_plan(actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """조치 계획의 도구 호출을 TOOL_REGISTRY 기준으로 검증합니다
+
+    일부 단계만 빠진 계획은 의도와 다르게 동작할 수 있으므로, 잘못된 도구가 하나라도 있거나
+    도구가 없는 조치는 통째로 제외합니다. 반환값: (검증된 조치 목록, 오류 목록)
+    """
+    valid_actions = []
+    errors = []
+    
+    for action in actions:
+        tools = action.get("tools") or []
+        action_errors = [validate_tool_call(tool_spec) for tool_spec in tools]
+        action_errors = [e for e in action_errors if e]
+        
+        # depends_on은 자신보다 앞선 단계 번호(1부터)만 참조 가능
+        for step, tool_spec in enumerate(tools, 1):
+            for dep in tool_spec.get("depends_on") or []:
+                if not isinstance(dep, int) or not 0 < dep < step:
+                    action_errors.append(f"{tool_spec.get('name', '')} depends_on 오류: {dep}")
+        
+        if not tools:
+            action_errors.append("실행할 도구가 없습니다")
+        
+        if action_errors:
+            errors.extend(f"[{action.get('title', 'Unknown')}] {e}" for e in action_errors)
+            continue
+        
+        valid_actions.append({
+            **action,
+            "tools": [
+                {"name": t["name"], "params": t.get("params") or {},
+                 **({"depends_on": list(t["depends_on"])} if t.get("depends_on") else {})}
+                for t in tools
+            ]
+        })
+    
+    # 선택 번호와 일치하도록 id 재부여
+    for i, action in enumerate(valid_actions, 1):
+        action["id"] = i
+    
+    return valid_actions, errors
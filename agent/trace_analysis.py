@@ -0,0 +1,252 @@
+"""
+트레이스 크리티컬 패스 분석
+
+trace_id별로 span 트리를 만들고 크리티컬 패스와 서비스별 self-time을 계산한 뒤,
+여러 트레이스에 걸친 에러/지연 기여도를 (호출 서비스 -> 피호출 서비스) 엣지 단위로 집계합니다.
+트레이스는 순서대로 한 번만 훑고, 동시에 버퍼링하는 트레이스 수를 제한해 메모리를 일정하게 유지합니다.
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+
+
+class SpanNode:
+    """트리에 연결된 span (시작/종료 시각을 한 번만 계산해 보관)"""
+
+    __slots__ = ("span_id", "parent", "service", "start", "end", "error", "children")
+
+    def __init__(self, span: Dict[str, Any], span_id: str, start: float):
+        self.span_id = span_id
+        self.parent: Optional["SpanNode"] = None
+        self.service = span.get("service", "unknown")
+        self.start = start
+        self.end = start + float(span.get("duration_ms", 0) or 0)
+        self.error = span.get("status") == "error" or bool(span.get("error"))
+        self.children: List["SpanNode"] = []
+
+
+def build_span_tree(spans: List[Dict[str, Any]]) -> Tuple[List[SpanNode], List[SpanNode]]:
+    """한 트레이스의 span을 트리로 연결 -> (루트 목록, 전체 노드 목록)
+
+    span_id가 없는 단순 트레이스는 긴 span이 짧은 span을 호출한 것으로 보고 순서대로 연결하고,
+    시작 시각이 없으면 부모와 동시에 시작한 것으로 간주합니다. 입력 span은 수정하지 않습니다.
+    """
+    if not any("span_id" in s for s in spans):
+        ordered = sorted(spans, key=lambda s: -float(s.get("duration_ms", 0) or 0))
+        ids = [f"s{i}" for i in range(len(ordered))]
+        parent_ids = [None] + ids[:-1]
+    else:
+        ordered = spans
+        ids = [s.get("span_id") for s in spans]
+        parent_ids = [s.get("parent_id") for s in spans]
+
+    nodes = [SpanNode(span, span_id, float(span.get("start_ms", 0) or 0)) for span, span_id in zip(ordered, ids)]
+    by_id = {node.span_id: node for node in nodes}
+    roots = []
+    for node, parent_id in zip(nodes, parent_ids):
+        parent = by_id.get(parent_id) if parent_id else None
+        if parent is not None and parent is not node:
+            node.parent = parent
+            parent.children.append(node)
+        else:
+            roots.append(node)
+
+    if not any("start_ms" in s for s in spans):
+        stack = [(root, 0.0) for root in roots]
+        while stack:
+            node, start = stack.pop()
+            node.end += start - node.start
+            node.start = start
+            stack.extend((child, start) for child in node.children)
+
+    return roots, nodes
+
+
+def self_time(node: SpanNode) -> float:
+    """자식 호출 구간(합집합)을 뺀 span 자체 소요 시간"""
+    covered = 0.0
+    cursor = node.start
+    for kid in sorted(node.children, key=lambda k: k.start):
+        k_start = kid.start if kid.start > cursor else cursor
+        k_end = kid.end if kid.end < node.end else node.end
+        if k_end > k_start:
+            covered += k_end - k_start
+            cursor = k_end
+    return max(0.0, (node.end - node.start) - covered)
+
+
+def critical_path(roots: List[SpanNode]) -> List[Tuple[SpanNode, float, float]]:
+    """가장 늦게 끝나는 루트에서 시작하는 크리티컬 패스
+
+    반환값: [(span, 크리티컬 패스상 self 시간, 크리티컬 구간 길이)]
+    각 span에서 가장 늦게 끝나는 자식부터 거꾸로 따라가며, 자식이 덮지 않는 구간을 span 자신에게 귀속합니다.
+    """
+    if not roots:
+        return []
+    root = max(roots, key=lambda r: r.end)
+    path = []
+    stack = [(root, root.end)]
+
+    while stack:
+        node, window_end = stack.pop()
+        cursor = node.end if node.end < window_end else window_end
+        window = max(0.0, cursor - node.start)
+        own = 0.0
+
+        for kid in sorted(node.children, key=lambda k: k.end, reverse=True):
+            if kid.start >= cursor:
+                continue
+            k_end = kid.end if kid.end < cursor else cursor
+            own += cursor - k_end
+            stack.append((kid, k_end))
+            cursor = kid.start
+        own += max(0.0, cursor - node.start)
+        path.append((node, own, window))
+
+    return path
+
+
+class TraceAggregator:
+    """여러 트레이스의 서비스/엣지별 지연 및 에러 기여도 누적기 (집계 크기는 서비스 수에 비례)"""
+
+    def __init__(self):
+        self.trace_count = 0
+        self.error_traces = 0
+        self.span_count = 0
+        self.total_critical_ms = 0.0
+        self.services: Dict[str, Dict[str, float]] = {}  # 서비스 -> 집계
+        self.edges: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def add_trace(self, spans: List[Dict[str, Any]]):
+        """트레이스 하나를 분석해 누적"""
+        if not spans:
+            return
+        roots, nodes = build_span_tree(spans)
+        self.trace_count += 1
+        self.span_count += len(nodes)
+        if any(node.error for node in nodes):
+            self.error_traces += 1
+
+        services, edges = self.services, self.edges
+        for node in nodes:
+            stats = services.get(node.service)
+            if stats is None:
+                stats = services[node.service] = {
+                    "spans": 0, "errors": 0, "self_ms": 0.0, "critical_self_ms": 0.0, "max_duration_ms": 0.0
+                }
+            duration = node.end - node.start
+            stats["spans"] += 1
+            stats["errors"] += node.error
+            stats["self_ms"] += self_time(node) if node.children else duration
+            if duration > stats["max_duration_ms"]:
+                stats["max_duration_ms"] = duration
+
+            if node.parent is not None:
+                key = (node.parent.service, node.service)
+                edge = edges.get(key)
+                if edge is None:
+                    edge = edges[key] = {"calls": 0, "errors": 0, "total_ms": 0.0, "critical_ms": 0.0}
+                edge["calls"] += 1
+                edge["errors"] += node.error
+                edge["total_ms"] += duration
+
+        for node, own, window in critical_path(roots):
+            services[node.service]["critical_self_ms"] += own
+            self.total_critical_ms += own
+            if node.parent is not None:
+                edges[(node.parent.service, node.service)]["critical_ms"] += window
+
+    def summary(self, top_n: int = None) -> Dict[str, Any]:
+        """상위 기여 엣지와 서비스별 self-time 요약"""
+        top_n = settings.TRACE_TOP_EDGES if top_n is None else top_n
+        total = self.total_critical_ms or 1.0
+
+        # 전체 정렬 없이 크리티컬 패스 기여가 큰 상위 엣지만 선택
+        offending = heapq.nlargest(
+            top_n, self.edges.items(), key=lambda kv: (kv[1]["critical_ms"], kv[1]["errors"])
+        )
+        edges = []
+        for (caller, callee), e in offending:
+            edges.append({
+                "caller": caller,
+                "callee": callee,
+                "calls": e["calls"],
+                "error_rate": round(e["errors"] / e["calls"], 3) if e["calls"] else 0.0,
+                "avg_ms": round(e["total_ms"] / e["calls"], 1) if e["calls"] else 0.0,
+                "critical_ms": round(e["critical_ms"], 1),
+                "critical_share": round(e["critical_ms"] / total, 3),
+            })
+
+        services = {
+            name: {
+                "spans": int(s["spans"]),
+                "error_rate": round(s["errors"] / s["spans"], 3) if s["spans"] else 0.0,
+                "self_ms": round(s["self_ms"], 1),
+                "critical_self_ms": round(s["critical_self_ms"], 1),
+                "critical_share": round(s["critical_self_ms"] / total, 3),
+                "max_duration_ms": round(s["max_duration_ms"], 1),
+            }
+            for name, s in sorted(self.services.items(), key=lambda kv: -kv[1]["critical_self_ms"])
+        }
+
+        return {
+            "trace_count": self.trace_count,
+            "span_count": self.span_count,
+            "error_trace_rate": round(self.error_traces / self.trace_count, 3) if self.trace_count else 0.0,
+            "services": services,
+            "edge_count": len(self.edges),
+            "top_edges": edges,
+        }
+
+
+def analyze_traces(spans: Iterable[Dict[str, Any]], max_open_traces: int = None, top_n: int = None) -> Dict[str, Any]:
+    """span 스트림을 trace_id별로 묶어 분석
+
+    X-Ray 결과처럼 trace_id별로 모여 들어오면 트레이스가 바뀔 때마다 바로 분석하고 버리며,
+    섞여 들어오더라도 동시에 열어두는 트레이스는 max_open_traces개로 제한합니다.
+    """
+    max_open_traces = settings.TRACE_MAX_OPEN_TRACES if max_open_traces is None else max_open_traces
+    aggregator = TraceAggregator()
+    open_traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+    for span in spans:
+        trace_id = span.get("trace_id", "unknown")
+        bucket = open_traces.get(trace_id)
+        if bucket is None:
+            # 가장 오래된 트레이스부터 분석 후 해제
+            while len(open_traces) >= max_open_traces:
+                _, oldest = open_traces.popitem(last=False)
+                aggregator.add_trace(oldest)
+            bucket = open_traces[trace_id] = []
+        bucket.append(span)
+
+    for bucket in open_traces.values():
+        aggregator.add_trace(bucket)
+
+    return aggregator.summary(top_n)
+
+
+def format_trace_summary(summary: Dict[str, Any]) -> str:
+    """프롬프트용 트레이스 요약 텍스트 (상위 기여 엣지만)"""
+    if not summary or not summary.get("trace_count"):
+        return "트레이스 정보 없음"
+
+    lines = [
+        f"트레이스 {summary['trace_count']}개 / span {summary['span_count']}개, "
+        f"에러 트레이스 비율 {summary['error_trace_rate']:.1%}"
+    ]
+    lines.append("크리티컬 패스 기여 상위 호출 (호출 -> 피호출):")
+    for e in summary["top_edges"]:
+        lines.append(
+            f"- {e['caller']} -> {e['callee']}: 크리티컬 {e['critical_share']:.0%} ({e['critical_ms']}ms), "
+            f"평균 {e['avg_ms']}ms, 에러율 {e['error_rate']:.0%}, 호출 {e['calls']}회"
+        )
+    top_services = list(summary["services"].items())[:3]
+    if top_services:
+        lines.append("크리티컬 패스 self-time 상위 서비스: " + ", ".join(
+            f"{name} {s['critical_share']:.0%}" for name, s in top_services
+        ))
+    return "\n".join(lines)
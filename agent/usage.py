@@ -0,0 +1,228 @@
+"""
+LLM 토큰 사용량 / 비용 집계와 장애별 예산
+
+체인 호출마다 실제 토큰 사용량(usage_metadata)을 수집해 노드별 / 장애별로 state["token_usage"]에 누적하고,
+호출 전에 입력 토큰을 추정해 장애별 예산을 넘을 것 같으면 증거(로그/메트릭/트레이스)를 줄이거나
+더 저렴한 모델로 낮춥니다. 무거운 장애 하나가 지연 시간과 비용을 무한정 늘리지 않도록 합니다.
+"""
+
+import copy
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.instrumentation import LLM_COST, LLM_TOKENS
+from config.settings import settings
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (오프라인 휴리스틱: 영문/기호 약 4자, 한글 등 비ASCII 약 1.5자당 1토큰)
+
+    예산 판단에만 사용하고, 집계에는 API가 돌려준 실제 사용량을 씁니다.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return math.ceil((len(text) - non_ascii) / 4 + non_ascii / 1.5)
+
+
+def prompt_tokens(prompt) -> int:
+    """프롬프트 템플릿 자체(변수 제외)의 토큰 수 추정"""
+    texts = [getattr(getattr(m, "prompt", None), "template", "") for m in getattr(prompt, "messages", [])]
+    return estimate_tokens("".join(texts))
+
+
+def model_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """모델 단가(100만 토큰당 USD)로 비용 계산 (단가가 없는 모델은 0)"""
+    input_price = settings.LLM_INPUT_PRICE_PER_1M.get(model, 0.0)
+    output_price = settings.LLM_OUTPUT_PRICE_PER_1M.get(model, 0.0)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class UsageCallback(BaseCallbackHandler):
+    """체인 실행 중 LLM 응답의 토큰 사용량 수집"""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.reported = False
+
+    def on_llm_end(self, response, **kwargs):
+        found = False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+                    found = True
+        if not found:
+            # usage_metadata가 없는 클라이언트는 llm_output의 token_usage 사용
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            if usage:
+                self.input_tokens += usage.get("prompt_tokens", 0)
+                self.output_tokens += usage.get("completion_tokens", 0)
+                found = True
+        self.reported = self.reported or found
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """앞부분(요약이 중요도 순으로 정렬되어 있음)을 줄 단위로 남기고 나머지 생략"""
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    kept: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                # 한 줄짜리 원본(str(dict) 등)은 글자 수 비율로 자름
+                kept.append(line[:max(0, int(len(line) * max_tokens / max(cost, 1)))])
+            break
+        kept.append(line)
+        used += cost
+    kept.append(f"... (토큰 예산으로 생략: 원본 약 {total} 토큰 중 {used} 토큰만 포함)")
+    return "\n".join(kept)
+
+
+def trim_evidence(inputs: Dict[str, Any], evidence_keys: Iterable[str], allowance: int) -> Tuple[Dict[str, Any], Dict[str, List[int]]]:
+    """증거 필드의 토큰 합이 allowance를 넘으면 크기 비율대로 나눠 자름
+
+    반환값: (잘린 입력, {필드: [원래 토큰, 잘린 뒤 토큰]})
+    """
+    sizes = {key: estimate_tokens(str(inputs[key])) for key in evidence_keys if key in inputs}
+    total = sum(sizes.values())
+    if total <= allowance:
+        return inputs, {}
+
+    trimmed = dict(inputs)
+    report = {}
+    for key, size in sizes.items():
+        share = max(0, int(allowance * size / total))
+        if size > share:
+            trimmed[key] = _truncate(str(inputs[key]), share)
+            report[key] = [size, estimate_tokens(trimmed[key])]
+    return trimmed, report
+
+
+def new_ledger() -> Dict[str, Any]:
+    return {
+        "total": {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0},
+        "by_node": {},
+        "calls": [],
+        "budget": {
+            "tokens": settings.LLM_INCIDENT_TOKEN_BUDGET,
+            "cost_usd": settings.LLM_INCIDENT_COST_BUDGET_USD,
+        },
+    }
+
+
+def plan_call(
+    ledger: Optional[Dict[str, Any]],
+    prompt,
+    inputs: Dict[str, Any],
+    evidence_keys: Iterable[str] = (),
+    model: str = None,
+) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    """장애별 예산 안에서 호출할 (입력, 모델, 판단 내역) 결정
+
+    1. 호출당 입력 상한(LLM_MAX_INPUT_TOKENS)과 남은 토큰 예산 - 출력 예약분 중 작은 값에 맞춰 증거를 자름
+    2. 예상 비용이 남은 비용 예산을 넘으면 OPENAI_BUDGET_FALLBACK_MODEL로 낮춤
+    예산 값이 0이면 해당 제한을 적용하지 않습니다.
+    """
+    ledger = ledger or new_ledger()
+    model = model or settings.OPENAI_MODEL
+    total = ledger["total"]
+    reserve = settings.LLM_OUTPUT_TOKEN_RESERVE
+    evidence_keys = [key for key in evidence_keys if key in inputs]
+
+    max_input = settings.LLM_MAX_INPUT_TOKENS or float("inf")
+    if settings.LLM_INCIDENT_TOKEN_BUDGET:
+        remaining_tokens = settings.LLM_INCIDENT_TOKEN_BUDGET - total["input_tokens"] - total["output_tokens"]
+        max_input = min(max_input, remaining_tokens - reserve)
+
+    fixed = prompt_tokens(prompt) + sum(estimate_tokens(str(v)) for k, v in inputs.items() if k not in evidence_keys)
+    trimmed_report: Dict[str, List[int]] = {}
+    if max_input != float("inf"):
+        inputs, trimmed_report = trim_evidence(inputs, evidence_keys, max(0, int(max_input - fixed)))
+    estimated_input = fixed + sum(estimate_tokens(str(inputs[k])) for k in evidence_keys)
+
+    downgraded = False
+    if settings.LLM_INCIDENT_COST_BUDGET_USD:
+        remaining_cost = settings.LLM_INCIDENT_COST_BUDGET_USD - total["cost_usd"]
+        fallback = settings.OPENAI_BUDGET_FALLBACK_MODEL
+        if model_cost(model, estimated_input, reserve) > remaining_cost and fallback and fallback != model:
+            model, downgraded = fallback, True
+
+    decision = {
+        "estimated_input_tokens": estimated_input,
+        "trimmed": trimmed_report,
+        "downgraded": downgraded,
+        "over_budget": estimated_input > max_input,
+    }
+    if trimmed_report:
+        print(f"✂️ 토큰 예산으로 증거 축소: {', '.join(f'{k} {a}->{b}' for k, (a, b) in trimmed_report.items())}")
+    if downgraded:
+        print(f"⬇️ 비용 예산으로 모델 변경: {model}")
+    return inputs, model, decision
+
+
+def record_usage(
+    ledger: Optional[Dict[str, Any]],
+    node: str,
+    chain: str,
+    usage: Dict[str, Any],
+    decision: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """호출 1회의 사용량을 장애 원장(ledger)에 누적한 새 원장 반환
+
+    usage: run_chain이 채운 {"model", "cached", "input_tokens", "output_tokens", "estimated"}
+    """
+    ledger = copy.deepcopy(ledger) if ledger else new_ledger()
+    input_tokens = int(usage.get("input_tokens", 0))
+    output_tokens = int(usage.get("output_tokens", 0))
+    cost = 0.0 if usage.get("cached") else model_cost(usage.get("model", ""), input_tokens, output_tokens)
+
+    entry = {
+        "node": node,
+        "chain": chain,
+        "model": usage.get("model"),
+        "cached": bool(usage.get("cached")),
+        "estimated": bool(usage.get("estimated")),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(cost, 6),
+    }
+    if decision:
+        entry.update({k: v for k, v in decision.items() if v})
+    ledger["calls"].append(entry)
+
+    for bucket in (ledger["total"], ledger["by_node"].setdefault(node, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0})):
+        bucket["calls"] += 1
+        bucket["input_tokens"] += input_tokens
+        bucket["output_tokens"] += output_tokens
+        bucket["cost_usd"] = round(bucket["cost_usd"] + cost, 6)
+
+    LLM_TOKENS.inc(input_tokens, chain=chain, kind="input")
+    LLM_TOKENS.inc(output_tokens, chain=chain, kind="output")
+    LLM_COST.inc(cost, chain=chain)
+    return ledger
+
+
+def format_usage(ledger: Optional[Dict[str, Any]]) -> str:
+    """UI 표시용 사용량 요약"""
+    if not ledger or not ledger["total"]["calls"]:
+        return ""
+    total = ledger["total"]
+    lines = [
+        f"🪙 토큰 사용량: 입력 {total['input_tokens']:,} / 출력 {total['output_tokens']:,} "
+        f"(약 ${total['cost_usd']:.4f}, 호출 {total['calls']}회)"
+    ]
+    for node, usage in ledger["by_node"].items():
+        lines.append(f"   - {node}: 입력 {usage['input_tokens']:,} / 출력 {usage['output_tokens']:,} (${usage['cost_usd']:.4f})")
+    if any(call.get("trimmed") or call.get("downgraded") for call in ledger["calls"]):
+        lines.append("   ⚠️ 예산 적용: 일부 호출에서 증거를 줄이거나 모델을 낮췄습니다")
+    return "\n".join(lines)
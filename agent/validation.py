@@ -0,0 +1,185 @@
+"""
+조치 후 복구 검증 (기준선 수렴 감지)
+
+장애로 변화한 메트릭을 backoff 간격으로 재조회하면서, 최근 샘플들의 평균이 장애 이전 기준 구간의
+분포로 돌아왔는지(악화 방향 단측 검정) 확인합니다. 모든 메트릭이 연속된 창(window) 동안 기준선에
+수렴하면 즉시 종료하고, 마감 시간까지 수렴하지 않으면 실패로 판정합니다.
+"""
+
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from agent.anomaly import build_matrix
+from config.settings import settings
+
+
+def baseline_stats(metric_series: Dict[str, Any], names: List[str], baseline_fraction: float = None) -> Dict[str, Dict[str, float]]:
+    """시계열 앞부분(기준 구간)의 평균/표준편차"""
+    baseline_fraction = settings.ANOMALY_BASELINE_FRACTION if baseline_fraction is None else baseline_fraction
+    series = {name: metric_series.get("series", {}).get(name) or [] for name in names}
+    series = {name: values for name, values in series.items() if values}
+    if not series:
+        return {}
+
+    ordered, matrix = build_matrix(series)
+    baseline = matrix[:, :max(2, int(matrix.shape[1] * baseline_fraction))]
+    mu = np.nanmean(baseline, axis=1)
+    sigma = np.nanstd(baseline, axis=1)
+    sigma = np.maximum(sigma, np.maximum(np.abs(mu) * 0.01, 1e-9))  # 평탄한 시계열의 0 나눗셈 방지
+    return {name: {"mean": float(mu[i]), "std": float(sigma[i])} for i, name in enumerate(ordered)}
+
+
+class SimulatedRecoveryProbe:
+    """복구 과정을 흉내 내는 메트릭 조회기 (Mock)
+
+    조치 성공률만큼 장애 전 기준선으로 지수적으로 돌아가고, 나머지 차이는 그대로 남습니다.
+    실제 환경에서는 같은 시그니처(names -> {name: 현재 값})로 Datadog 조회 함수를 넘기면 됩니다.
+    """
+
+    def __init__(
+        self,
+        baselines: Dict[str, Dict[str, float]],
+        incident_values: Dict[str, float],
+        recovered_fraction: float,
+        recovery_s: float = None,
+        clock: Callable[[], float] = time.monotonic,
+        seed: int = 7,
+    ):
+        self.baselines = baselines
+        self.incident_values = incident_values
+        self.recovered_fraction = recovered_fraction
+        self.recovery_s = settings.VALIDATION_MOCK_RECOVERY_S if recovery_s is None else recovery_s
+        self.clock = clock
+        self.started = clock()
+        self._rng = random.Random(seed)
+
+    def __call__(self, names: List[str]) -> Dict[str, float]:
+        elapsed = self.clock() - self.started
+        decay = math.exp(-elapsed / self.recovery_s) if self.recovery_s > 0 else 0.0
+        values = {}
+        for name in names:
+            base = self.baselines[name]
+            offset = self.incident_values.get(name, base["mean"]) - base["mean"]
+            residual = offset * (1 - self.recovered_fraction) + offset * self.recovered_fraction * decay
+            values[name] = base["mean"] + residual + self._rng.gauss(0, base["std"])
+        return values
+
+
+def _worse(z: float, direction: Optional[str]) -> float:
+    """악화 방향 z-score (에러율이 기준보다 낮아지는 것은 악화가 아님)"""
+    if direction == "up":
+        return z
+    if direction == "down":
+        return -z
+    return abs(z)
+
+
+def wait_for_convergence(
+    probe: Callable[[List[str]], Dict[str, float]],
+    baselines: Dict[str, Dict[str, float]],
+    directions: Dict[str, str] = None,
+    timeout_s: float = None,
+    window: int = None,
+    z_threshold: float = None,
+    initial_interval_s: float = None,
+    max_interval_s: float = None,
+    backoff: float = 1.5,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, Any]:
+    """메트릭이 기준선으로 수렴할 때까지 backoff 간격으로 조회
+
+    최근 window개 샘플 평균의 z-score(표준오차 기준)가 악화 방향으로 z_threshold 이하이면 수렴으로 봅니다.
+    수렴 전에는 조회 간격을 backoff배씩 늘리고, 마지막 샘플이 모두 기준선 안에 들어오면 간격을 초기값으로 되돌립니다.
+    반환값: {"status": "converged" | "timeout", "elapsed_s", "polls", "metrics": {...}}
+    """
+    timeout_s = settings.VALIDATION_TIMEOUT_S if timeout_s is None else timeout_s
+    window = settings.VALIDATION_WINDOW if window is None else window
+    z_threshold = settings.VALIDATION_Z_THRESHOLD if z_threshold is None else z_threshold
+    initial_interval = settings.VALIDATION_POLL_INITIAL_S if initial_interval_s is None else initial_interval_s
+    interval = initial_interval
+    max_interval_s = settings.VALIDATION_POLL_MAX_S if max_interval_s is None else max_interval_s
+    directions = directions or {}
+
+    names = list(baselines)
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    started = clock()
+    deadline = started + timeout_s
+    polls = 0
+
+    while True:
+        polls += 1
+        for name, value in probe(names).items():
+            if name in samples:
+                samples[name] = (samples[name] + [float(value)])[-window:]
+
+        metrics = {}
+        candidate = True  # 마지막 샘플이 모두 기준선 안이면 빠르게 재확인
+        for name in names:
+            base = baselines[name]
+            recent = samples[name]
+            current = sum(recent) / len(recent) if recent else None
+            z = (current - base["mean"]) / (base["std"] / math.sqrt(len(recent))) if recent else None
+            # 악화 방향으로만 검정
+            worse = _worse(z, directions.get(name)) if z is not None else None
+            if not recent or _worse((recent[-1] - base["mean"]) / base["std"], directions.get(name)) > z_threshold:
+                candidate = False
+            metrics[name] = {
+                "baseline_mean": round(base["mean"], 4),
+                "current_mean": round(current, 4) if current is not None else None,
+                "z_score": round(z, 2) if z is not None else None,
+                "samples": len(recent),
+                "converged": len(recent) >= window and worse <= z_threshold,
+            }
+
+        now = clock()
+        if metrics and all(m["converged"] for m in metrics.values()):
+            status = "converged"
+            break
+        if now >= deadline:
+            status = "timeout"
+            break
+
+        # 아직 멀었으면 조회 간격을 늘리고, 수렴 후보가 보이면 처음 간격으로 되돌려 확인을 앞당김
+        interval = initial_interval if candidate else interval
+        sleep(min(interval, max(0.0, deadline - now)))
+        interval = min(interval * backoff, max_interval_s)
+
+    return {
+        "status": status,
+        "elapsed_s": round(clock() - started, 2),
+        "polls": polls,
+        "metrics": metrics,
+    }
+
+
+def validate_remediation(state: Dict[str, Any], success_rate: float, probe: Optional[Callable] = None) -> Dict[str, Any]:
+    """장애로 변화한 메트릭이 기준선으로 돌아왔는지 검증
+
+    probe를 넘기지 않으면 조치 성공률에 따라 복구되는 SimulatedRecoveryProbe(Mock)를 사용합니다.
+    """
+    anomalies = (state.get("metric_anomalies") or {}).get("anomalies") or []
+    baselines = baseline_stats(state.get("metric_series") or {}, [a["series"] for a in anomalies])
+    if not baselines:
+        return {"status": "no_baseline", "elapsed_s": 0.0, "polls": 0, "metrics": {}}
+
+    if probe is None:
+        probe = SimulatedRecoveryProbe(
+            baselines,
+            {a["series"]: a["recent_mean"] for a in anomalies},
+            recovered_fraction=success_rate
+        )
+
+    report = wait_for_convergence(
+        probe,
+        baselines,
+        directions={a["series"]: a["direction"] for a in anomalies}
+    )
+    for a in anomalies:
+        if a["series"] in report["metrics"]:
+            report["metrics"][a["series"]]["incident_mean"] = a["recent_mean"]
+    return report
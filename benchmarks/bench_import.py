@@ -0,0 +1,180 @@
+"""
+모듈 import 시간 벤치마크
+
+진입점 모듈(설정, 그래프, UI, CLI)을 매번 새 인터프리터에서 import해 콜드 스타트 시간을 측정하고,
+import만으로 무거운 의존성(OpenAI 클라이언트, Gradio, SQLite 체크포인터)을 불러오거나
+그래프를 컴파일하지 않는지 확인합니다. 기준선(import_baseline.json) 대비 임계값을 넘게 느려지거나
+지연 로딩이 깨지면 종료 코드 1로 실패합니다.
+
+사용 예 (저장소 루트에서):
+    python -m benchmarks.bench_import                    # 기준선과 비교
+    python -m benchmarks.bench_import --update-baseline  # 기준선 갱신
+    python -m benchmarks.bench_import --profile agent.graph  # 누적 import 시간 상위 모듈
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+
+# 기준선 대비 허용 범위 (비율과 절대값을 모두 넘어야 회귀로 판정해 프로세스 기동 노이즈를 무시)
+DEFAULT_THRESHOLDS = {
+    "latency_ratio": 1.3,
+    "latency_floor_ms": 150.0,
+}
+
+# 측정 케이스: (실행할 코드, import 후 아직 로드되면 안 되는 모듈)
+CASES = {
+    "config.settings": ("import config.settings", ["dotenv", "langchain_core", "langgraph"]),
+    "main": ("import main", ["langchain_core", "langgraph", "agent.graph"]),
+    "agent.llm": ("import agent.llm", ["langchain_openai", "openai"]),
+    "agent.graph": ("import agent.graph", ["langchain_openai", "openai", "gradio", "langgraph.checkpoint.sqlite"]),
+    "agent.graph+compile": ("import agent.graph; agent.graph.get_app()", ["langchain_openai", "openai", "gradio"]),
+    "draw_graph": ("import draw_graph", ["langgraph", "agent.graph"]),
+    "gradio_app": ("import gradio_app", ["langchain_openai", "openai", "langgraph.checkpoint.sqlite"]),
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{code}
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed_ms, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench-import")
+    env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def run_probe(code: str, forbidden: List[str]) -> Dict[str, Any]:
+    """새 인터프리터에서 코드를 실행하고 소요 시간과 로드된 금지 모듈 반환"""
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code, forbidden=forbidden)],
+        cwd=ROOT_DIR, env=_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} 실행 실패:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(name: str, repeat: int) -> Dict[str, Any]:
+    code, forbidden = CASES[name]
+    run_probe(code, forbidden)  # 바이트코드 캐시 생성용 1회 (측정 제외)
+    samples = [run_probe(code, forbidden) for _ in range(repeat)]
+    timings = [s["ms"] for s in samples]
+    return {
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "eager_modules": sorted({m for s in samples for m in s["loaded"]}),
+    }
+
+
+def profile(module: str, top: int):
+    """python -X importtime 결과에서 누적 시간 상위 모듈 출력"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=_env(), capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    print(f"📦 {module} 누적 import 시간 상위 {top}개:")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:>9.1f}ms (자체 {self_us / 1000:>7.1f}ms)  {name}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], thresholds: Dict[str, float]) -> List[str]:
+    """기준선 대비 회귀 목록 (지연 로딩이 깨진 경우 포함)"""
+    regressions = []
+    for case, current in results.items():
+        if current["eager_modules"]:
+            regressions.append(f"{case}: import 시점에 로드되면 안 되는 모듈 {', '.join(current['eager_modules'])}")
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            continue
+        limit = max(base["median_ms"] * thresholds["latency_ratio"], base["median_ms"] + thresholds["latency_floor_ms"])
+        if current["median_ms"] > limit:
+            regressions.append(f"{case}: import 시간 {base['median_ms']}ms -> {current['median_ms']}ms (허용 {limit:.1f}ms)")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="모듈 import 시간 벤치마크 (새 인터프리터에서 콜드 스타트 측정)")
+    parser.add_argument("--cases", default=",".join(CASES), help="측정할 케이스 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=5, help="케이스별 측정 횟수")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준선 JSON 경로")
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과로 기준선 갱신 (비교하지 않음)")
+    parser.add_argument("--profile", default=None, metavar="MODULE", help="측정 대신 해당 모듈의 import 시간 상위 모듈 출력")
+    parser.add_argument("--top", type=int, default=20, help="--profile 출력 개수")
+    for key, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=None, help=f"기준선 파일 값 대신 사용 (기본 {value})")
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.profile, args.top)
+        return 0
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"알 수 없는 케이스: {', '.join(unknown)}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for case in cases:
+        r = measure(case, args.repeat)
+        eager = f"  ⚠️ 즉시 로드: {', '.join(r['eager_modules'])}" if r["eager_modules"] else ""
+        print(f"⏱️ {case:<22} 중앙값 {r['median_ms']:>8.1f}ms  (최소 {r['min_ms']:.1f} / 최대 {r['max_ms']:.1f}){eager}")
+        results[case] = r
+
+    baseline = load_baseline(args.baseline)
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    for key in DEFAULT_THRESHOLDS:
+        if getattr(args, key) is not None:
+            thresholds[key] = getattr(args, key)
+
+    if args.update_baseline:
+        merged = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"thresholds": thresholds, "repeat": args.repeat, "results": merged}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"💾 기준선 갱신: {args.baseline} ({len(results)}개 케이스)")
+        return 0
+
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        print(f"❌ import 회귀 {len(regressions)}건:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+
+    if not baseline:
+        print(f"⚠️ 기준선이 없습니다. --update-baseline으로 먼저 생성하세요: {args.baseline}")
+        return 0
+
+    print(f"✅ 기준선 대비 회귀 없음 ({len(results)}개 케이스)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+LLM 호출 폭주(장애 스톰) 벤치마크
+
+OpenAI 호환 스텁 서버를 로컬에 띄우고, 심각도가 섞인 장애들의 LLM 호출을 한꺼번에 보내
+우선순위별 지연 시간(p50 / p95 / p99), 실패 수, 스텁이 돌려준 429 수를 측정합니다.
+스텁은 공급자처럼 분당 요청 한도와 동시 처리 한도를 두고, 넘치면 retry-after-ms 헤더와 함께 429를 반환합니다.
+--compare를 주면 스케줄러를 끈 경우(SDK 자체 재시도만 사용)와 나란히 비교합니다.
+
+사용 예 (저장소 루트에서):
+    python -m benchmarks.bench_llm_storm                     # 스케줄러 사용
+    python -m benchmarks.bench_llm_storm --compare           # 스케줄러 사용 / 미사용 비교
+    python -m benchmarks.bench_llm_storm --calls 400 --stub-rpm 2400 --latency-ms 300
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+# 스텁에만 요청하므로 실제 키가 없어도 되도록 (settings import 전에 설정)
+os.environ.setdefault("OPENAI_API_KEY", "bench-llm-storm")
+
+import agent.llm as llm
+from agent.llm_scheduler import TokenBucket, reset_llm_scheduler, severity_priority
+from config.settings import settings
+
+# 알림 심각도 분포 (장애 스톰에서 critical은 소수)
+SEVERITY_MIX = [("critical", 0.15), ("high", 0.25), ("warning", 0.4), ("info", 0.2)]
+
+STUB_ANSWER = "service-a의 DB 커넥션 풀이 고갈되어 api-gateway 에러율이 상승했습니다."
+
+
+class StubOpenAI:
+    """분당 요청 한도와 동시 처리 한도를 가진 OpenAI 호환 /chat/completions 스텁"""
+
+    def __init__(self, rpm: float, burst_s: float, max_concurrency: int, latency_ms: float):
+        self.bucket = TokenBucket(rpm, burst_s, time.monotonic)
+        self.max_concurrency = max_concurrency
+        self.latency_s = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def _admit(self) -> float:
+        """처리 가능하면 0, 아니면 재시도까지 기다릴 시간(초)"""
+        with self.lock:
+            self.stats["requests"] += 1
+            wait_s = self.bucket.wait_time(1)
+            if wait_s == 0 and self.in_flight < self.max_concurrency:
+                self.bucket.take(1)
+                self.in_flight += 1
+                return 0.0
+            self.stats["throttled"] += 1
+            return max(wait_s, 0.05)
+
+    def _finish(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.stats["ok"] += 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                wait_s = stub._admit()
+                if wait_s:
+                    self._reply(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                        {"retry-after-ms": str(int(wait_s * 1000))},
+                    )
+                    return
+                try:
+                    # 지연 시간에 약간의 흔들림을 줘서 실제 응답처럼
+                    time.sleep(stub.latency_s * random.uniform(0.8, 1.2))
+                    prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+                    self._reply(200, {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "stub"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": STUB_ANSWER},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": prompt_chars // 4,
+                            "completion_tokens": len(STUB_ANSWER) // 2,
+                            "total_tokens": prompt_chars // 4 + len(STUB_ANSWER) // 2,
+                        },
+                    })
+                finally:
+                    stub._finish()
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _reset_clients():
+    """설정을 바꾼 뒤 LLM 클라이언트 / 체인 / 스케줄러를 새로 만들도록 초기화"""
+    with llm._registry_lock:
+        llm._llm_clients.clear()
+        llm._chains.clear()
+    reset_llm_scheduler()
+
+
+def run_storm(args: argparse.Namespace, scheduler_enabled: bool) -> Dict[str, Any]:
+    """호출을 한꺼번에 보내고 우선순위별 지연 시간 / 실패 수 집계"""
+    rng = random.Random(args.seed)
+    severities = rng.choices([s for s, _ in SEVERITY_MIX], [w for _, w in SEVERITY_MIX], k=args.calls)
+    prompt = llm.CHAIN_REGISTRY["root_cause"][0]
+    inputs = {name: f"{name} 증거 (벤치마크)" for name in prompt.input_variables}
+
+    with StubOpenAI(args.stub_rpm, args.burst_s, args.stub_concurrency, args.latency_ms) as stub:
+        settings.OPENAI_BASE_URL = stub.base_url
+        settings.LLM_CACHE_ENABLED = False
+        settings.LLM_SCHEDULER_ENABLED = scheduler_enabled
+        settings.LLM_RPM_LIMIT = args.stub_rpm if args.rpm is None else args.rpm
+        settings.LLM_TPM_LIMIT = 0
+        settings.LLM_RATE_BURST_S = args.burst_s
+        _reset_clients()
+
+        def call(severity: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                llm.run_chain("root_cause", inputs, priority=severity_priority({"severity": severity}))
+                ok = True
+            except Exception:
+                ok = False
+            return {"severity": severity, "ok": ok, "s": time.perf_counter() - started}
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.calls) as pool:
+            results = list(pool.map(call, severities))
+        elapsed = time.perf_counter() - started
+        scheduler_stats = llm.get_llm_scheduler().get_stats() if scheduler_enabled else {}
+        stub_stats = dict(stub.stats)
+
+    by_severity = {}
+    for severity, _ in SEVERITY_MIX:
+        latencies = [r["s"] for r in results if r["severity"] == severity and r["ok"]]
+        by_severity[severity] = {
+            "calls": sum(1 for r in results if r["severity"] == severity),
+            "failed": sum(1 for r in results if r["severity"] == severity and not r["ok"]),
+            "p50_s": round(_percentile(latencies, 0.5), 2),
+            "p95_s": round(_percentile(latencies, 0.95), 2),
+            "p99_s": round(_percentile(latencies, 0.99), 2),
+        }
+    all_latencies = [r["s"] for r in results if r["ok"]]
+    return {
+        "scheduler": scheduler_enabled,
+        "elapsed_s": round(elapsed, 2),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "p99_s": round(_percentile(all_latencies, 0.99), 2),
+        "stdev_s": round(statistics.pstdev(all_latencies), 2) if all_latencies else 0.0,
+        "stub": stub_stats,
+        "limit": scheduler_stats.get("limit"),
+        "by_severity": by_severity,
+    }
+
+
+def print_result(result: Dict[str, Any]):
+    mode = "스케줄러 사용" if result["scheduler"] else "스케줄러 미사용"
+    stub = result["stub"]
+    limit = f" / 최종 동시 한도 {result['limit']}" if result["limit"] is not None else ""
+    print(
+        f"🌩️ {mode}: {result['elapsed_s']}초, 실패 {result['failed']}건, 전체 p99 {result['p99_s']}초, "
+        f"스텁 요청 {stub['requests']}건 중 429 {stub['throttled']}건{limit}"
+    )
+    for severity, row in result["by_severity"].items():
+        print(
+            f"   {severity:<8} {row['calls']:>4}건  실패 {row['failed']:>3}  "
+            f"p50 {row['p50_s']:>6.2f}s  p95 {row['p95_s']:>6.2f}s  p99 {row['p99_s']:>6.2f}s"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM 호출 폭주 벤치마크 (로컬 스로틀링 스텁 사용)")
+    parser.add_argument("--calls", type=int, default=200, help="동시에 보낼 LLM 호출 수")
+    parser.add_argument("--stub-rpm", type=float, default=1200, help="스텁의 분당 요청 한도")
+    parser.add_argument("--stub-concurrency", type=int, default=8, help="스텁의 동시 처리 한도")
+    parser.add_argument("--burst-s", type=float, default=1.0, help="스텁 / 스케줄러 토큰 버킷 버스트 (초)")
+    parser.add_argument("--latency-ms", type=float, default=200, help="스텁 응답 지연")
+    parser.add_argument("--rpm", type=float, default=None, help="스케줄러 분당 요청 한도 (기본: 스텁과 동일)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--compare", action="store_true", help="스케줄러 미사용과 비교")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    results = [run_storm(args, scheduler_enabled=True)]
+    if args.compare:
+        results.append(run_storm(args, scheduler_enabled=False))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print_result(result)
+    return 1 if results[0]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+"""
+노드별 마이크로벤치마크
+
+결정적인 가짜 채팅 모델(FakeListChatModel)과 즉시 응답하는 스텁 도구로 외부 호출을 없앤 뒤,
+증거 크기(로그 / 메트릭 시계열 / 트레이스 수)별로 각 노드와 전체 그래프의 소요 시간과 최대 메모리를 측정합니다.
+측정 결과를 기준선(baseline.json)과 비교해 임계값을 넘게 느려지거나 메모리를 더 쓰면 종료 코드 1로 실패합니다.
+측정 전에 그래프를 stream_mode="messages"로 실행해 분석 노드의 LLM 토큰이 UI까지 흘러오는지도 확인합니다.
+
+사용 예 (저장소 루트에서):
+    python -m benchmarks.bench_nodes                    # 기준선과 비교
+    python -m benchmarks.bench_nodes --update-baseline  # 기준선 갱신
+    python -m benchmarks.bench_nodes --sizes small --repeat 3
+"""
+
+import argparse
+import contextlib
+import copy
+import inspect
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+import agent.collectors as collectors
+import agent.llm as llm
+import agent.tools as tools
+from agent import graph
+from agent.collectors import StubSource
+from config.settings import settings
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 기준선 대비 허용 범위 (비율과 절대값을 모두 넘어야 회귀로 판정해 짧은 측정의 노이즈를 무시)
+DEFAULT_THRESHOLDS = {
+    "latency_ratio": 1.5,
+    "latency_floor_ms": 5.0,
+    "memory_ratio": 1.3,
+    "memory_floor_kb": 256.0,
+}
+
+# 증거 크기 (로그 라인 수, 메트릭 시계열 수, 트레이스 수)
+EVIDENCE_SIZES = {
+    "small": {"logs": 200, "series": 20, "traces": 20},
+    "medium": {"logs": 2000, "series": 200, "traces": 200},
+    "large": {"logs": 20000, "series": 1000, "traces": 2000},
+}
+
+FAKE_ROOT_CAUSE = "service-a의 DB 커넥션 풀(20/20)이 고갈되어 쿼리 타임아웃과 api-gateway 에러율 상승이 발생했습니다.\n- 신뢰도 (1-10점): 8점"
+
+FAKE_ACTION_PLAN = json.dumps({
+    "actions": [
+        {
+            "id": 1,
+            "title": "DB 커넥션 풀 재설정",
+            "description": "커넥션 풀을 재시작하고 서비스 상태를 확인합니다",
+            "risk_level": "낮음",
+            "estimated_time": "2분",
+            "tools": [
+                {"name": "check_ecs_health", "params": {"service": "service-a"}},
+                {"name": "check_db_connections", "params": {"database": "main"}},
+                {"name": "restart_db_pool", "params": {"database": "main"}},
+                {"name": "validate_db_health", "params": {"database": "main"}},
+                {"name": "verify_restart", "params": {"service": "service-a", "timeout": 30}}
+            ]
+        },
+        {
+            "id": 2,
+            "title": "서비스 재시작",
+            "description": "service-a 태스크를 교체합니다",
+            "risk_level": "중간",
+            "estimated_time": "3분",
+            "tools": [
+                {"name": "restart_ecs_task", "params": {"service": "service-a"}},
+                {"name": "verify_restart", "params": {"service": "service-a"}}
+            ]
+        },
+        {
+            "id": 3,
+            "title": "트래픽 제어",
+            "description": "트래픽을 줄인 뒤 점진적으로 복구합니다",
+            "risk_level": "높음",
+            "estimated_time": "10분",
+            "tools": [
+                {"name": "reduce_traffic", "params": {"service": "service-a", "percentage": 50}},
+                {"name": "gradual_traffic_restore", "params": {"steps": 5}}
+            ]
+        }
+    ]
+}, ensure_ascii=False)
+
+FAKE_SINGLE_PASS = json.dumps({
+    "root_cause": "service-a의 DB 커넥션 풀(20/20) 고갈로 쿼리 타임아웃이 발생했습니다",
+    "evidence": ["Connection pool exhausted 경고 급증", "db_connection_count가 최대치(20)에 도달", "api-gateway 에러율 25%"],
+    "impact": "service-a와 이를 호출하는 api-gateway",
+    "confidence": 8,
+    "affected_services": ["service-a", "api-gateway"],
+    "actions": json.loads(FAKE_ACTION_PLAN)["actions"],
+    "recommendation": 1,
+}, ensure_ascii=False)
+
+_LOG_TEMPLATES = [
+    ("ERROR", "ConnectionTimeout: Failed to connect to database after {n}s"),
+    ("ERROR", "org.springframework.dao.QueryTimeoutException: Query {id} timed out"),
+    ("WARN", "Connection pool exhausted, current: {n}/20"),
+    ("INFO", "GET /api/orders/{id} 200 {n}ms"),
+    ("INFO", "POST /api/payments/{id} 201 {n}ms"),
+    ("WARN", "Retrying request {id} attempt {n}"),
+    ("ERROR", "Upstream 10.0.{n}.{n} returned 503 for request {id}"),
+    ("INFO", "Cache miss for key order:{id}"),
+]
+
+
+# --- 결정적 증거 생성 ---
+def make_logs(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    logs = []
+    for i in range(count):
+        level, template = _LOG_TEMPLATES[rng.randrange(len(_LOG_TEMPLATES))]
+        logs.append({
+            "timestamp": f"2024-01-15T14:{30 + i * 30 // max(count, 1):02d}:{i % 60:02d}Z",
+            "level": level,
+            "service": f"service-{'abc'[i % 3]}",
+            "message": template.format(n=rng.randint(1, 999), id=rng.randint(10000, 99999)),
+        })
+    return logs
+
+
+def make_metric_series(count: int, rng: random.Random, points: int = 60, incident_at: int = 45) -> Dict[str, Any]:
+    timestamps = [f"2024-01-15T{13 + (31 + i) // 60:02d}:{(31 + i) % 60:02d}:00Z" for i in range(points)]
+    series = {}
+    for i in range(count):
+        normal = rng.uniform(10, 500)
+        noise = normal * 0.05
+        # 10개 중 1개는 장애 시점부터 크게 변함
+        degraded = normal * rng.uniform(3, 10) if i % 10 == 0 else normal
+        series[f"service-{i // 5}/metric_{i % 5}"] = [
+            round((degraded if t >= incident_at else normal) + rng.gauss(0, noise), 4)
+            for t in range(points)
+        ]
+    return {"timestamps": timestamps, "series": series}
+
+
+def make_traces(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    spans = []
+    services = ["api-gateway", "service-a", "service-b", "cache", "database"]
+    for t in range(count):
+        start = 0
+        parent = None
+        budget = rng.randint(200, 9000)
+        for depth, service in enumerate(services):
+            span_id = f"t{t}-s{depth}"
+            duration = max(1, budget - depth * rng.randint(10, 50))
+            spans.append({
+                "trace_id": f"trace-{t}",
+                "span_id": span_id,
+                "parent_id": parent,
+                "service": service,
+                "start_ms": start,
+                "duration_ms": duration,
+                "status": "error" if budget > 5000 else "ok",
+            })
+            parent = span_id
+            start += rng.randint(1, 20)
+    return spans
+
+
+def make_sources(size: str) -> Callable[[], List[StubSource]]:
+    """지연 없이 증거를 돌려주는 수집 소스 목록 (크기별)"""
+    spec = EVIDENCE_SIZES[size]
+    rng = random.Random(42)
+    logs = make_logs(spec["logs"], rng)
+    series = make_metric_series(spec["series"], rng)
+    traces = make_traces(spec["traces"], rng)
+    metrics = {
+        "error_rate": "25%",
+        "latency_p95_ms": 3500,
+        "db_connection_count": 20,
+        "db_max_connections": 20,
+    }
+    context = {"environment": "benchmark", "cluster": "prod"}
+
+    def sources() -> List[StubSource]:
+        return [
+            StubSource("cloudwatch_logs", "logs", logs),
+            StubSource("datadog_metrics", "metrics", metrics),
+            StubSource("datadog_metric_series", "metric_series", series),
+            StubSource("xray_traces", "traces", traces),
+            StubSource("deployment_context", "context", context),
+        ]
+
+    return sources
+
+
+# --- 외부 호출 스텁 ---
+def _stub_tool(name: str, func: Callable) -> Callable:
+    """원래 시그니처를 유지하고 즉시 성공을 반환하는 도구"""
+    signature = inspect.signature(func)
+
+    def stub(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return {"tool": name, **bound.arguments, "status": "success"}
+
+    stub.__name__ = name
+    stub.__doc__ = func.__doc__
+    stub.__signature__ = signature
+    return stub
+
+
+def _fake_chain(prompt, response: str):
+    return lambda model=None: prompt | FakeListChatModel(responses=[response]) | StrOutputParser()
+
+
+def install_fakes():
+    """가짜 LLM / 스텁 도구 설치, 캐시와 대기 시간 제거 (프로세스 전역 상태 변경)"""
+    settings.LLM_CACHE_ENABLED = False
+    settings.TOOL_CACHE_ENABLED = False
+    settings.INCIDENT_INDEX_ENABLED = False  # 반복 측정에서 과거 분석 재사용으로 LLM 노드가 생략되지 않도록
+    # 스케줄러는 거치되 가짜 모델 호출이 분당 요청 / 토큰 한도에 걸려 대기하지 않도록
+    settings.LLM_RPM_LIMIT = 0
+    settings.LLM_TPM_LIMIT = 0
+    settings.VALIDATION_MOCK_RECOVERY_S = 0.0
+    settings.VALIDATION_POLL_INITIAL_S = 0.0
+
+    llm.CHAIN_REGISTRY["root_cause"] = (
+        llm.ROOT_CAUSE_ANALYSIS_PROMPT, _fake_chain(llm.ROOT_CAUSE_ANALYSIS_PROMPT, FAKE_ROOT_CAUSE)
+    )
+    llm.CHAIN_REGISTRY["action_planning"] = (
+        llm.ACTION_PLANNING_PROMPT, _fake_chain(llm.ACTION_PLANNING_PROMPT, FAKE_ACTION_PLAN)
+    )
+    llm.CHAIN_REGISTRY["single_pass"] = (
+        llm.SINGLE_PASS_ANALYSIS_PROMPT,
+        _fake_chain(llm.SINGLE_PASS_ANALYSIS_PROMPT.partial(tools=tools.get_tool_signatures_description()), FAKE_SINGLE_PASS)
+    )
+    for name, func in list(tools.TOOL_REGISTRY.items()):
+        tools.TOOL_REGISTRY[name] = _stub_tool(name, func)
+
+
+# --- 측정 ---
+def _initial_state(incident_id: str) -> Dict[str, Any]:
+    return {
+        "slack_alert": {"service": "service-a", "alert_type": "critical", "timestamp": "2024-01-15T14:31:00Z"},
+        "incident_id": incident_id,
+        "coalesced_alerts": [],
+        "context": {},
+        "metrics": {},
+        "logs": [],
+        "traces": [],
+        "root_cause": "",
+        "recommended_actions": [],
+        "user_choice": "",
+        "selected_action_details": {},
+        "execution_results": [],
+        "final_status": "",
+        "human_feedback": {},
+    }
+
+
+def _quiet(func: Callable, *args):
+    # 노드의 진행 로그 출력 비용이 측정을 흔들지 않도록 버림
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def measure(run: Callable[[], Any], setup: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """setup 결과를 받아 run을 repeat번 실행한 소요 시간과, 별도 1회 실행의 tracemalloc 최대 메모리"""
+    _quiet(run, setup())  # 워밍업 (지연 import, 체인 빌드)
+
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        started = time.perf_counter()
+        _quiet(run, arg)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        _quiet(run, arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_size(size: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """증거 크기 하나에 대해 노드별 / 전체 그래프 측정"""
+    collectors.default_sources = make_sources(size)
+
+    # 각 노드의 입력은 앞 노드를 실제로 실행한 상태 (측정마다 복사본 사용)
+    collected = _quiet(graph.context_collector_node, _initial_state(f"bench-{size}"))
+    analyzed = _quiet(graph.root_cause_analyzer_node, copy.deepcopy(collected))
+    planned = _quiet(graph.action_planner_node, copy.deepcopy(analyzed))
+    approved = {**copy.deepcopy(planned), "user_choice": "1"}
+    # 구조화 단일 호출 경로(single_pass 모드)가 오류 처리로 빠지면 빠른 실패를 측정하게 되므로 먼저 확인
+    single_pass = _quiet(graph.single_pass_analyzer_node, copy.deepcopy(collected))
+    if not single_pass["recommended_actions"][0].get("tools"):
+        raise RuntimeError(f"IncidentAnalyzer 결과가 유효한 조치가 아님: {single_pass['root_cause']}")
+    executed = _quiet(graph.action_executor_node, copy.deepcopy(approved))
+
+    durable = graph.get_workflow().compile(checkpointer=InMemorySaver())
+    counter = iter(range(10 ** 9))
+
+    def full_graph(thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        durable.invoke(_initial_state(thread_id), config)
+        result = durable.invoke(Command(resume="1"), config)
+        if result.get("final_status") != "resolved":
+            raise RuntimeError(f"전체 그래프 결과가 resolved가 아님: {result.get('final_status')}")
+
+    cases = {
+        "ContextCollector": (graph.context_collector_node, lambda: _initial_state(f"bench-{size}")),
+        "RootCauseAnalyzer": (graph.root_cause_analyzer_node, lambda: copy.deepcopy(collected)),
+        "ActionPlanner": (graph.action_planner_node, lambda: copy.deepcopy(analyzed)),
+        "IncidentAnalyzer": (graph.single_pass_analyzer_node, lambda: copy.deepcopy(collected)),
+        "ActionExecutor": (graph.action_executor_node, lambda: copy.deepcopy(approved)),
+        "RemediationValidator": (graph.remediation_validator_node, lambda: copy.deepcopy(executed)),
+        "FullGraph": (full_graph, lambda: f"bench-{size}-{next(counter)}"),
+    }
+
+    results = {}
+    for name, (run, setup) in cases.items():
+        results[f"{name}/{size}"] = measure(run, setup, repeat)
+    return results
+
+
+def check_streaming() -> List[str]:
+    """그래프 스트리밍에서 LLM 노드별 메시지 청크가 도착하는지 확인 (Gradio 토큰 스트리밍 회귀 방지)"""
+    collectors.default_sources = make_sources("small")
+    durable = graph.get_workflow().compile(checkpointer=InMemorySaver())
+    chunks = {"RootCauseAnalyzer": 0, "ActionPlanner": 0}
+    config = {"configurable": {"thread_id": "bench-stream"}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for message, metadata in durable.stream(_initial_state("bench-stream"), config, stream_mode="messages"):
+            node = metadata.get("langgraph_node")
+            if node in chunks and getattr(message, "content", None):
+                chunks[node] += 1
+    return [f"{node}: 스트리밍된 LLM 메시지 청크 없음" for node, count in chunks.items() if count == 0]
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], thresholds: Dict[str, float]) -> List[str]:
+    """기준선 대비 회귀 목록"""
+    regressions = []
+    for case, current in results.items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            continue
+        latency_limit = max(base["median_ms"] * thresholds["latency_ratio"], base["median_ms"] + thresholds["latency_floor_ms"])
+        if current["median_ms"] > latency_limit:
+            regressions.append(f"{case}: 지연 시간 {base['median_ms']}ms -> {current['median_ms']}ms (허용 {latency_limit:.2f}ms)")
+        memory_limit = max(base["peak_kb"] * thresholds["memory_ratio"], base["peak_kb"] + thresholds["memory_floor_kb"])
+        if current["peak_kb"] > memory_limit:
+            regressions.append(f"{case}: 최대 메모리 {base['peak_kb']}KB -> {current['peak_kb']}KB (허용 {memory_limit:.1f}KB)")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="노드별 마이크로벤치마크 (가짜 LLM / 스텁 도구)")
+    parser.add_argument("--sizes", default=",".join(EVIDENCE_SIZES), help="측정할 증거 크기 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=5, help="케이스별 측정 횟수")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준선 JSON 경로")
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과로 기준선 갱신 (비교하지 않음)")
+    parser.add_argument("--output", default=None, help="현재 결과 JSON 저장 경로")
+    for key, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=None, help=f"기준선 파일 값 대신 사용 (기본 {value})")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in EVIDENCE_SIZES]
+    if unknown:
+        parser.error(f"알 수 없는 증거 크기: {', '.join(unknown)}")
+
+    install_fakes()
+    stream_failures = check_streaming()
+    if stream_failures:
+        print(f"❌ 토큰 스트리밍 확인 실패 {len(stream_failures)}건:")
+        for line in stream_failures:
+            print(f"   - {line}")
+        return 1
+    print("✅ 토큰 스트리밍 확인: 분석 노드의 LLM 메시지 청크 수신")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        print(f"⏱️ 증거 크기 {size}: {EVIDENCE_SIZES[size]}")
+        size_results = bench_size(size, args.repeat)
+        for case, r in size_results.items():
+            print(f"   {case:<32} 중앙값 {r['median_ms']:>9.2f}ms  (최소 {r['min_ms']:.2f} / 최대 {r['max_ms']:.2f})  최대 메모리 {r['peak_kb']:>9.1f}KB")
+        results.update(size_results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    for key in DEFAULT_THRESHOLDS:
+        if getattr(args, key) is not None:
+            thresholds[key] = getattr(args, key)
+
+    if args.update_baseline:
+        merged = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"thresholds": thresholds, "repeat": args.repeat, "results": merged}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"💾 기준선 갱신: {args.baseline} ({len(results)}개 케이스)")
+        return 0
+
+    if not baseline:
+        print(f"⚠️ 기준선이 없습니다. --update-baseline으로 먼저 생성하세요: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        print(f"❌ 성능 회귀 {len(regressions)}건:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+
+    print(f"✅ 기준선 대비 회귀 없음 ({len(results)}개 케이스)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,36 @@
 import os
-from dotenv import load_dotenv
 
-# .env 파일 로드
-load_dotenv()
+
+def load_env_file():
+    """.env 파일을 환경 변수로 로드 (이미 설정된 환경 변수가 우선)
+
+    호출 스택을 거슬러 올라가며 .env를 찾는 대신 현재 디렉토리와 프로젝트 루트만 확인하고,
+    파일이 없거나 RCA_LOAD_DOTENV=false이면 python-dotenv를 불러오지 않습니다.
+    (환경 변수를 오케스트레이터가 주입하는 워커 / 컨테이너의 시작 시간 단축)
+    """
+    if os.getenv("RCA_LOAD_DOTENV", "true").lower() == "false":
+        return
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (os.path.join(os.getcwd(), ".env"), os.path.join(project_root, ".env")):
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+
+
+# Settings 클래스 속성이 환경 변수를 읽기 전에 .env 로드
+load_env_file()
+
+
+def _parse_float_map(value: str) -> dict:
+    """name=1.5,other=3 형식의 환경 변수를 {name: float} 딕셔너리로 변환"""
+    result = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, raw = item.split("=", 1)
+            result[key.strip()] = float(raw)
+    return result
+
 
 class Settings:
     """애플리케이션 설정 관리"""
@@ -11,11 +39,72 @@ class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
     OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.1"))
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "60"))
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_EXPIRY_S = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_S", "120"))
+    RCA_ANALYSIS_MODE = os.getenv("RCA_ANALYSIS_MODE", "two_pass")  # two_pass | single_pass (근본 원인 + 조치 계획 단일 호출)
+    
+    # 단계별 모델 라우팅: triage 모델로 먼저 분석하고 신뢰도가 낮거나 응답 검증에 실패하면 OPENAI_MODEL로 승격
+    OPENAI_TRIAGE_MODEL = os.getenv("OPENAI_TRIAGE_MODEL", "gpt-4o-mini")  # 비우면 라우팅 없이 OPENAI_MODEL만 사용
+    ROUTING_CONFIDENCE_THRESHOLD = int(os.getenv("ROUTING_CONFIDENCE_THRESHOLD", "7"))  # triage 신뢰도(1-10)가 이보다 낮으면 승격
+    MODEL_ROUTING_CHAINS = [c.strip() for c in os.getenv("MODEL_ROUTING_CHAINS", "root_cause,action_planning,single_pass").split(",") if c.strip()]
+    
+    # LLM 토큰 / 비용 예산 (장애별, 0이면 제한 없음)
+    LLM_INCIDENT_TOKEN_BUDGET = int(os.getenv("LLM_INCIDENT_TOKEN_BUDGET", "60000"))  # 장애 하나의 입력 + 출력 토큰 상한
+    LLM_INCIDENT_COST_BUDGET_USD = float(os.getenv("LLM_INCIDENT_COST_BUDGET_USD", "0.5"))  # 넘을 것 같으면 대체 모델 사용
+    LLM_MAX_INPUT_TOKENS = int(os.getenv("LLM_MAX_INPUT_TOKENS", "16000"))  # 호출당 입력 토큰 상한 (넘으면 증거 축소)
+    LLM_OUTPUT_TOKEN_RESERVE = int(os.getenv("LLM_OUTPUT_TOKEN_RESERVE", "2000"))  # 호출당 출력 예약분 (create_llm의 max_tokens)
+    OPENAI_BUDGET_FALLBACK_MODEL = os.getenv("OPENAI_BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
+    LLM_INPUT_PRICE_PER_1M = _parse_float_map(os.getenv("LLM_INPUT_PRICE_PER_1M", "gpt-4o=2.5,gpt-4o-mini=0.15"))  # 모델별 100만 토큰당 USD
+    LLM_OUTPUT_PRICE_PER_1M = _parse_float_map(os.getenv("LLM_OUTPUT_PRICE_PER_1M", "gpt-4o=10,gpt-4o-mini=0.6"))
+    
+    # LLM 요청 스케줄러 (프로세스 단위 한도, 0이면 제한 없음)
+    LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+    LLM_RPM_LIMIT = float(os.getenv("LLM_RPM_LIMIT", "500"))  # 분당 요청 수
+    LLM_TPM_LIMIT = float(os.getenv("LLM_TPM_LIMIT", "300000"))  # 분당 입력 + 출력 토큰 수
+    LLM_RATE_BURST_S = float(os.getenv("LLM_RATE_BURST_S", "6"))  # 한 번에 몰아 보낼 수 있는 분량 (초 단위)
+    LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+    LLM_AIMD_DECREASE_FACTOR = float(os.getenv("LLM_AIMD_DECREASE_FACTOR", "0.5"))  # 스로틀링 / 지연 초과 시 한도 배율
+    LLM_AIMD_COOLDOWN_S = float(os.getenv("LLM_AIMD_COOLDOWN_S", "0.2"))  # 연속 감소 사이 최소 간격 (평균 응답 시간이 더 길면 그 값)
+    LLM_LATENCY_TARGET_S = float(os.getenv("LLM_LATENCY_TARGET_S", "30"))  # 넘으면 혼잡으로 보고 한도 감소 (0이면 사용 안 함)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))  # 스로틀링 응답 재시도 횟수
+    LLM_RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "1"))
+    LLM_RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "30"))
+    LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "300"))  # 대기열에서 기다릴 최대 시간
+    
+    # LLM 응답 캐시 설정
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3")
+    LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    
+    # 과거 유사 장애 인덱스 (MinHash / LSH)
+    INCIDENT_INDEX_ENABLED = os.getenv("INCIDENT_INDEX_ENABLED", "true").lower() == "true"
+    INCIDENT_INDEX_PATH = os.getenv("INCIDENT_INDEX_PATH", ".cache/incident_index.sqlite3")
+    INCIDENT_INDEX_NUM_PERM = int(os.getenv("INCIDENT_INDEX_NUM_PERM", "128"))  # MinHash 순열 수
+    INCIDENT_INDEX_BANDS = int(os.getenv("INCIDENT_INDEX_BANDS", "32"))  # LSH 밴드 수 (32 x 4행이면 유사도 약 0.42부터 후보)
+    INCIDENT_INDEX_MAX_ENTRIES = int(os.getenv("INCIDENT_INDEX_MAX_ENTRIES", "5000"))
+    INCIDENT_INDEX_MIN_FEATURES = int(os.getenv("INCIDENT_INDEX_MIN_FEATURES", "3"))  # 특징이 이보다 적으면 조회 / 저장 생략
+    INCIDENT_SIMILAR_TOP_K = int(os.getenv("INCIDENT_SIMILAR_TOP_K", "3"))
+    INCIDENT_SEED_SIMILARITY = float(os.getenv("INCIDENT_SEED_SIMILARITY", "0.5"))  # 이 이상이면 프롬프트에 참고 자료로 포함
+    INCIDENT_REUSE_SIMILARITY = float(os.getenv("INCIDENT_REUSE_SIMILARITY", "0.85"))  # 이 이상이면 LLM 호출 없이 과거 분석 재사용
     
     # AWS 설정
     AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION", "ap-northeast-2")
+    AWS_BACKEND = os.getenv("AWS_BACKEND", "mock")  # mock | stub | boto3 (도구가 호출할 백엔드)
+    AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))  # 클라이언트별 커넥션 풀 크기
+    AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+    AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")  # legacy | standard | adaptive
+    AWS_CONNECT_TIMEOUT_S = float(os.getenv("AWS_CONNECT_TIMEOUT_S", "5"))
+    AWS_READ_TIMEOUT_S = float(os.getenv("AWS_READ_TIMEOUT_S", "30"))
+    AWS_STUB_LATENCY_S = float(os.getenv("AWS_STUB_LATENCY_S", "0.05"))  # 스텁 백엔드 API 호출 지연
+    AWS_STUB_HANDSHAKE_S = float(os.getenv("AWS_STUB_HANDSHAKE_S", "0.1"))  # 스텁 백엔드 새 연결 지연
+    AWS_STUB_RESTART_S = float(os.getenv("AWS_STUB_RESTART_S", "2"))  # 스텁 백엔드 재시작 후 정상화까지 걸리는 시간
     
     # Datadog 설정
     DATADOG_API_KEY = os.getenv("DATADOG_API_KEY")
@@ -24,6 +113,85 @@ class Settings:
     # Slack 설정
     SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
     
+    # Gradio 서버 설정
+    GRADIO_ANALYZE_CONCURRENCY = int(os.getenv("GRADIO_ANALYZE_CONCURRENCY", "4"))  # 동시에 진행할 RCA 분석 수
+    GRADIO_EXECUTE_CONCURRENCY = int(os.getenv("GRADIO_EXECUTE_CONCURRENCY", "4"))  # 동시에 실행할 조치 수
+    GRADIO_QUEUE_MAX_SIZE = int(os.getenv("GRADIO_QUEUE_MAX_SIZE", "64"))
+    GRADIO_MAX_THREADS = int(os.getenv("GRADIO_MAX_THREADS", "40"))
+    
+    # 런타임 메트릭 엔드포인트 (Prometheus 텍스트 형식)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+    
+    # 세션 저장소 설정 (브라우저 세션별 장애 상태)
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "200"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))  # 전체 세션 추정 메모리 상한
+    SESSION_IDLE_TTL_S = float(os.getenv("SESSION_IDLE_TTL_S", "86400"))
+    
+    # 장애 처리 이력 저장소 (조치 실행 결과 / 상태 스냅샷)
+    HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/incident_history.sqlite3")
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+    HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "90"))  # 0이면 삭제하지 않음
+    HISTORY_SUMMARY_DAYS = float(os.getenv("HISTORY_SUMMARY_DAYS", "7"))  # 히스토리 화면 상단 집계 기간
+    HISTORY_PRUNE_EVERY = int(os.getenv("HISTORY_PRUNE_EVERY", "500"))  # 기록 N건마다 보존 기간 지난 이력 삭제
+    HISTORY_STORE_SNAPSHOTS = os.getenv("HISTORY_STORE_SNAPSHOTS", "true").lower() == "true"  # 전체 상태 스냅샷 저장 여부
+    
+    # 그래프 체크포인트 설정 (승인 대기 중인 장애 상태 저장 위치)
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite3")
+    
+    # 배치 재실행 설정 (main.py)
+    REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", str(os.cpu_count() or 4)))  # 재실행 프로세스 수
+    REPLAY_MAX_IN_FLIGHT = int(os.getenv("REPLAY_MAX_IN_FLIGHT", "4"))  # 프로세스당 미리 제출해 둘 알림 수
+    
+    # 알림 병합 설정
+    ALERT_COALESCE_WINDOW_S = float(os.getenv("ALERT_COALESCE_WINDOW_S", "120"))
+    ALERT_COALESCE_WAIT_S = float(os.getenv("ALERT_COALESCE_WAIT_S", "300"))  # 중복 알림이 진행 중인 분석 결과를 기다리는 최대 시간
+    
+    # 컨텍스트 수집 설정
+    COLLECTOR_TIMEOUT_S = float(os.getenv("COLLECTOR_TIMEOUT_S", "10"))
+    COLLECTOR_SOURCE_TIMEOUTS = _parse_float_map(os.getenv("COLLECTOR_SOURCE_TIMEOUTS", ""))  # 예: "xray_traces=5,cloudwatch_logs=8"
+    COLLECTOR_MAX_WORKERS = int(os.getenv("COLLECTOR_MAX_WORKERS", "16"))
+    
+    # 조치 실행 설정
+    EXECUTOR_MAX_WORKERS = int(os.getenv("EXECUTOR_MAX_WORKERS", "8"))
+    EXECUTOR_TOOL_TIMEOUT_S = float(os.getenv("EXECUTOR_TOOL_TIMEOUT_S", "60"))  # 도구별 기본 마감 시간
+    EXECUTOR_TOOL_TIMEOUTS = _parse_float_map(os.getenv("EXECUTOR_TOOL_TIMEOUTS", ""))  # 예: "restart_all_services=300,verify_restart=200"
+    EXECUTOR_PLAN_TIMEOUT_S = float(os.getenv("EXECUTOR_PLAN_TIMEOUT_S", "600"))  # 조치 전체 마감 시간
+    
+    # 복구 검증 설정 (장애 이전 기준선으로의 수렴 감지)
+    VALIDATION_TIMEOUT_S = float(os.getenv("VALIDATION_TIMEOUT_S", "120"))  # 이 시간까지 수렴하지 않으면 실패
+    VALIDATION_WINDOW = int(os.getenv("VALIDATION_WINDOW", "3"))  # 연속으로 기준선 안에 있어야 하는 샘플 수
+    VALIDATION_Z_THRESHOLD = float(os.getenv("VALIDATION_Z_THRESHOLD", "3.0"))
+    VALIDATION_POLL_INITIAL_S = float(os.getenv("VALIDATION_POLL_INITIAL_S", "0.5"))
+    VALIDATION_POLL_MAX_S = float(os.getenv("VALIDATION_POLL_MAX_S", "10"))
+    VALIDATION_MOCK_RECOVERY_S = float(os.getenv("VALIDATION_MOCK_RECOVERY_S", "1.0"))  # Mock 메트릭 복구 시간 상수
+    
+    # 진단 도구 결과 캐시 설정 (읽기 전용 도구만 캐시)
+    TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+    TOOL_CACHE_TTL_S = float(os.getenv("TOOL_CACHE_TTL_S", "15"))
+    TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+    
+    # 승인 대기 중 읽기 전용 진단 단계 사전 실행
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_TTL_S = float(os.getenv("PREFETCH_TTL_S", "120"))  # 사전 실행 결과를 조치 실행에 재사용할 수 있는 기간
+    PREFETCH_MAX_WORKERS = int(os.getenv("PREFETCH_MAX_WORKERS", "4"))
+    PREFETCH_MAX_INCIDENTS = int(os.getenv("PREFETCH_MAX_INCIDENTS", "256"))  # 결과를 보관할 최근 장애 수
+    
+    # 로그 템플릿 마이닝 설정
+    LOG_TEMPLATE_SIM_THRESHOLD = float(os.getenv("LOG_TEMPLATE_SIM_THRESHOLD", "0.5"))
+    LOG_TEMPLATE_TOP_N = int(os.getenv("LOG_TEMPLATE_TOP_N", "30"))  # 프롬프트에 넣을 최대 템플릿 수
+    
+    # 메트릭 이상 탐지 설정
+    ANOMALY_BASELINE_FRACTION = float(os.getenv("ANOMALY_BASELINE_FRACTION", "0.5"))  # 시계열 앞부분 중 기준 구간 비율
+    ANOMALY_RECENT_POINTS = int(os.getenv("ANOMALY_RECENT_POINTS", "5"))
+    ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+    ANOMALY_TOP_N = int(os.getenv("ANOMALY_TOP_N", "15"))  # 프롬프트에 넣을 최대 변화 수
+    
+    # 트레이스 분석 설정
+    TRACE_TOP_EDGES = int(os.getenv("TRACE_TOP_EDGES", "10"))  # 프롬프트에 넣을 최대 호출 엣지 수
+    TRACE_MAX_OPEN_TRACES = int(os.getenv("TRACE_MAX_OPEN_TRACES", "1000"))  # 동시에 버퍼링할 최대 트레이스 수
+    
     @classmethod
     def validate_openai_config(cls):
         """OpenAI 설정 검증"""
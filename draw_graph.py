@@ -5,7 +5,6 @@
 draw_mermaid_png 메서드로 RCA Agent 그래프를 PNG로 저장
 """
 
-from agent.graph import app
 from pathlib import Path
 
 def save_langgraph_png():
@@ -16,6 +15,10 @@ def save_langgraph_png():
         
         print("🎨 LangGraph 구조 시각화 중...")
         
+        # 그래프는 모듈 import가 아니라 실제로 그릴 때 빌드 / 컴파일
+        from agent.graph import get_app
+        app = get_app()
+        
         # draw_mermaid_png 메서드 사용
         png_data = app.get_graph().draw_mermaid_png()
         
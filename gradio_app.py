@@ -6,22 +6,54 @@ LangGraph 기반 Root Cause Analysis 에이전트의 Gradio 시연 인터페이
 
 import gradio as gr
 import json
+import threading
 import traceback
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import time
 
 # RCA Agent 컴포넌트 import
-from agent.graph import app as rca_agent
+from langgraph.types import Command
+from agent.graph import get_durable_app  # 장애 ID를 thread_id로 쓰는 SQLite 체크포인트 실행기 (첫 호출 시 컴파일)
+from agent.checkpoint import thread_config
 from agent.state import AgentState
+from agent.llm import warmup_llm_clients
+from agent.instrumentation import start_metrics_server
+from agent.prefetch import format_prefetch_results, speculative_prefetcher
+from agent.routing import format_routing
+from agent.usage import format_usage
+from agent.history_store import history_store
+from agent.ingestion import run_coalesced, alert_coalescer
+from config.settings import settings
+from utils.session_store import IncidentSession, session_store
+
+# 장애별 재개 잠금 개수 (서로 다른 장애가 같은 잠금을 쓰면 재개가 잠시 직렬화될 뿐 정확성에는 영향 없음)
+RESUME_LOCK_STRIPES = 64
+
+# 스트리밍 진행 상황 표시용 노드 이름
+STREAM_NODE_LABELS = {
+    "SlackAlert": "🚨 알림 수신",
+    "ContextCollector": "📊 모니터링 데이터 수집",
+    "RootCauseAnalyzer": "🔎 근본 원인 분석",
+    "ActionPlanner": "📝 조치 계획 수립",
+    "IncidentAnalyzer": "🧠 근본 원인 분석 + 조치 계획 수립",
+    "RemediationDecision": "⚖️ 조치 선택 대기",
+}
 
 
 class RCAGradioDemo:
     """RCA Agent Gradio 데모 클래스"""
     
     def __init__(self):
-        self.current_state = {}
-        self.execution_history = []
+        # 브라우저 세션별 장애 상태 / 실행 히스토리 (세션끼리 상태를 공유하지 않음)
+        self.sessions = session_store
+        # 장애(thread_id) 해시로 나눈 재개 잠금: 병합된 알림의 세션들이 같은 체크포인트를 동시에 재개하지 않도록
+        # (장애마다 잠금을 만들면 가동 시간에 비례해 늘어나므로 고정 개수를 나눠 씀)
+        self._resume_locks = [threading.Lock() for _ in range(RESUME_LOCK_STRIPES)]
+    
+    def _session(self, request: gr.Request = None) -> IncidentSession:
+        """요청한 브라우저 세션의 장애 상태"""
+        return self.sessions.get(getattr(request, "session_hash", None))
         
     def simulate_slack_alert(self, service_name: str, error_time: str) -> Dict[str, Any]:
         """Slack 알림 시뮬레이션"""
@@ -34,42 +66,63 @@ class RCAGradioDemo:
             "severity": "high"
         }
     
+    def _build_initial_state(self, slack_alert: Dict[str, Any], incident) -> Dict[str, Any]:
+        """그래프 초기 상태 생성"""
+        return {
+            "slack_alert": slack_alert,
+            "incident_id": incident.incident_id,
+            "coalesced_alerts": incident.alerts,
+            "context": {},
+            "metrics": {},  # context_collector_node에서 설정됨
+            "logs": [],
+            "traces": [],
+            "root_cause": "",
+            "recommended_actions": [],
+            "user_choice": "",
+            "selected_action_details": {},
+            "execution_results": [],
+            "final_status": "",
+            "human_feedback": {}
+        }
+    
     def run_rca_analysis(
         self, 
         service_name: str, 
-        error_time: str
+        error_time: str,
+        request: gr.Request = None
     ) -> tuple:
         """RCA 분석 실행 (Approval Gate까지)"""
+        session = self._session(request)
         try:
-            # 초기 상태 설정
-            initial_state = {
-                "slack_alert": self.simulate_slack_alert(service_name, error_time),
-                "context": {},
-                "metrics": {},  # context_collector_node에서 설정됨
-                "logs": [],
-                "traces": [],
-                "root_cause": "",
-                "recommended_actions": [],
-                "user_choice": "",
-                "selected_action_details": {},
-                "execution_results": [],
-                "final_status": "",
-                "human_feedback": {}
-            }
-            
-            # RCA 에이전트 실행 (Approval Gate까지)
-            print(f"🚀 RCA 분석 시작: {service_name}")
-            
-            # SlackAlert부터 RemediationDecision까지 실행
-            result = rca_agent.invoke(initial_state, {
-                "recursion_limit": 50
-            })
-            
-            self.current_state = result
+            slack_alert = self.simulate_slack_alert(service_name, error_time)
+            
+            def run_incident(incident):
+                # RCA 에이전트 실행 (Approval Gate까지)
+                print(f"🚀 RCA 분석 시작: {service_name}")
+                
+                # SlackAlert부터 RemediationDecision까지 실행
+                return get_durable_app().invoke(
+                    self._build_initial_state(slack_alert, incident),
+                    thread_config(incident.incident_id)
+                )
+            
+            # 같은 서비스/알림 유형/시간 창의 알림은 진행 중인 장애에 병합 (중복 RCA 방지)
+            incident, result, is_new = run_coalesced(
+                slack_alert,
+                run_incident,
+                wait_timeout=settings.ALERT_COALESCE_WAIT_S
+            )
+            
+            if result is None:
+                return f"⏳ 진행 중인 장애 {incident.incident_id}에 병합되었습니다. 분석 완료 후 다시 확인해주세요.", "", gr.update(visible=False)
+            
+            self.sessions.save_state(session, result)
             
             # 결과 포맷팅
             analysis_result = self._format_analysis_result(result)
-            actions_info = self._format_actions_for_display(result.get("recommended_actions", []))
+            if not is_new:
+                analysis_result = self._format_coalesced_notice(incident) + analysis_result
+            actions_info = self._format_actions_with_prefetch(result)
             
             return analysis_result, actions_info, gr.update(visible=True)
             
@@ -77,12 +130,151 @@ class RCAGradioDemo:
             error_msg = f"❌ RCA 분석 중 오류 발생:\n{str(e)}\n\n{traceback.format_exc()}"
             return error_msg, "", gr.update(visible=False)
     
-    def execute_selected_action(self, choice: str) -> str:
+    def run_rca_analysis_stream(
+        self,
+        service_name: str,
+        error_time: str,
+        request: gr.Request = None
+    ):
+        """RCA 분석 스트리밍 실행 (노드 진행 상황과 LLM 토큰을 도착하는 대로 UI에 반영)"""
+        session = self._session(request)
+        slack_alert = self.simulate_slack_alert(service_name, error_time)
+        incident, is_new = alert_coalescer.submit(slack_alert)
+        
+        # 중복 알림이면 진행 중인 분석 결과를 기다림
+        if not is_new:
+            yield f"🔗 진행 중인 장애 {incident.incident_id}에 병합되었습니다. 분석 결과를 기다리는 중...", "", gr.update(visible=False)
+            result = incident.wait(settings.ALERT_COALESCE_WAIT_S)
+            if result is None:
+                yield f"⏳ 진행 중인 장애 {incident.incident_id}에 병합되었습니다. 분석 완료 후 다시 확인해주세요.", "", gr.update(visible=False)
+                return
+            self.sessions.save_state(session, result)
+            yield (
+                self._format_coalesced_notice(incident) + self._format_analysis_result(result),
+                self._format_actions_with_prefetch(result),
+                gr.update(visible=True)
+            )
+            return
+        
+        print(f"🚀 RCA 분석 시작 (스트리밍): {service_name}")
+        started = time.monotonic()
+        progress = []
+        tokens = {"RootCauseAnalyzer": [], "ActionPlanner": []}
+        token_runs = {}  # 노드별 현재 스트리밍 중인 LLM 실행 id
+        first_token_at = None
+        last_yield = 0.0
+        result = None
+        
+        def render_progress() -> str:
+            lines = ["⏱️ **진행 상황**"] + progress
+            if first_token_at is not None:
+                lines.append(f"⚡ 첫 토큰 수신: {first_token_at:.2f}초")
+            if tokens["RootCauseAnalyzer"]:
+                lines.append("\n📊 **근본 원인 (생성 중):**")
+                lines.append("".join(tokens["RootCauseAnalyzer"]))
+            return "\n".join(lines)
+        
+        try:
+            yield render_progress(), "", gr.update(visible=False)
+            
+            for mode, chunk in get_durable_app().stream(
+                self._build_initial_state(slack_alert, incident),
+                thread_config(incident.incident_id),
+                stream_mode=["updates", "messages", "values"]
+            ):
+                if mode == "values":
+                    result = chunk
+                    continue
+                
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node in tokens and getattr(message, "content", None):
+                        # 노드 안에서 새 LLM 실행이 시작되면(triage 응답 승격 등) 버려진 앞 응답을 지우고 새로 표시
+                        if token_runs.get(node) != message.id:
+                            token_runs[node] = message.id
+                            tokens[node] = []
+                        if first_token_at is None:
+                            first_token_at = time.monotonic() - started
+                        tokens[node].append(message.content)
+                        # 토큰마다 UI를 갱신하지 않도록 50ms 간격으로 제한
+                        if time.monotonic() - last_yield < 0.05:
+                            continue
+                else:
+                    for node in chunk:
+                        if node == "__interrupt__":
+                            continue
+                        label = STREAM_NODE_LABELS.get(node, node)
+                        progress.append(f"✅ {label} 완료 ({time.monotonic() - started:.1f}초)")
+                
+                last_yield = time.monotonic()
+                yield render_progress(), "".join(tokens["ActionPlanner"]), gr.update(visible=False)
+            
+            if result is None:
+                raise RuntimeError("그래프 실행 결과가 없습니다")
+            
+            self.sessions.save_state(session, result)
+            analysis_result = self._format_analysis_result(result)
+            analysis_result += f"\n\n⏱️ 총 소요 시간: {time.monotonic() - started:.1f}초"
+            if first_token_at is not None:
+                analysis_result += f" (첫 토큰 {first_token_at:.2f}초)"
+            
+            yield (
+                analysis_result,
+                self._format_actions_with_prefetch(result),
+                gr.update(visible=True)
+            )
+            
+        except Exception as e:
+            error_msg = f"❌ RCA 분석 중 오류 발생:\n{str(e)}\n\n{traceback.format_exc()}"
+            yield error_msg, "", gr.update(visible=False)
+        finally:
+            alert_coalescer.complete(incident.incident_id, result)
+    
+    def _format_coalesced_notice(self, incident) -> str:
+        """병합된 장애 안내 문구"""
+        return f"🔗 기존 장애 {incident.incident_id}에 병합됨 (알림 {len(incident.alerts)}건)\n\n"
+    
+    def _resume(self, session: IncidentSession, choice: str) -> Optional[Dict[str, Any]]:
+        """RemediationDecision interrupt 지점부터 사용자 선택으로 재개 (분석 노드는 다시 실행하지 않음)
+
+        병합된 알림의 세션들은 같은 체크포인트를 공유하므로, 이 세션이 본 승인 대기가 체크포인트에서
+        아직 유효할 때만 재개합니다. 다른 세션이 먼저 처리했거나 재분석으로 바뀌었으면 세션 상태를
+        체크포인트 기준으로 갱신하고 None을 반환합니다.
+        """
+        incident_id = session.current_state["incident_id"]
+        config = thread_config(incident_id)
+        with self._resume_locks[hash(incident_id) % len(self._resume_locks)]:
+            app = get_durable_app()
+            snapshot = app.get_state(config)
+            seen = {i.id for i in session.current_state.get("__interrupt__", [])}
+            if "RemediationDecision" in snapshot.next and any(i.id in seen for i in snapshot.interrupts):
+                return app.invoke(Command(resume=choice), config)
+        
+        print(f"⚠️ 장애 {incident_id}의 승인 대기가 이미 처리되었거나 변경됨 (세션 {session.session_id})")
+        state = dict(snapshot.values)
+        if snapshot.interrupts:
+            state["__interrupt__"] = list(snapshot.interrupts)
+        self.sessions.save_state(session, state)
+        return None
+    
+    def _stale_decision_message(self, session: IncidentSession) -> str:
+        """다른 세션이 먼저 처리한 승인 대기에 대한 안내"""
+        if "__interrupt__" in session.current_state:
+            return "⚠️ 다른 세션에서 재분석되어 추천 액션이 바뀌었습니다. 새 분석 결과를 확인한 뒤 다시 선택해주세요."
+        status = session.current_state.get("final_status") or "처리 완료"
+        return f"⚠️ 다른 세션에서 이미 처리된 장애입니다 (최종 상태: {status}). 중복 실행하지 않았습니다."
+    
+    def execute_selected_action(self, choice: str, request: gr.Request = None) -> str:
         """선택된 액션 실행"""
+        session = self._session(request)
         try:
-            if not self.current_state:
+            if not session.current_state:
                 return "❌ 먼저 RCA 분석을 실행해주세요."
             
+            if "__interrupt__" not in session.current_state:
+                return "❌ 이미 처리된 장애입니다. 새 RCA 분석을 실행해주세요."
+            
             if not choice:
                 return "❌ 액션을 선택해주세요."
             
@@ -93,36 +285,24 @@ class RCAGradioDemo:
             
             # manual이나 re_analyze 선택 처리
             if choice == "manual":
-                return self._handle_manual_action()
+                return self._handle_manual_action(session)
             elif choice == "re_analyze":
-                return self._handle_reanalyze_action()
-            
-            # 사용자 선택을 상태에 추가
-            self.current_state["user_choice"] = choice
-            self.current_state["human_feedback"] = {
-                "choice": choice,
-                "timestamp": datetime.now().isoformat()
-            }
+                return self._handle_reanalyze_action(session)
             
             print(f"🎯 사용자 선택: {choice}")
             
-            # RemediationDecision에서 ActionExecutor까지 실행
-            result = rca_agent.invoke(self.current_state, {
-                "recursion_limit": 50
-            })
+            # RemediationDecision에서 재개해 ActionExecutor, RemediationValidator만 실행
+            result = self._resume(session, choice)
+            if result is None:
+                return self._stale_decision_message(session)
             
-            self.current_state = result
+            self.sessions.save_state(session, result)
             
             # 실행 결과 포맷팅
             execution_result = self._format_execution_result(result)
             
-            # 실행 히스토리에 추가
-            self.execution_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "choice": choice,
-                "result": result.get("execution_results", []),
-                "final_status": result.get("final_status", "")
-            })
+            # 장애 이력 저장소에 기록 (상태 스냅샷 / 도구 결과 / 소요 시간)
+            history_store.record(result, choice, session_id=session.session_id)
             
             return execution_result
             
@@ -154,8 +334,40 @@ class RCAGradioDemo:
             for key, value in context.items():
                 lines.append(f"- {key}: {value}")
         
+        # 과거 유사 장애
+        similar = state.get("similar_incidents") or []
+        if state.get("reused_incident"):
+            lines.append(f"\n♻️ **과거 유사 장애 {state['reused_incident']}의 확인된 분석을 재사용했습니다 (유사도 {similar[0]['similarity']:.2f}, LLM 호출 생략)**")
+        elif similar:
+            lines.append("\n🔁 **과거 유사 장애 (분석 참고):**")
+            for m in similar:
+                lines.append(f"- {m['incident_id']} (유사도 {m['similarity']:.2f}): {m['root_cause'][:120]}")
+        
+        # 모델 라우팅 (triage / 승격) 기록
+        routing = format_routing(state.get("model_routing"))
+        if routing:
+            lines.append(f"\n{routing}")
+        
+        # LLM 토큰 / 비용 사용량
+        usage = format_usage(state.get("token_usage"))
+        if usage:
+            lines.append(f"\n{usage}")
+        
         return "\n".join(lines)
     
+    def _format_actions_with_prefetch(self, state: Dict[str, Any]) -> str:
+        """추천 액션 + 승인 대기 중 미리 실행한 진단 단계 결과"""
+        text = self._format_actions_for_display(state.get("recommended_actions", []))
+        prefetch = format_prefetch_results(speculative_prefetcher.results(state.get("incident_id")))
+        return f"{text}\n\n{prefetch}" if prefetch else text
+    
+    def refresh_prefetch_results(self, request: gr.Request = None) -> str:
+        """사전 진단 결과 새로고침 (백그라운드 실행이 끝난 단계 반영)"""
+        session = self._session(request)
+        if not session.current_state:
+            return "❌ 먼저 RCA 분석을 실행해주세요."
+        return self._format_actions_with_prefetch(session.current_state)
+    
     def _format_actions_for_display(self, actions: List[Dict[str, Any]]) -> str:
         """액션 목록 포맷팅"""
         if not actions:
@@ -223,20 +435,25 @@ class RCAGradioDemo:
                 status = result.get("status", "unknown")
                 
                 if status == "success":
-                    lines.append(f"✅ {tool_name}: 성공")
+                    prefetched = " (승인 대기 중 사전 실행 결과 재사용)" if result.get("prefetched") else ""
+                    lines.append(f"✅ {tool_name}: 성공{prefetched}")
                     success_count += 1
                     tool_result = result.get("result", {})
                     if isinstance(tool_result, dict):
                         for key, value in tool_result.items():
                             lines.append(f"   - {key}: {value}")
                 else:
-                    lines.append(f"❌ {tool_name}: 실패")
+                    status_label = {"timeout": "시간 초과", "cancelled": "취소됨"}.get(status, "실패")
+                    lines.append(f"❌ {tool_name}: {status_label}")
                     error = result.get("error", "Unknown error")
                     lines.append(f"   오류: {error}")
                 
                 lines.append("")
             
             lines.append(f"📊 **실행 요약:** {success_count}/{len(execution_results)} 성공")
+            report = state.get("execution_report") or {}
+            if report:
+                lines.append(f"⏱️ **실행 시간:** {report['elapsed_ms'] / 1000:.1f}초")
         
         # 최종 상태
         final_status = state.get("final_status", "")
@@ -245,34 +462,28 @@ class RCAGradioDemo:
         
         return "\n".join(lines)
     
-    def _handle_manual_action(self) -> str:
+    def _handle_manual_action(self, session: IncidentSession) -> str:
         """수동 처리 액션 핸들링"""
         try:
-            # 수동 처리를 상태에 추가
-            self.current_state["user_choice"] = "manual"
-            self.current_state["human_feedback"] = {
-                "choice": "manual",
-                "timestamp": datetime.now().isoformat()
-            }
-            
             print("🔧 수동 처리 선택됨")
             
-            # Manual Remediation 노드 실행
+            # RemediationDecision에서 재개해 Manual Remediation 노드 실행
             try:
-                result = rca_agent.invoke(self.current_state, {
-                    "recursion_limit": 50
-                })
+                result = self._resume(session, "manual")
             except Exception as continue_e:
                 print(f"⚠️ 그래프 재개 중 오류: {str(continue_e)}")
                 # 직접 노드 실행으로 fallback
                 from agent.graph import manual_remediation_node
                 
-                state = self.current_state.copy()
+                state = session.current_state.copy()
                 state = manual_remediation_node(state)
                 
                 result = state
             
-            self.current_state = result
+            if result is None:
+                return self._stale_decision_message(session)
+            
+            self.sessions.save_state(session, result)
             
             # 수동 처리 결과 포맷팅
             lines = []
@@ -283,20 +494,15 @@ class RCAGradioDemo:
             lines.append("- 근본 원인을 참고하여 적절한 조치를 취하세요")
             lines.append("- 해결 후 시스템 상태를 모니터링하세요")
             
-            root_cause = self.current_state.get("root_cause", "")
+            root_cause = session.current_state.get("root_cause", "")
             if root_cause:
                 lines.append(f"\n🔍 **참고 - 근본 원인:**")
                 lines.append(root_cause)
             
             lines.append(f"\n🏁 **최종 상태:** {result.get('final_status', '수동 처리 대기 중')}")
             
-            # 실행 히스토리에 추가
-            self.execution_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "choice": "manual",
-                "result": [],
-                "final_status": "수동 처리"
-            })
+            # 장애 이력 저장소에 기록
+            history_store.record(result, "manual", session_id=session.session_id, final_status=result.get("final_status") or "manual")
             
             return "\n".join(lines)
             
@@ -304,46 +510,18 @@ class RCAGradioDemo:
             error_msg = f"❌ 수동 처리 중 오류 발생:\n{str(e)}"
             return error_msg
     
-    def _handle_reanalyze_action(self) -> str:
+    def _handle_reanalyze_action(self, session: IncidentSession) -> str:
         """재분석 액션 핸들링"""
         try:
-            # 재분석을 위해 상태 초기화
             print("🔄 재분석 시작...")
             
-            # 기본 정보는 유지하고 분석 결과만 초기화
-            slack_alert = self.current_state.get("slack_alert", {})
-            
-            # 재분석을 위한 새 상태 생성
-            reanalyze_state = {
-                "slack_alert": slack_alert,
-                "context": {},
-                "metrics": {},
-                "logs": [],
-                "traces": [],
-                "root_cause": "",
-                "recommended_actions": [],
-                "user_choice": "",
-                "selected_action_details": {},
-                "execution_results": [],
-                "final_status": "",
-                "human_feedback": {}
-            }
-            
-            # 재분석 실행 (ActionPlanner까지)
+            # RemediationDecision에서 재개해 수집/분석 노드를 다시 실행 (캐시 무시)하고
+            # 새 조치 계획과 함께 다시 승인 대기 상태로 돌아옴
             try:
-                from agent.graph import (
-                    context_collector_node, 
-                    root_cause_analyzer_node, 
-                    action_planner_node
-                )
-                
-                state = reanalyze_state.copy()
-                state = context_collector_node(state)
-                state = root_cause_analyzer_node(state)
-                state = action_planner_node(state)
-                
-                self.current_state = state
-                result = state
+                result = self._resume(session, "re_analyze")
+                if result is None:
+                    return self._stale_decision_message(session)
+                self.sessions.save_state(session, result)
                 
             except Exception as e:
                 print(f"⚠️ 재분석 중 오류: {str(e)}")
@@ -369,13 +547,8 @@ class RCAGradioDemo:
             
             lines.append(f"\n💡 **다음 단계:** 위의 새로운 분석 결과를 바탕으로 액션을 선택하세요.")
             
-            # 실행 히스토리에 추가
-            self.execution_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "choice": "re_analyze",
-                "result": [],
-                "final_status": "재분석 완료"
-            })
+            # 장애 이력 저장소에 기록
+            history_store.record(result, "re_analyze", session_id=session.session_id, final_status="reanalyzed")
             
             return "\n".join(lines)
             
@@ -383,26 +556,48 @@ class RCAGradioDemo:
             error_msg = f"❌ 재분석 중 오류 발생:\n{str(e)}"
             return error_msg
     
-    def get_execution_history(self) -> str:
-        """실행 히스토리 조회"""
-        if not self.execution_history:
-            return "📝 아직 실행된 액션이 없습니다."
+    def get_execution_history(self, service: str = "", final_status: str = "", before_id: int = None):
+        """장애 이력 한 페이지 조회 (최신순, 서비스 / 최종 상태 필터) -> (표시 텍스트, 다음 페이지 커서)"""
+        filters = {
+            "service": (service or "").strip(),
+            "final_status": "" if final_status in (None, "", "전체") else final_status,
+        }
+        page = history_store.query(before_id=before_id, **filters)
+        if not page["items"]:
+            return ("📝 아직 실행된 액션이 없습니다." if before_id is None else "📝 더 이상 이력이 없습니다."), None
         
         lines = []
         lines.append("📜 **실행 히스토리**")
         lines.append("=" * 50)
         
-        for i, entry in enumerate(self.execution_history, 1):
-            lines.append(f"\n**{i}. {entry['timestamp']}**")
-            lines.append(f"선택한 액션: {entry['choice']}")
+        # 첫 페이지에만 최근 기간 집계 표시 (created_at 인덱스 범위만 읽음)
+        if before_id is None:
+            days = settings.HISTORY_SUMMARY_DAYS
+            summary = history_store.summary(since=time.time() - days * 86400, **filters)
+            statuses = ", ".join(f"{status or 'N/A'} {count}건" for status, count in summary["by_status"].items())
+            lines.append(
+                f"최근 {days:g}일 {summary['total']}건 ({statuses}), "
+                f"평균 실행 시간 {summary['avg_execution_ms']}ms, 비용 ${summary['cost_usd']}"
+            )
+        
+        for entry in page["items"]:
+            timestamp = datetime.fromtimestamp(entry["created_at"]).isoformat(timespec="seconds")
+            lines.append(f"\n**#{entry['id']}. {timestamp}** {entry['service'] or ''} ({entry['incident_id'] or 'N/A'})")
+            lines.append(f"선택한 액션: {entry['choice']}" + (f" - {entry['action_title']}" if entry["action_title"] else ""))
             lines.append(f"최종 상태: {entry['final_status']}")
-            
-            results = entry['result']
-            success_count = len([r for r in results if r.get('status') == 'success'])
-            lines.append(f"실행 결과: {success_count}/{len(results)} 성공")
-            lines.append("")
+            if entry["tool_count"]:
+                elapsed = f", 실행 시간 {entry['execution_ms']}ms" if entry["execution_ms"] is not None else ""
+                lines.append(f"실행 결과: {entry['success_count']}/{entry['tool_count']} 성공{elapsed}")
         
-        return "\n".join(lines)
+        if page["next_before_id"] is not None:
+            lines.append("\n➡️ 다음 페이지가 있습니다.")
+        return "\n".join(lines), page["next_before_id"]
+    
+    def get_next_history_page(self, service: str, final_status: str, before_id: int):
+        """이전 조회의 커서로 다음 페이지 조회"""
+        if before_id is None:
+            return "📝 더 이상 이력이 없습니다.", None
+        return self.get_execution_history(service, final_status, before_id)
 
 
 def create_gradio_interface():
@@ -483,6 +678,8 @@ def create_gradio_interface():
                         "⚡ 액션 실행",
                         variant="secondary"
                     )
+                    
+                    prefetch_btn = gr.Button("🔬 사전 진단 새로고침")
         
         with gr.Row():
             with gr.Column():
@@ -498,30 +695,61 @@ def create_gradio_interface():
             with gr.Column():
                 gr.Markdown("## 📜 실행 히스토리")
                 
+                with gr.Row():
+                    history_service = gr.Textbox(label="서비스 필터", placeholder="비워두면 전체")
+                    history_status = gr.Dropdown(
+                        choices=["전체", "resolved", "partial", "failed", "manual", "reanalyzed"],
+                        value="전체",
+                        label="최종 상태 필터"
+                    )
+                
                 history_output = gr.Textbox(
-                    label="지금까지의 실행 기록",
+                    label="장애 처리 이력 (최신순)",
                     lines=10,
                     interactive=False
                 )
+                history_cursor = gr.State(None)
                 
-                refresh_history_btn = gr.Button("🔄 히스토리 새로고침")
+                with gr.Row():
+                    refresh_history_btn = gr.Button("🔄 히스토리 새로고침")
+                    next_history_btn = gr.Button("➡️ 다음 페이지")
         
         # 이벤트 바인딩
+        # 분석/조치 실행은 각각 동시 실행 수를 제한하고, 히스토리 조회는 대기열 없이 처리
         analyze_btn.click(
-            fn=demo_instance.run_rca_analysis,
+            fn=demo_instance.run_rca_analysis_stream,
             inputs=[service_name, error_time],
-            outputs=[analysis_output, actions_output, action_section]
+            outputs=[analysis_output, actions_output, action_section],
+            concurrency_limit=settings.GRADIO_ANALYZE_CONCURRENCY,
+            concurrency_id="rca_analysis"
         )
         
         execute_btn.click(
             fn=demo_instance.execute_selected_action,
             inputs=[action_choice],
-            outputs=[execution_output]
+            outputs=[execution_output],
+            concurrency_limit=settings.GRADIO_EXECUTE_CONCURRENCY,
+            concurrency_id="action_execution"
+        )
+        
+        prefetch_btn.click(
+            fn=demo_instance.refresh_prefetch_results,
+            outputs=[actions_output],
+            concurrency_limit=None
         )
         
         refresh_history_btn.click(
             fn=demo_instance.get_execution_history,
-            outputs=[history_output]
+            inputs=[history_service, history_status],
+            outputs=[history_output, history_cursor],
+            concurrency_limit=None
+        )
+        
+        next_history_btn.click(
+            fn=demo_instance.get_next_history_page,
+            inputs=[history_service, history_status, history_cursor],
+            outputs=[history_output, history_cursor],
+            concurrency_limit=None
         )
         
         # 시작 시 샘플 데이터 로드
@@ -530,12 +758,30 @@ def create_gradio_interface():
             outputs=[analysis_output]
         )
     
+    # 대기열 상한 (가득 차면 새 요청은 거절되어 서버가 밀린 작업을 무한정 쌓지 않음)
+    demo.queue(
+        max_size=settings.GRADIO_QUEUE_MAX_SIZE,
+        default_concurrency_limit=settings.GRADIO_ANALYZE_CONCURRENCY
+    )
+    
     return demo
 
 
 if __name__ == "__main__":
     print("🚀 RCA Agent Gradio Demo 시작...")
     
+    # LLM 체인 빌드 및 커넥션 워밍업 (첫 장애 분석에서 콜드 커넥션 비용 제거)
+    try:
+        print(f"🔥 LLM 워밍업 완료: {warmup_llm_clients()}")
+    except Exception as e:
+        print(f"⚠️ LLM 워밍업 생략: {e}")
+    
+    # 그래프 컴파일은 모듈 import가 아니라 서버 시작 시 한 번 (첫 요청 지연 제거)
+    get_durable_app()
+    
+    # 노드 / LLM / 도구 런타임 메트릭을 별도 포트로 노출 (Prometheus 수집용)
+    start_metrics_server()
+    
     # Gradio 인터페이스 생성 및 실행
     demo = create_gradio_interface()
     
@@ -544,6 +790,7 @@ if __name__ == "__main__":
         server_name="0.0.0.0",  # 외부 접속 허용
         server_port=7860,       # 포트 지정
         share=False,            # 공유 링크 생성 안함
+        max_threads=settings.GRADIO_MAX_THREADS,  # 동기 핸들러 실행 스레드 수
         debug=True,             # 디버그 모드
         show_error=True         # 오류 표시
     )
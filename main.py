@@ -1,5 +1,364 @@
+"""
+과거 알림 배치 재실행기
+
+JSONL 파일의 과거 알림을 프로세스 풀에서 그래프로 다시 실행하고, 장애별 결과를 끝나는 대로 JSONL로 씁니다.
+처리량, 장애별 지연 시간 p50/p95/p99, 노드별 소요 시간을 함께 집계해 용량 산정과
+프롬프트/모델 변경 후 재채점에 사용합니다.
+
+입력 한 줄은 알림 딕셔너리이거나 {"slack_alert": {...}, "incident_id": "...", "choice": "1"} 형식입니다.
+choice가 있으면 RemediationDecision에서 그 선택으로 재개해 조치 실행/검증까지 진행합니다.
+
+사용 예:
+    python main.py alerts.jsonl -o results.jsonl --workers 8 --quiet
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+
+# 워커 프로세스별 실행기 (프로세스 초기화 시 생성)
+_app = None
+_resumable_app = None
+
+
+def _init_worker(quiet: bool, workers: int = 1):
+    """워커 프로세스 초기화 (그래프 컴파일은 프로세스마다 한 번)"""
+    global _app
+    if quiet:
+        # 노드의 진행 로그가 결과 출력과 섞이지 않도록 워커 stdout 무시
+        sys.stdout = open(os.devnull, "w")
+    # 재실행에는 승인을 기다리는 사람이 없으므로 승인 대기 중 진단 사전 실행은 하지 않음
+    settings.PREFETCH_ENABLED = False
+    # LLM 스케줄러 한도는 프로세스 단위이므로 같은 API 키를 쓰는 워커끼리 나눠 가짐
+    settings.LLM_RPM_LIMIT /= workers
+    settings.LLM_TPM_LIMIT /= workers
+    settings.LLM_MAX_CONCURRENCY = max(settings.LLM_MIN_CONCURRENCY, settings.LLM_MAX_CONCURRENCY // workers)
+    settings.LLM_INITIAL_CONCURRENCY = min(settings.LLM_INITIAL_CONCURRENCY, settings.LLM_MAX_CONCURRENCY)
+    from agent.graph import get_app
+    _app = get_app()
+
+
+def _get_resumable_app():
+    """choice 재개용 실행기 (워커 프로세스 안에서만 쓰므로 메모리 체크포인터 사용, 장애별 체크포인트는 재실행 후 삭제)"""
+    global _resumable_app
+    if _resumable_app is None:
+        from langgraph.checkpoint.memory import InMemorySaver
+        from agent.graph import get_workflow
+        _resumable_app = get_workflow().compile(checkpointer=InMemorySaver())
+    return _resumable_app
+
+
+def build_initial_state(slack_alert: Dict[str, Any], incident_id: str, force_reanalysis: bool = False) -> Dict[str, Any]:
+    """그래프 초기 상태 생성"""
+    return {
+        "slack_alert": slack_alert,
+        "incident_id": incident_id,
+        "coalesced_alerts": [slack_alert],
+        "context": {},
+        "metrics": {},
+        "logs": [],
+        "traces": [],
+        "force_reanalysis": force_reanalysis,
+        "root_cause": "",
+        "recommended_actions": [],
+        "user_choice": "",
+        "selected_action_details": {},
+        "execution_results": [],
+        "final_status": "",
+        "human_feedback": {}
+    }
+
+
+def _stream_timed(graph, graph_input, config, node_ms: Dict[str, float]) -> Dict[str, Any]:
+    """그래프를 updates 모드로 실행하며 노드별 소요 시간 기록 (노드는 순차 실행)"""
+    result: Dict[str, Any] = {}
+    mark = time.perf_counter()
+    for mode, chunk in graph.stream(graph_input, config, stream_mode=["updates", "values"]):
+        if mode == "values":
+            result = chunk
+            continue
+        now = time.perf_counter()
+        for node in chunk:
+            if node == "__interrupt__":
+                result["__interrupt__"] = chunk[node]
+                continue
+            # 재분석 루프로 같은 노드가 여러 번 실행되면 합산
+            node_ms[node] = node_ms.get(node, 0.0) + (now - mark) * 1000
+        mark = now
+    return result
+
+
+def replay_one(line_no: int, record: Dict[str, Any], force_reanalysis: bool = False) -> Dict[str, Any]:
+    """알림 하나를 그래프로 실행하고 결과 요약 반환 (워커 프로세스에서 실행)"""
+    slack_alert = record.get("slack_alert", record)
+    incident_id = str(record.get("incident_id") or f"replay-{line_no}")
+    choice = record.get("choice")
+    node_ms: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    try:
+        initial_state = build_initial_state(slack_alert, incident_id, force_reanalysis)
+        if choice:
+            graph = _get_resumable_app()
+            from agent.checkpoint import thread_config
+            from langgraph.types import Command
+            config = thread_config(incident_id)
+            try:
+                result = _stream_timed(graph, initial_state, config, node_ms)
+                if "__interrupt__" in result:
+                    result = _stream_timed(graph, Command(resume=str(choice)), config, node_ms)
+            finally:
+                # 워커 수명 동안 체크포인터를 공유하므로, 끝난 장애의 체크포인트(로그/메트릭/도구 결과 포함)는 바로 삭제
+                graph.checkpointer.delete_thread(incident_id)
+        else:
+            result = _stream_timed(_app, initial_state, None, node_ms)
+        status, error = "ok", None
+    except Exception as e:
+        result, status, error = {}, "error", f"{type(e).__name__}: {e}"
+
+    return {
+        "line": line_no,
+        "incident_id": incident_id,
+        "service": slack_alert.get("service"),
+        "status": status,
+        "error": error,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "node_ms": {node: round(ms, 1) for node, ms in node_ms.items()},
+        "root_cause": result.get("root_cause"),
+        "analysis_confidence": result.get("analysis_confidence"),
+        "affected_services": result.get("affected_services"),
+        "recommended_actions": [a.get("title") for a in result.get("recommended_actions") or []],
+        "user_choice": result.get("user_choice") or None,
+        "final_status": result.get("final_status") or ("awaiting_approval" if "__interrupt__" in result else None),
+        "validation_status": (result.get("validation_report") or {}).get("status"),
+        "token_usage": (result.get("token_usage") or {}).get("total"),
+        "model_routing": [
+            {
+                "chain": r["chain"],
+                "tier": r["tier"],
+                "confidence": r["confidence"],
+                "escalated": r["escalated"],
+                "tier_ms": {a["tier"]: a["elapsed_ms"] for a in r["attempts"]},
+            }
+            for r in result.get("model_routing") or []
+        ],
+        "reused_incident": result.get("reused_incident") or None,
+        "similar_incidents": [
+            {"incident_id": m["incident_id"], "similarity": m["similarity"]}
+            for m in result.get("similar_incidents") or []
+        ],
+    }
+
+
+def read_alerts(path: str, limit: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """JSONL 파일에서 (줄 번호, 알림) 순서대로 읽기 (빈 줄 무시)"""
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        count = 0
+        for line_no, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if limit is not None and count >= limit:
+                break
+            yield line_no, json.loads(line)
+            count += 1
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """nearest-rank 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil(n * q / 100)
+    return round(ordered[int(rank) - 1], 1)
+
+
+class ReplayStats:
+    """재실행 처리량 / 지연 시간 / 노드별 소요 시간 집계"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.node_ms: Dict[str, List[float]] = {}
+        self.errors = 0
+        self.final_status: Dict[str, int] = {}
+        self.tokens = {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+        self.reused = 0
+        self.routing: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, entry: Dict[str, Any]):
+        if entry["status"] != "ok":
+            self.errors += 1
+            return
+        self.latencies.append(entry["latency_ms"])
+        for node, ms in entry["node_ms"].items():
+            self.node_ms.setdefault(node, []).append(ms)
+        status = entry["final_status"] or "unknown"
+        self.final_status[status] = self.final_status.get(status, 0) + 1
+        for key in self.tokens:
+            self.tokens[key] += (entry.get("token_usage") or {}).get(key, 0)
+        self.reused += bool(entry.get("reused_incident"))
+        for record in entry.get("model_routing") or []:
+            chain = self.routing.setdefault(record["chain"], {"routed": 0, "escalated": 0, "tier_ms": {}})
+            chain["routed"] += 1
+            chain["escalated"] += bool(record["escalated"])
+            for tier, ms in record["tier_ms"].items():
+                chain["tier_ms"].setdefault(tier, []).append(ms)
+
+    def summary(self, elapsed_s: float, workers: int) -> Dict[str, Any]:
+        total = len(self.latencies) + self.errors
+        return {
+            "incidents": total,
+            "succeeded": len(self.latencies),
+            "errors": self.errors,
+            "workers": workers,
+            "elapsed_s": round(elapsed_s, 2),
+            "throughput_per_s": round(total / elapsed_s, 2) if elapsed_s > 0 else None,
+            "latency_ms": {
+                "p50": percentile(self.latencies, 50),
+                "p95": percentile(self.latencies, 95),
+                "p99": percentile(self.latencies, 99),
+                "max": round(max(self.latencies), 1) if self.latencies else None,
+            },
+            "node_ms": {
+                node: {
+                    "count": len(values),
+                    "mean": round(sum(values) / len(values), 1),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "p99": percentile(values, 99),
+                }
+                for node, values in sorted(self.node_ms.items(), key=lambda kv: -sum(kv[1]))
+            },
+            "final_status": self.final_status,
+            "token_usage": {
+                **self.tokens,
+                "cost_usd": round(self.tokens["cost_usd"], 4),
+                "cost_per_incident_usd": round(self.tokens["cost_usd"] / len(self.latencies), 6) if self.latencies else None,
+            },
+            "reused_incidents": self.reused,
+            "model_routing": {
+                name: {
+                    "routed": chain["routed"],
+                    "escalated": chain["escalated"],
+                    "escalation_rate": round(chain["escalated"] / chain["routed"], 3),
+                    "tier_ms": {
+                        tier: {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+                        for tier, values in chain["tier_ms"].items()
+                    },
+                }
+                for name, chain in self.routing.items()
+            },
+        }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """콘솔 출력용 요약"""
+    latency = summary["latency_ms"]
+    lines = [
+        f"📦 재실행 {summary['incidents']}건 (성공 {summary['succeeded']}, 오류 {summary['errors']}) / 워커 {summary['workers']}개",
+        f"⏱️ 총 {summary['elapsed_s']}초, 처리량 {summary['throughput_per_s']}건/초",
+        f"📈 장애별 지연 시간 p50 {latency['p50']}ms / p95 {latency['p95']}ms / p99 {latency['p99']}ms / 최대 {latency['max']}ms",
+        "🧩 노드별 소요 시간 (평균 / p50 / p95 / p99):",
+    ]
+    for node, stats in summary["node_ms"].items():
+        lines.append(f"   - {node}: {stats['mean']} / {stats['p50']} / {stats['p95']} / {stats['p99']} ms ({stats['count']}회)")
+    tokens = summary["token_usage"]
+    lines.append(
+        f"🪙 토큰 입력 {tokens['input_tokens']:,} / 출력 {tokens['output_tokens']:,}, "
+        f"비용 ${tokens['cost_usd']} (장애당 ${tokens['cost_per_incident_usd']})"
+    )
+    for name, routing in summary["model_routing"].items():
+        tiers = ", ".join(f"{tier} p50 {t['p50']}ms / p95 {t['p95']}ms ({t['count']}회)" for tier, t in routing["tier_ms"].items())
+        lines.append(f"🧭 {name}: 승격 {routing['escalated']}/{routing['routed']}건 ({routing['escalation_rate']:.0%}) - {tiers}")
+    if summary["reused_incidents"]:
+        lines.append(f"♻️ 과거 유사 장애 분석 재사용 {summary['reused_incidents']}건 (LLM 호출 생략)")
+    if summary["final_status"]:
+        lines.append("🏁 최종 상태: " + ", ".join(f"{k} {v}건" for k, v in summary["final_status"].items()))
+    return "\n".join(lines)
+
+
+def run_replay(
+    input_path: str,
+    output_path: str,
+    workers: int = None,
+    limit: Optional[int] = None,
+    force_reanalysis: bool = False,
+    quiet: bool = False,
+) -> Dict[str, Any]:
+    """알림을 프로세스 풀에서 재실행하며 결과를 끝나는 순서대로 기록하고 집계 요약 반환
+
+    한 번에 workers * REPLAY_MAX_IN_FLIGHT건까지만 제출해 입력 파일 전체를 메모리에 올리지 않습니다.
+    """
+    workers = workers or settings.REPLAY_WORKERS
+    max_in_flight = workers * settings.REPLAY_MAX_IN_FLIGHT
+    stats = ReplayStats()
+    alerts = read_alerts(input_path, limit)
+    out = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    started = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(quiet, workers)) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        line_no, record = next(alerts)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(replay_one, line_no, record, force_reanalysis))
+
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = future.result()
+                    stats.add(entry)
+                    out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    return stats.summary(time.perf_counter() - started, workers)
+
+
 def main():
-    print("Hello from rca-agent!")
+    parser = argparse.ArgumentParser(description="과거 알림 JSONL을 RCA 그래프로 배치 재실행")
+    parser.add_argument("input", help="알림 JSONL 파일 경로 (- 이면 stdin)")
+    parser.add_argument("-o", "--output", default="replay_results.jsonl", help="결과 JSONL 경로 (- 이면 stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=settings.REPLAY_WORKERS, help="프로세스 수")
+    parser.add_argument("-n", "--limit", type=int, default=None, help="앞에서부터 재실행할 최대 알림 수")
+    parser.add_argument("--summary", default=None, help="집계 요약 JSON 저장 경로")
+    parser.add_argument("--force-reanalysis", action="store_true", help="LLM 응답 캐시를 쓰지 않고 다시 분석")
+    parser.add_argument("--quiet", action="store_true", help="워커의 노드 진행 로그 숨김")
+    args = parser.parse_args()
+
+    summary = run_replay(
+        args.input,
+        args.output,
+        workers=args.workers,
+        limit=args.limit,
+        force_reanalysis=args.force_reanalysis,
+        quiet=args.quiet,
+    )
+
+    # 결과를 stdout으로 쓰는 경우 요약은 stderr로
+    print(format_summary(summary), file=sys.stderr if args.output == "-" else sys.stdout)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
 
 
 if __name__ == "__main__":
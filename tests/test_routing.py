@@ -0,0 +1,27 @@
+"""agent.routing 신뢰도 파싱 테스트"""
+
+import pytest
+
+from agent.routing import parse_confidence
+
+
+@pytest.mark.parametrize("text, expected", [
+    # ROOT_CAUSE_ANALYSIS_PROMPT의 답변 형식 그대로 ("- 신뢰도 (1-10점)")
+    ("- 신뢰도 (1-10점): 7점", 7),
+    ("**신뢰도 (1-10점)**: 8", 8),
+    ("- **신뢰도 (1-10점)**: 10점", 10),
+    ("신뢰도: 8/10", 8),
+    ("Confidence: 9", 9),
+    ("신뢰도 (1~10): 6", 6),
+])
+def test_parse_confidence(text, expected):
+    assert parse_confidence(text) == expected
+
+
+@pytest.mark.parametrize("text", ["- 신뢰도 (1-10점)", "신뢰도: 높음", ""])
+def test_parse_confidence_missing(text):
+    assert parse_confidence(text) is None
+
+
+def test_parse_confidence_uses_last_value():
+    assert parse_confidence("- 신뢰도 (1-10점): 3점\n재검토 후\n- 신뢰도 (1-10점): 9점") == 9
@@ -0,0 +1,136 @@
+"""
+세션별 장애 상태 저장소
+
+Gradio 브라우저 세션(session_hash)마다 분석 중인 장애 상태를 따로 보관해,
+여러 엔지니어가 동시에 다른 장애를 다뤄도 서로의 상태를 덮어쓰지 않도록 합니다.
+세션 수와 추정 메모리 사용량에 상한을 두고, 가장 오래 사용되지 않은 세션부터 제거(LRU)합니다.
+처리가 끝난 장애의 실행 이력은 세션이 아니라 agent.history_store에 저장합니다.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+
+
+def estimate_size(value: Any) -> int:
+    """상태의 대략적인 메모리 사용량 (직렬화 길이 기준)"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class IncidentSession:
+    """브라우저 세션 하나의 장애 상태"""
+
+    def __init__(self, session_id: str, now: float):
+        self.session_id = session_id
+        self.current_state: Dict[str, Any] = {}
+        self.state_bytes = 0
+        self.created_at = now
+        self.last_access = now
+
+    @property
+    def size_bytes(self) -> int:
+        return self.state_bytes
+
+
+class SessionStore:
+    """세션 수 / 메모리 상한과 유휴 만료를 가진 LRU 세션 저장소"""
+
+    def __init__(
+        self,
+        max_sessions: int = None,
+        max_bytes: int = None,
+        idle_ttl_s: float = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_sessions = settings.SESSION_MAX_SESSIONS if max_sessions is None else max_sessions
+        self.max_bytes = settings.SESSION_MAX_BYTES if max_bytes is None else max_bytes
+        self.idle_ttl_s = settings.SESSION_IDLE_TTL_S if idle_ttl_s is None else idle_ttl_s
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, IncidentSession]" = OrderedDict()
+        self._total_bytes = 0
+        self.stats = {"created": 0, "evicted_lru": 0, "evicted_memory": 0, "expired": 0}
+
+    def get(self, session_id: Optional[str]) -> IncidentSession:
+        """세션 조회 (없으면 생성, 최근 사용으로 갱신)"""
+        session_id = session_id or "default"
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = IncidentSession(session_id, now)
+                self._sessions[session_id] = session
+                self.stats["created"] += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_access = now
+            self._evict(keep=session_id)
+            return session
+
+    def save_state(self, session: IncidentSession, state: Dict[str, Any]):
+        """세션의 현재 장애 상태 교체
+
+        스트리밍 중에는 세션 객체를 오래 들고 있으므로 그사이 다른 세션에 의해 제거될 수 있습니다.
+        제거된 세션이면 결과를 잃지 않도록 다시 넣고, 빠졌던 크기는 다시 집계합니다.
+        """
+        size = estimate_size(state)
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                if session.session_id in self._sessions:
+                    self._remove(session.session_id)
+                session.state_bytes = 0
+                self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            session.current_state = state
+            self._total_bytes += size - session.state_bytes
+            session.state_bytes = size
+            session.last_access = self.clock()
+            self._evict(keep=session.session_id)
+
+    def _remove(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.size_bytes
+
+    def _expire(self, now: float):
+        """유휴 시간이 idle_ttl_s를 넘은 세션 제거 (가장 오래된 세션부터 확인)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.idle_ttl_s:
+                break
+            self._remove(session_id)
+            self.stats["expired"] += 1
+
+    def _evict(self, keep: str):
+        """세션 수 / 메모리 상한을 넘으면 가장 오래 사용되지 않은 세션부터 제거 (현재 세션 제외)"""
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                if len(self._sessions) == 1:
+                    break
+                self._sessions.move_to_end(keep)
+                continue
+            reason = "evicted_lru" if len(self._sessions) > self.max_sessions else "evicted_memory"
+            self._remove(session_id)
+            self.stats[reason] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """세션 수와 추정 메모리 사용량"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self._sessions)
+            stats["total_bytes"] = self._total_bytes
+        stats["max_sessions"] = self.max_sessions
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+# 전역 세션 저장소 인스턴스
+session_store = SessionStore()